@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+#coding: utf-8
+"""
+Benchmarks of the list, show and bulk-action paths, run offline against the
+local API stand-in (``dopy.testing.FakeDoServer``).
+
+    python -m benchmarks.bench_api --droplets 2000 --latency 0.005
+    python -m benchmarks.bench_api --json > bench_output.txt
+
+Each benchmark reports requests/sec, p50/p99 latency per operation and the
+peak Python memory allocated while it ran.
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+from dopy.api.v2 import DoApiDroplets, DoManager
+from dopy.instrument import LatencyHistogram
+from dopy.session import Session
+from dopy.testing import FakeDoServer
+
+BENCHMARKS = []
+
+
+def benchmark(func):
+    BENCHMARKS.append(func)
+    return func
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    index = min(int(round(fraction * (len(values) - 1))), len(values) - 1)
+    return values[index]
+
+
+def measure(name, server, operation, repeat):
+    latencies = []
+    requests_before = server.requests
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    started = time.time()
+    for _ in range(repeat):
+        # Free the previous result so the peak covers one run only
+        result = None
+        began = time.time()
+        result = operation()
+        latencies.append(time.time() - began)
+    elapsed = time.time() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    requests = server.requests - requests_before
+    items = len(result) if isinstance(result, list) else 0
+    return {
+        'name': name,
+        'operations': repeat,
+        'requests': requests,
+        'requests_per_sec': requests / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'peak_kb': peak / 1024.0,
+        # Memory still held by the last result, per item of a listing
+        'bytes_per_item': (current - baseline) / float(items) if items else 0.0,
+    }
+
+
+@benchmark
+def bench_list(server, args):
+    droplets = DoApiDroplets(args.session, api_endpoint=server.url)
+    return measure('list', server, lambda: droplets.list(per_page=args.per_page), args.repeat)
+
+
+@benchmark
+def bench_list_typed(server, args):
+    droplets = DoApiDroplets(args.session, api_endpoint=server.url)
+    return measure('list_typed', server,
+                   lambda: droplets.list(per_page=args.per_page, typed=True), args.repeat)
+
+
+@benchmark
+def bench_list_names(server, args):
+    droplets = DoApiDroplets(args.session, api_endpoint=server.url)
+    return measure('list_names', server,
+                   lambda: droplets.list(per_page=args.per_page, typed=True,
+                                         fields=('id', 'name')), args.repeat)
+
+
+@benchmark
+def bench_iter(server, args):
+    droplets = DoApiDroplets(args.session, api_endpoint=server.url)
+
+    def consume():
+        for _ in droplets.iter_droplets(per_page=args.per_page):
+            pass
+    return measure('iter', server, consume, args.repeat)
+
+
+@benchmark
+def bench_iter_stream(server, args):
+    droplets = DoApiDroplets(args.session, api_endpoint=server.url)
+
+    def consume():
+        for _ in droplets.iter_droplets(per_page=args.per_page, stream=True):
+            pass
+    return measure('iter_stream', server, consume, args.repeat)
+
+
+@benchmark
+def bench_show(server, args):
+    droplets = DoApiDroplets(args.session, api_endpoint=server.url)
+    ids = sorted(server.droplets)[:args.shows]
+    position = iter(range(sys.maxsize))
+
+    def show():
+        droplets.show_droplet(ids[next(position) % len(ids)])
+    return measure('show', server, show, args.shows)
+
+
+@benchmark
+def bench_show_instrumented(server, args):
+    droplets = DoApiDroplets(args.session, api_endpoint=server.url)
+    ids = sorted(server.droplets)[:args.shows]
+    position = iter(range(sys.maxsize))
+    histogram = LatencyHistogram().install()
+
+    def show():
+        droplets.show_droplet(ids[next(position) % len(ids)])
+    try:
+        return measure('show_instrumented', server, show, args.shows)
+    finally:
+        histogram.uninstall()
+
+
+@benchmark
+def bench_bulk_action(server, args):
+    droplets = DoApiDroplets(args.session, api_endpoint=server.url)
+    ids = sorted(server.droplets)[:args.bulk]
+    return measure('bulk_action', server,
+                   lambda: droplets.bulk_action('reboot', droplet_ids=ids), args.repeat)
+
+
+def run(args):
+    results = []
+    with FakeDoServer(droplets=args.droplets, latency=args.latency,
+                      page_size=args.per_page) as server:
+        args.session = Session(pool_size=args.pool_size)
+        args.manager = DoManager(args.session, api_endpoint=server.url)
+        try:
+            for func in BENCHMARKS:
+                if not args.only or func.__name__[len('bench_'):] in args.only:
+                    results.append(func(server, args))
+        finally:
+            args.session.close()
+    return results
+
+
+def report(results, out=sys.stdout):
+    out.write('%-18s %8s %10s %10s %10s %10s %10s\n'
+              % ('benchmark', 'requests', 'req/s', 'p50 ms', 'p99 ms', 'peak KB', 'B/item'))
+    for r in results:
+        out.write('%-18s %8d %10.1f %10.2f %10.2f %10.1f %10.0f\n'
+                  % (r['name'], r['requests'], r['requests_per_sec'],
+                     r['p50_ms'], r['p99_ms'], r['peak_kb'], r['bytes_per_item']))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--droplets', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added per request')
+    parser.add_argument('--per-page', type=int, default=200)
+    parser.add_argument('--pool-size', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--shows', type=int, default=200)
+    parser.add_argument('--bulk', type=int, default=100)
+    parser.add_argument('--only', nargs='*', help='benchmark names to run')
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run(args)
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        report(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+#coding: utf-8
+"""
+Start-up benchmark of the ``dopy.manager`` CLI: the time a fresh interpreter
+takes to import the entry point and resolve a command, and whether that
+pulled in ``requests``.
+
+    python -m benchmarks.bench_startup --repeat 20
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+from benchmarks.bench_api import percentile
+
+# Target for importing the entry point and resolving a command
+DISPATCH_TARGET = 0.050
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import dopy.manager
+dopy.manager.resolve(sys.argv[1])
+elapsed = time.perf_counter() - started
+json.dump({'seconds': elapsed, 'requests': 'requests' in sys.modules,
+           'pprint': 'pprint' in sys.modules}, sys.stdout)
+"""
+
+
+def probe(command='show_droplet'):
+    """Run one fresh interpreter and return its dispatch measurement."""
+    out = subprocess.check_output([sys.executable, '-c', PROBE, command])
+    return json.loads(out.decode('utf-8'))
+
+
+def measure(repeat=10, command='show_droplet'):
+    probes = [probe(command) for _ in range(repeat)]
+    seconds = [p['seconds'] for p in probes]
+    return {
+        'name': 'dispatch',
+        'runs': repeat,
+        'p50_ms': percentile(seconds, 0.50) * 1000,
+        'max_ms': max(seconds) * 1000,
+        'target_ms': DISPATCH_TARGET * 1000,
+        'imports_requests': any(p['requests'] for p in probes),
+        'imports_pprint': any(p['pprint'] for p in probes),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--command', default='show_droplet')
+    parser.add_argument('--json', action='store_true', help='print the result as JSON')
+    args = parser.parse_args(argv)
+    result = measure(args.repeat, args.command)
+    if args.json:
+        json.dump(result, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        sys.stdout.write('dispatch p50 %(p50_ms).2f ms, max %(max_ms).2f ms '
+                         '(target %(target_ms).0f ms), requests imported: %(imports_requests)s\n'
+                         % result)
+
+
+if __name__ == '__main__':
+    main()
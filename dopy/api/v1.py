@@ -10,14 +10,16 @@ import sys
 import pprint
 import requests
 from dopy.exceptions import DoError
+from dopy.session import get_default_session
 
 API_ENDPOINT = 'https://api.digitalocean.com/v1'
 
 
 class DoManager(object):
 
-    def __init__(self, client_id, api_key, api_version=1):
+    def __init__(self, client_id, api_key, api_version=1, session=None):
         self.api_endpoint = API_ENDPOINT
+        self.session = session
         self.client_id = client_id
         self.api_key = api_key
         self.api_version = int(api_version)
@@ -285,7 +287,8 @@ class DoManager(object):
 
     def request_v1(self, url, params={}, method='GET'):
         try:
-            resp = requests.get(url, params=params, timeout=60)
+            session = self.session or get_default_session()
+            resp = session.get(url, params=params, timeout=60)
             json = resp.json()
         except ValueError:  # requests.models.json.JSONDecodeError
             raise ValueError("The API server doesn't respond with a valid json")
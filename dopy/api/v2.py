@@ -5,10 +5,25 @@ This module simply sends request to the Digital Ocean API,
 and returns their response as a dict.
 """
 
+import uuid
+from functools import partial
+
 from requests import codes, RequestException
+from six.moves.urllib.parse import quote
 from dopy import API_TOKEN, API_ENDPOINT
+from dopy import codec
 from dopy import common as c
-from dopy.exceptions import DoError
+from dopy.coalesce import flight_key
+from dopy.commands import DOMAINS, DROPLETS, MANAGER, resolve
+from dopy.exceptions import DoBatchError, DoError
+from dopy.instrument import HOOKS
+from dopy.models import Domain, DomainRecord, Droplet
+from dopy.ratelimit import BACKGROUND, INTERACTIVE, get_limiter
+from dopy.replicate import ImageReplicator
+from dopy.rollout import Rollout
+from dopy.waiter import ActionWaiter, DropletWaiter
+
+STREAM_CHUNK_SIZE = 16384
 
 REQUEST_METHODS = {
     'POST': c.post_request,
@@ -18,67 +33,259 @@ REQUEST_METHODS = {
 }
 
 
+# Shared with dopy.api.v2_async========================
+def droplet_params(size_id, image_id, region_id, ssh_key_ids=None, virtio=True,
+                   private_networking=False, backups_enabled=False, user_data=None,
+                   ipv6=False):
+    """The body of a droplet create, less its name(s)."""
+    params = {
+        'size': str(size_id),
+        'image': str(image_id),
+        'region': str(region_id),
+        'virtio': str(virtio).lower(),
+        'ipv6': str(ipv6).lower(),
+        'private_networking': str(private_networking).lower(),
+        'backups': str(backups_enabled).lower(),
+    }
+    if ssh_key_ids:
+        # Need to be an array in v2
+        if not isinstance(ssh_key_ids, (list, tuple)):
+            ssh_key_ids = [ssh_key_ids]
+        params['ssh_keys'] = [str(key_id) for key_id in ssh_key_ids]
+
+    if user_data:
+        params['user_data'] = user_data
+    return params
+
+
+def domain_record_params(record_type, data, name=None, priority=None, port=None,
+                         weight=None, ttl=None, flags=None, tag=None):
+    params = {'data': data}
+    params['type'] = record_type
+
+    if name:
+        params['name'] = name
+    if priority:
+        params['priority'] = priority
+    if port:
+        params['port'] = port
+    if weight:
+        params['weight'] = weight
+    if ttl:
+        params['ttl'] = ttl
+    if flags is not None:
+        params['flags'] = flags
+    if tag:
+        params['tag'] = tag
+    return params
+
+
+def populate_droplet_ips(droplet):
+    droplet[u'ip_address'] = ''
+    for networkIndex in range(len(droplet['networks']['v4'])):
+        network = droplet['networks']['v4'][networkIndex]
+        if network['type'] == 'public':
+            droplet[u'ip_address'] = network['ip_address']
+        if network['type'] == 'private':
+            droplet[u'private_ip_address'] = network['ip_address']
+
+
 class ApiRequest(object):
 
     def __init__(self, uri=None, headers=None, params=None,
-                 timeout=60, method='GET'):
+                 timeout=60, method='GET', session=None, priority=INTERACTIVE,
+                 endpoint=None, token=None):
+        self.endpoint = endpoint or API_ENDPOINT
+        self.token = token or API_TOKEN
         self.set_url(uri)
         self.set_headers(headers)
         self.params = params
         self.timeout = timeout
         self.method = method
+        self.session = session
+        self.priority = priority
+        self.limiter = get_limiter(self.token)
         self.response = None
+        self.json = None
         self._verify_method()
 
     def set_headers(self, headers):
         self.headers = {} if not isinstance(headers, dict) else headers
-        self.headers['Authorization'] = "Bearer %s" % API_TOKEN
+        self.headers['Authorization'] = "Bearer %s" % self.token
 
     def set_url(self, uri):
         if uri is None:
             uri = '/'
         if not uri.startswith('/'):
             uri = '/' + uri
-        self.url = '{}/v2{}'.format(API_ENDPOINT, uri)
+        self.path = uri
+        self.url = '{}/v2{}'.format(self.endpoint, uri)
 
     def _verify_method(self):
         if self.method not in REQUEST_METHODS.keys():
             raise DoError('Unsupported method %s' % self.method)
 
+    def _decode(self):
+        """Decode the response body, once, into ``self.json``."""
+        content = self.response.content
+        if not content:
+            # A successful DELETE comes back with an empty body
+            self.json = {'status': self.response.status_code}
+            return self.json
+        try:
+            self.json = codec.loads(content)
+        except ValueError:
+            self.response.raise_for_status()
+            raise ValueError("The API server doesn't respond with a valid json")
+        return self.json
+
     def _verify_status_code(self):
-        if self.response.status_code != codes.ok:
-            try:
-                if 'error_message' in self.response:
-                    raise DoError(self.response['error_message'])
-                elif 'message' in self.response:
-                    raise DoError(self.response['message'])
-            except:
-                # The JSON reponse is bad, so raise an exception with the HTTP status
-                self.response.raise_for_status()
+        if self.response.status_code >= codes.bad_request:
+            if isinstance(self.json, dict):
+                for field in ('error_message', 'message'):
+                    if field in self.json:
+                        raise DoError(self.json[field])
+            # The JSON reponse is bad, so raise an exception with the HTTP status
+            self.response.raise_for_status()
 
     def _verify_response_id(self):
-        response = self.response.json()
-        if response.get('id') == 'not_found':
-            raise DoError(response['message'])
+        if isinstance(self.json, dict) and self.json.get('id') == 'not_found':
+            raise DoError(self.json['message'])
+
+    def _update_rate_limit(self):
+        self.limiter.update(self.response.headers)
+        if self.response.status_code == codes.too_many_requests:
+            self.limiter.exhaust()
 
     def run(self):
+        self.limiter.acquire(self.priority)
+        if not HOOKS:
+            return self._send()
+        event = HOOKS.start(self.method, self.path)
         try:
-            self.response = REQUEST_METHODS[self.method](self.url, self.params, self.headers, self.timeout)
-        except ValueError:
-            raise ValueError("The API server doesn't respond with a valid json")
-        except RequestException as e:
-            raise RuntimeError(e)
+            json = self._send()
+        except Exception as e:
+            HOOKS.fail(event, self.response, e)
+            raise
+        HOOKS.finish(event, self.response)
+        return json
 
+    def _send(self):
+        self._request()
+        self._update_rate_limit()
+        self._decode()
         self._verify_status_code()
         self._verify_response_id()
-        return self.response.json()
+        return self.json
+
+    def _request(self, stream=False):
+        kwargs = {'session': self.session}
+        if stream:
+            kwargs['stream'] = True
+        try:
+            self.response = REQUEST_METHODS[self.method](self.url, self.params, self.headers,
+                                                         self.timeout, **kwargs)
+        except RequestException as e:
+            raise RuntimeError(e)
+
+    def stream(self, key):
+        """Yield the items of the ``key`` array as the response body arrives.
+
+        Once the items are exhausted ``self.json`` holds the rest of the body
+        (``links``, ``meta``).
+        """
+        self.limiter.acquire(self.priority)
+        event = HOOKS.start(self.method, self.path) if HOOKS else None
+        items = None
+        try:
+            self._request(stream=True)
+            self._update_rate_limit()
+            if self.response.status_code >= codes.bad_request:
+                self._decode()
+                self._verify_status_code()
+            items = codec.ItemStream(self.response.iter_content(STREAM_CHUNK_SIZE), key)
+            for item in items:
+                yield item
+            self.json = items.envelope
+            self._verify_response_id()
+        except Exception as e:
+            if event is not None:
+                HOOKS.fail(event, self.response, e, items.bytes if items else None)
+            raise
+        finally:
+            if self.response is not None:
+                self.response.close()
+        if event is not None:
+            HOOKS.finish(event, self.response, items.bytes)
 
 
 class DoApiV2Base(object):
 
-    def request(self, path, params={}, method='GET'):
-        api = ApiRequest(path, params=params, method=method)
-        return api.run()
+    page_workers = c.DEFAULT_PAGE_WORKERS
+
+    def __init__(self, session=None, cache=None, api_endpoint=None, token=None, flights=None):
+        self.session = session
+        self.cache = cache
+        # A dopy.coalesce.SingleFlight: concurrent identical GETs then share
+        # one request. None sends each one
+        self.flights = flights
+        self.api_endpoint = api_endpoint or API_ENDPOINT
+        # None uses the process-wide DO_API_TOKEN
+        self.token = token
+        # Called as listener(method, path, params, json) after each mutation
+        self.listeners = []
+
+    def request(self, path, params={}, method='GET', priority=INTERACTIVE):
+        api = ApiRequest(path, params=params, method=method, session=self.session,
+                         priority=priority, endpoint=self.api_endpoint, token=self.token)
+        if method == 'GET':
+            return self._get(api, path, params)
+
+        try:
+            json = api.run()
+        finally:
+            if self.cache is not None:
+                self.cache.invalidate(path)
+        for listener in self.listeners:
+            listener(method, path, params, json)
+        return json
+
+    def _get(self, api, path, params):
+        cache = self.cache
+        if cache is not None and cache.ttl_for(path) <= 0:
+            # Never stored, so the lookup would only count a miss
+            cache = None
+        if cache is not None:
+            json = cache.get(path, params)
+            if json is not None:
+                return json
+        if self.flights is None:
+            json = api.run()
+        else:
+            key = flight_key(self.api_endpoint, path, params, api.token)
+            json = self.flights.do(key, api.run)
+        if cache is not None:
+            cache.set(path, params, json)
+        return json
+
+    def request_all(self, path, params=None, per_page=None, transform=None):
+        fetch = c.paginated(partial(self.request, priority=BACKGROUND))
+        return fetch(path, params, per_page=per_page, max_workers=self.page_workers,
+                     transform=transform)
+
+    def iter_request(self, path, key, params=None, per_page=None, stream=False):
+        if stream:
+            return c.stream_items(self._open_page, path, key, params, per_page)
+        fetch = partial(self.request, priority=BACKGROUND)
+        return c.iter_items(fetch, path, key, params, per_page)
+
+    def _open_page(self, path, params):
+        return ApiRequest(path, params=params, session=self.session, priority=BACKGROUND,
+                          endpoint=self.api_endpoint, token=self.token)
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
 
     @classmethod
     def get_endpoint(cls, pathlist=None, trailing_slash=False):
@@ -87,40 +294,29 @@ class DoApiV2Base(object):
         pathlist.insert(0, cls.endpoint)
         if trailing_slash:
             pathlist.append('')
-        return '/'.join(pathlist)
+        return '/'.join(str(part) for part in pathlist)
 
 
 class DoManager(DoApiV2Base):
 
-    def __init__(self):
-        self.api_endpoint = API_ENDPOINT
+    def __init__(self, session=None, cache=None, api_endpoint=None, token=None, flights=None):
+        super(DoManager, self).__init__(session, cache, api_endpoint, token, flights)
+        self._targets = None
 
     def retro_execution(self, method_name, *args, **kwargs):
-        retrometh = {
-            "all_active_droplets": DoApiDroplets().list,
-            "new_droplet": DoApiDroplets().create,
-            "show_droplet": DoApiDroplets().show_droplet,
-            "droplet_v2_action": DoApiDroplets().droplet_v2_action,
-            "reboot_droplet": DoApiDroplets().reboot_droplet,
-            "power_cycle_droplet": DoApiDroplets().power_cycle_droplet,
-            "shutdown_droplet": DoApiDroplets().shutdown_droplet,
-            "power_off_droplet": DoApiDroplets().power_off_droplet,
-            "power_on_droplet": DoApiDroplets().power_on_droplet,
-            "password_reset_droplet": DoApiDroplets().password_reset_droplet,
-            "resize_droplet": DoApiDroplets().resize_droplet,
-            "snapshot_droplet": DoApiDroplets().snapshot_droplet,
-            "restore_droplet": DoApiDroplets().restore_droplet,
-            "rebuild_droplet": DoApiDroplets().rebuild_droplet,
-            "enable_backups_droplet": DoApiDroplets().enable_backups_droplet,
-            "disable_backups_droplet": DoApiDroplets().disable_backups_droplet,
-            "rename_droplet": DoApiDroplets().rename_droplet,
-            "destroy_droplet": DoApiDroplets().destroy_droplet,
-            "populate_droplet_ips": DoApiDroplets().populate_droplet_ips,
-            "all_domains": DoApiDomains().list,
-            "new_domain": DoApiDomains().create,
-            "show_domain": DoApiDomains().show,
-        }
-        return retrometh[method_name](*args, **kwargs)
+        target, name = resolve(method_name)
+        return getattr(self.targets()[target], name)(*args, **kwargs)
+
+    def targets(self):
+        """The API objects serving the commands, built once and shared."""
+        if self._targets is None:
+            droplets = DoApiDroplets(self.session, self.cache, self.api_endpoint, self.token,
+                                     self.flights)
+            domains = DoApiDomains(self.session, self.cache, self.api_endpoint, self.token,
+                                   self.flights)
+            droplets.listeners = domains.listeners = self.listeners
+            self._targets = {MANAGER: self, DROPLETS: droplets, DOMAINS: domains}
+        return self._targets
 
     # regions==========================================
     def all_regions(self):
@@ -128,11 +324,15 @@ class DoManager(DoApiV2Base):
         return json['regions']
 
     # images==========================================
-    def all_images(self, filter='global'):
+    def all_images(self, filter='global', per_page=None):
         params = {'filter': filter}
-        json = self.request('/images/', params)
+        json = self.request_all('/images/', params, per_page=per_page)
         return json['images']
 
+    def iter_images(self, filter='global', per_page=None, stream=False):
+        params = {'filter': filter}
+        return self.iter_request('/images/', 'images', params, per_page=per_page, stream=stream)
+
     def private_images(self):
         json = self.request('/images?private=true')
         return json['images']
@@ -158,6 +358,15 @@ class DoManager(DoApiV2Base):
         json.pop('status', None)
         return json
 
+    def replicate_images(self, images, regions, timeout=None, **options):
+        """Copy ``images`` to every region of ``regions`` they are not in yet,
+        and wait until each replica is ready.
+
+        ``options`` are those of ``dopy.replicate.ImageReplicator``. Returns
+        the replication.
+        """
+        return ImageReplicator(self, **options).replicate(images, regions, timeout)
+
     # ssh_keys=========================================
     def all_ssh_keys(self):
         json = self.request('/account/keys')
@@ -199,49 +408,126 @@ class DoManager(DoApiV2Base):
     def show_event(self, event_id):
         return self.show_action(event_id)
 
+    def wait_for_actions(self, actions, timeout=None, callback=None):
+        waiter = ActionWaiter(self)
+        for action in actions:
+            waiter.add(action, callback)
+        return waiter.wait(timeout)
+
 
 class DoApiDroplets(DoApiV2Base):
 
     endpoint = '/droplets'
-
-    def list(self):
-        json = self.request(self.get_endpoint(trailing_slash=True))
+    bulk_workers = 8
+    # Names the API accepts in one multi-name create
+    create_batch = 10
+    # Action types the API can apply to every droplet of a tag in one call
+    tag_actions = ('power_cycle', 'power_on', 'power_off', 'shutdown',
+                   'enable_private_networking', 'enable_ipv6',
+                   'enable_backups', 'disable_backups', 'snapshot')
+
+    def list(self, per_page=None, typed=False, fields=None):
+        if typed:
+            json = self.request_all(self.get_endpoint(trailing_slash=True), per_page=per_page,
+                                    transform=Droplet.decode_page('droplets', fields))
+            return json['droplets']
+
+        json = self.request_all(self.get_endpoint(trailing_slash=True), per_page=per_page)
         for index in range(len(json['droplets'])):
             self.populate_droplet_ips(json['droplets'][index])
         return json['droplets']
 
+    def iter_droplets(self, per_page=None, typed=False, fields=None, stream=False):
+        for droplet in self.iter_request(self.get_endpoint(trailing_slash=True),
+                                         'droplets', per_page=per_page, stream=stream):
+            if typed:
+                yield Droplet(droplet, fields)
+                continue
+            self.populate_droplet_ips(droplet)
+            yield droplet
+
     def create(self, name, size_id, image_id, region_id,
                ssh_key_ids=None, virtio=True, private_networking=False,
                backups_enabled=False, user_data=None, ipv6=False):
-        params = {
-            'name': str(name),
-            'size': str(size_id),
-            'image': str(image_id),
-            'region': str(region_id),
-            'virtio': str(virtio).lower(),
-            'ipv6': str(ipv6).lower(),
-            'private_networking': str(private_networking).lower(),
-            'backups': str(backups_enabled).lower(),
-        }
-        if ssh_key_ids:
-            # Need to be an array in v2
-            if isinstance(ssh_key_ids, basestring):
-                ssh_key_ids = [ssh_key_ids]
-
-            if isinstance(ssh_key_ids, list):
-                for index in range(len(ssh_key_ids)):
-                    ssh_key_ids[index] = str(ssh_key_ids[index])
-
-            params['ssh_keys'] = ssh_key_ids
-
-        if user_data:
-            params['user_data'] = user_data
-
+        params = droplet_params(size_id, image_id, region_id, ssh_key_ids, virtio,
+                                private_networking, backups_enabled, user_data, ipv6)
+        params['name'] = str(name)
         json = self.request(self.get_endpoint(), params=params, method='POST')
         created_id = json['droplet']['id']
         json = self.show_droplet(created_id)
         return json
 
+    def create_droplets(self, names, size_id, image_id, region_id, tags=None, **options):
+        """Create the droplets ``names`` with the multi-name create call.
+
+        The API takes at most ``create_batch`` names per call; the calls run
+        concurrently. Returns the created droplets (still booting). When a
+        call fails, raises ``DoBatchError`` carrying the droplets the other
+        calls created and the failed names.
+        """
+        params = droplet_params(size_id, image_id, region_id, **options)
+        if tags:
+            params['tags'] = list(tags)
+        names = [str(name) for name in names]
+        batches = [names[i:i + self.create_batch]
+                   for i in range(0, len(names), self.create_batch)]
+
+        def run(batch):
+            json = self.request(self.get_endpoint(), params=dict(params, names=batch),
+                                method='POST')
+            return json['droplets']
+
+        created = []
+        failed = []
+        for batch, droplets, error in c.map_concurrently(run, batches, self.bulk_workers):
+            if error is not None:
+                failed.append((batch, error))
+            else:
+                created.extend(droplets)
+        if failed:
+            raise DoBatchError('Could not create %s (%s); created %s droplet(s) with tags %s' % (
+                ', '.join(name for batch, _ in failed for name in batch), failed[0][1],
+                len(created), tags), created, failed)
+        return created
+
+    def provision(self, names, size_id, image_id, region_id, tags=None, timeout=None,
+                  **options):
+        """Create the droplets ``names`` and yield each one once it is active
+        with its networks assigned.
+
+        The batch is tagged with a generated tag, and readiness is read from
+        one listing of that tag per poll tick. The tag is deleted once the
+        waiting is over, whether it succeeded, failed or timed out. When some
+        names could not be created, the droplets that were still get yielded
+        as they become ready, then the ``DoBatchError`` is raised.
+        """
+        tag = 'dopy-batch-%s' % uuid.uuid4().hex[:12]
+        error = None
+        try:
+            created = self.create_droplets(names, size_id, image_id, region_id,
+                                           list(tags or []) + [tag], **options)
+        except DoBatchError as e:
+            created, error = e.created, e
+        waiter = DropletWaiter(self, tag)
+        for droplet in created:
+            waiter.add(droplet)
+        return self._provisioned(waiter, timeout, error)
+
+    def _provisioned(self, waiter, timeout, error):
+        try:
+            for droplet in waiter.iter_ready(timeout):
+                yield droplet
+        finally:
+            # The tag only served to poll the batch
+            if waiter.results or waiter.pending:
+                self.delete_tag(waiter.tag)
+        if error is not None:
+            raise error
+
+    def delete_tag(self, tag):
+        """Delete ``tag``, which also removes it from every droplet."""
+        return self.request('/tags/%s' % tag, method='DELETE')
+
     def show_droplet(self, droplet_id):
         json = self.request(self.get_endpoint([droplet_id]))
         self.populate_droplet_ips(json['droplet'])
@@ -251,7 +537,8 @@ class DoApiDroplets(DoApiV2Base):
         if params is None:
             params = {}
         params['type'] = droplet_type
-        return self.request(self.get_endpoint([droplet_id, 'actions']), params=params, method='POST')
+        return self.request(self.get_endpoint([droplet_id, 'actions']), params=params,
+                            method='POST')
 
     def reboot_droplet(self, droplet_id):
         json = self.droplet_v2_action(droplet_id, 'reboot')
@@ -328,22 +615,54 @@ class DoApiDroplets(DoApiV2Base):
         json.pop('status', None)
         return json
 
+    def bulk_action(self, droplet_type, droplet_ids=None, tag_name=None, params=None):
+        """Apply one action to many droplets, given by id or by tag.
+
+        Returns ``{droplet_id: {'action': ..., 'error': ...}}``; a droplet
+        that fails does not stop the others.
+        """
+        params = dict(params or {})
+        if tag_name is not None and droplet_type in self.tag_actions:
+            path = '%s?tag_name=%s' % (self.get_endpoint(['actions']), quote(str(tag_name)))
+            json = self.request(path, params=dict(params, type=droplet_type), method='POST')
+            return dict((action['resource_id'], {'action': action, 'error': None})
+                        for action in json['actions'])
+
+        if tag_name is not None:
+            droplet_ids = [droplet['id'] for droplet in self.iter_request(
+                self.get_endpoint(trailing_slash=True), 'droplets', {'tag_name': tag_name})]
+
+        def run(droplet_id):
+            return self.droplet_v2_action(droplet_id, droplet_type, dict(params))
+
+        out = {}
+        for droplet_id, json, error in c.map_concurrently(run, droplet_ids or [],
+                                                          self.bulk_workers):
+            if error is not None:
+                out[droplet_id] = {'action': None, 'error': error}
+            else:
+                out[droplet_id] = {'action': json.get('action'), 'error': None}
+        return out
+
+    def rollout(self, droplets, steps, **options):
+        """Run the chain ``steps`` over ``droplets`` in rolling waves.
+
+        ``options`` are those of ``dopy.rollout.Rollout``. Returns its report.
+        """
+        return Rollout(self, steps, **options).run(droplets)
+
     def populate_droplet_ips(self, droplet):
-        droplet[u'ip_address'] = ''
-        for networkIndex in range(len(droplet['networks']['v4'])):
-            network = droplet['networks']['v4'][networkIndex]
-            if network['type'] == 'public':
-                droplet[u'ip_address'] = network['ip_address']
-            if network['type'] == 'private':
-                droplet[u'private_ip_address'] = network['ip_address']
+        populate_droplet_ips(droplet)
 
 
 class DoApiDomains(DoApiV2Base):
 
     endpoint = '/domains'
 
-    def list(self):
+    def list(self, typed=False):
         json = self.request(self.get_endpoint(trailing_slash=True))
+        if typed:
+            return [Domain(domain) for domain in json['domains']]
         return json['domains']
 
     def create(self, name, ip):
@@ -360,24 +679,24 @@ class DoApiDomains(DoApiV2Base):
         # TODO
         return True
 
-    def all_domain_records(self, domain_id):
-        json = self.request('/domains/%s/records/' % domain_id)
+    def all_domain_records(self, domain_id, per_page=None, typed=False, fields=None):
+        transform = DomainRecord.decode_page('domain_records', fields) if typed else None
+        json = self.request_all('/domains/%s/records/' % domain_id, per_page=per_page,
+                                transform=transform)
         return json['domain_records']
 
-    def new_domain_record(self, domain_id, record_type, data, name=None,
-                          priority=None, port=None, weight=None):
-        params = {'data': data}
-        params['type'] = record_type
-
-        if name:
-            params['name'] = name
-        if priority:
-            params['priority'] = priority
-        if port:
-            params['port'] = port
-        if weight:
-            params['weight'] = weight
+    def iter_domain_records(self, domain_id, per_page=None, typed=False, fields=None,
+                            stream=False):
+        records = self.iter_request('/domains/%s/records/' % domain_id,
+                                    'domain_records', per_page=per_page, stream=stream)
+        if typed:
+            return (DomainRecord(record, fields) for record in records)
+        return records
 
+    def new_domain_record(self, domain_id, record_type, data, name=None,
+                          priority=None, port=None, weight=None, ttl=None, flags=None, tag=None):
+        params = domain_record_params(record_type, data, name, priority, port, weight, ttl,
+                                      flags, tag)
         json = self.request('/domains/%s/records/' % domain_id, params, method='POST')
         return json['domain_record']
 
@@ -392,6 +711,12 @@ class DoApiDomains(DoApiV2Base):
         json = self.request('/domains/%s/records/%s' % (domain_id, record_id), params, method='PUT')
         return json['domain_record']
 
+    def update_domain_record(self, domain_id, record_id, **fields):
+        """Change any of the record's fields (type, name, data, ttl, priority...)."""
+        json = self.request('/domains/%s/records/%s' % (domain_id, record_id), fields,
+                            method='PUT')
+        return json['domain_record']
+
     def destroy_domain_record(self, domain_id, record_id):
         self.request('/domains/%s/records/%s' % (domain_id, record_id), method='DELETE')
         return True
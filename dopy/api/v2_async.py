@@ -0,0 +1,487 @@
+#!/usr/bin/env python
+#coding: utf-8
+"""
+This module sends asyncio requests to the Digital Ocean API,
+and returns their response as a dict.
+
+It requires the optional ``aiohttp`` dependency (``pip install dopy[async]``).
+"""
+
+import asyncio
+import copy
+import json
+
+import aiohttp
+from requests import codes, HTTPError
+
+from dopy import common as c
+from dopy.api.v2 import (ApiRequest, domain_record_params, droplet_params,
+                          populate_droplet_ips)
+from dopy.coalesce import flight_key
+from dopy.instrument import HOOKS
+from dopy.ratelimit import BACKGROUND, INTERACTIVE
+from dopy.retry import RetryPolicy
+from dopy.session import DEFAULT_POOL_SIZE
+
+DEFAULT_CONCURRENCY = 10
+
+
+async def acquire(limiter, priority=INTERACTIVE):
+    """``RateLimiter.acquire`` without blocking the event loop."""
+    with limiter.waiting(priority):
+        while True:
+            wait = limiter.try_acquire(priority)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+
+async def retry_call(policy, method, url, send, errors=()):
+    """``RetryPolicy.call`` for a coroutine ``send``."""
+    start = policy.clock()
+    attempt = 0
+    while True:
+        try:
+            response = await send()
+        except errors:
+            wait = policy.next_delay(method, url, attempt, start)
+            if wait is None:
+                raise
+        else:
+            response.retries = attempt
+            wait = policy.next_delay(method, url, attempt, start, response)
+            if wait is None:
+                return response
+        await asyncio.sleep(wait)
+        attempt += 1
+
+
+class AsyncSession(object):
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, keepalive_timeout=30, retry=None):
+        self.pool_size = int(pool_size)
+        self.keepalive_timeout = keepalive_timeout
+        self.retry = retry if retry is not None else RetryPolicy()
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size,
+                                             limit_per_host=self.pool_size,
+                                             keepalive_timeout=self.keepalive_timeout)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def request(self, method, url, params=None, headers=None, timeout=60):
+        kwargs = c._compile_request_args(params, headers, timeout)
+        if method in ('POST', 'PUT'):
+            kwargs['data'] = json.dumps(kwargs.pop('params'))
+        kwargs['timeout'] = aiohttp.ClientTimeout(total=kwargs['timeout'])
+
+        async def send():
+            async with self._get_session().request(method, url, **kwargs) as resp:
+                return AsyncResponse(resp, await resp.read())
+        return await retry_call(self.retry, method, url, send,
+                                (aiohttp.ClientError, asyncio.TimeoutError))
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+        self._session = None
+
+
+class AsyncResponse(object):
+    """A read body with the parts of ``requests.Response`` ApiRequest relies on."""
+
+    def __init__(self, resp, content):
+        self.url = str(resp.url)
+        self.status_code = resp.status
+        self.reason = resp.reason
+        self.headers = resp.headers
+        self.content = content
+
+    def __iter__(self):
+        return iter([self.content])
+
+    def json(self):
+        if self.status_code == codes.no_content and not self.content:
+            return {'status': self.status_code}
+        return json.loads(self.content.decode('utf-8'))
+
+    def raise_for_status(self):
+        if 400 <= self.status_code < 600:
+            raise HTTPError('%s Error: %s for url: %s' % (self.status_code, self.reason, self.url),
+                            response=self)
+
+
+class AsyncApiRequest(ApiRequest):
+
+    async def run(self):
+        await acquire(self.limiter, self.priority)
+        if not HOOKS:
+            return await self._send()
+        event = HOOKS.start(self.method, self.path)
+        try:
+            json = await self._send()
+        except Exception as e:
+            HOOKS.fail(event, self.response, e)
+            raise
+        HOOKS.finish(event, self.response)
+        return json
+
+    async def _send(self):
+        try:
+            self.response = await self.session.request(self.method, self.url, self.params,
+                                                       self.headers, self.timeout)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise RuntimeError(e)
+
+        self._update_rate_limit()
+        self._decode()
+        self._verify_status_code()
+        self._verify_response_id()
+        return self.json
+
+
+# Result of a flight whose leader was cancelled
+_ABANDONED = object()
+
+
+class AsyncSingleFlight(object):
+    """The asyncio counterpart of ``dopy.coalesce.SingleFlight``.
+
+    When the leading caller is cancelled, the callers waiting on it run the
+    call again instead of seeing the cancellation.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key, func):
+        flight = self._flights.get(key)
+        while flight is not None:
+            flight[1] += 1
+            self.coalesced += 1
+            # A cancelled follower must not cancel the shared request
+            result = await asyncio.shield(flight[0])
+            if result is not _ABANDONED:
+                return copy.deepcopy(result)
+            # The leader was cancelled, not this caller: run the call again
+            self.coalesced -= 1
+            flight = self._flights.get(key)
+
+        future = asyncio.get_running_loop().create_future()
+        flight = self._flights[key] = [future, 0]
+        self.leaders += 1
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.set_result(_ABANDONED)
+            raise
+        except BaseException as e:
+            if flight[1]:
+                future.set_exception(e)
+            else:
+                future.cancel()
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            del self._flights[key]
+        return copy.deepcopy(result) if flight[1] else result
+
+    def stats(self):
+        return {
+            'requests': self.leaders,
+            'coalesced': self.coalesced,
+            'in_flight': len(self._flights),
+        }
+
+
+class AsyncDoManager(object):
+
+    page_workers = c.DEFAULT_PAGE_WORKERS
+
+    def __init__(self, session=None, max_concurrency=DEFAULT_CONCURRENCY, api_endpoint=None,
+                 token=None, coalesce=False):
+        self.session = session if session is not None else AsyncSession()
+        self.api_endpoint = api_endpoint
+        self.token = token
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+        # Concurrent identical GETs of this manager share one request
+        self.flights = AsyncSingleFlight() if coalesce else None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        await self.session.close()
+
+    # low_level========================================
+    async def request(self, path, params=None, method='GET', priority=INTERACTIVE):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        api = AsyncApiRequest(path, params=params or {}, method=method, session=self.session,
+                              priority=priority, endpoint=self.api_endpoint, token=self.token)
+        if method != 'GET' or self.flights is None:
+            return await self._run(api)
+        key = flight_key(self.api_endpoint, path, params, api.token)
+        return await self.flights.do(key, lambda: self._run(api))
+
+    async def _run(self, api):
+        async with self._semaphore:
+            return await api.run()
+
+    async def request_all(self, path, params=None, per_page=None):
+        params = dict(params or {})
+        if per_page is not None:
+            params['per_page'] = min(int(per_page), c.MAX_PER_PAGE)
+        first = await self.request(path, params, priority=BACKGROUND)
+        last = c._page_count(first, params.get('per_page'))
+        limit = asyncio.Semaphore(self.page_workers)
+
+        async def fetch(page):
+            async with limit:
+                return await self.request(path, dict(params, page=page), priority=BACKGROUND)
+
+        rest = await asyncio.gather(*[fetch(page) for page in range(2, last + 1)])
+        return c._merge_pages([first] + list(rest))
+
+    async def iter_request(self, path, key, params=None, per_page=None):
+        params = dict(params or {})
+        if per_page is not None:
+            params['per_page'] = min(int(per_page), c.MAX_PER_PAGE)
+        page, last = 1, None
+        pending = asyncio.ensure_future(self.request(path, params, priority=BACKGROUND))
+        try:
+            while pending is not None:
+                result = await pending
+                pending = None
+                if last is None:
+                    last = c._page_count(result, params.get('per_page'))
+                if page < last:
+                    page += 1
+                    pending = asyncio.ensure_future(
+                        self.request(path, dict(params, page=page), priority=BACKGROUND))
+                for item in result.get(key, []):
+                    yield item
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    # droplets=========================================
+    async def all_active_droplets(self, per_page=None):
+        json = await self.request_all('/droplets/', per_page=per_page)
+        for droplet in json['droplets']:
+            populate_droplet_ips(droplet)
+        return json['droplets']
+
+    async def iter_droplets(self, per_page=None):
+        async for droplet in self.iter_request('/droplets/', 'droplets', per_page=per_page):
+            populate_droplet_ips(droplet)
+            yield droplet
+
+    async def new_droplet(self, name, size_id, image_id, region_id,
+                          ssh_key_ids=None, virtio=True, private_networking=False,
+                          backups_enabled=False, user_data=None, ipv6=False):
+        params = droplet_params(size_id, image_id, region_id, ssh_key_ids, virtio,
+                                private_networking, backups_enabled, user_data, ipv6)
+        params['name'] = str(name)
+        json = await self.request('/droplets', params=params, method='POST')
+        return await self.show_droplet(json['droplet']['id'])
+
+    async def show_droplet(self, droplet_id):
+        json = await self.request('/droplets/%s' % droplet_id)
+        populate_droplet_ips(json['droplet'])
+        return json['droplet']
+
+    async def droplet_v2_action(self, droplet_id, droplet_type, params=None):
+        if params is None:
+            params = {}
+        params['type'] = droplet_type
+        return await self.request('/droplets/%s/actions' % droplet_id, params=params, method='POST')
+
+    async def _droplet_action(self, droplet_id, droplet_type, params=None):
+        json = await self.droplet_v2_action(droplet_id, droplet_type, params)
+        json.pop('status', None)
+        return json
+
+    async def reboot_droplet(self, droplet_id):
+        return await self._droplet_action(droplet_id, 'reboot')
+
+    async def power_cycle_droplet(self, droplet_id):
+        return await self._droplet_action(droplet_id, 'power_cycle')
+
+    async def shutdown_droplet(self, droplet_id):
+        return await self._droplet_action(droplet_id, 'shutdown')
+
+    async def power_off_droplet(self, droplet_id):
+        return await self._droplet_action(droplet_id, 'power_off')
+
+    async def power_on_droplet(self, droplet_id):
+        return await self._droplet_action(droplet_id, 'power_on')
+
+    async def password_reset_droplet(self, droplet_id):
+        return await self._droplet_action(droplet_id, 'password_reset')
+
+    async def resize_droplet(self, droplet_id, size_id):
+        return await self._droplet_action(droplet_id, 'resize', {'size': size_id})
+
+    async def snapshot_droplet(self, droplet_id, name):
+        return await self._droplet_action(droplet_id, 'snapshot', {'name': name})
+
+    async def restore_droplet(self, droplet_id, image_id):
+        return await self._droplet_action(droplet_id, 'restore', {'image': image_id})
+
+    async def rebuild_droplet(self, droplet_id, image_id):
+        return await self._droplet_action(droplet_id, 'rebuild', {'image': image_id})
+
+    async def enable_backups_droplet(self, droplet_id):
+        return await self._droplet_action(droplet_id, 'enable_backups')
+
+    async def disable_backups_droplet(self, droplet_id):
+        return await self._droplet_action(droplet_id, 'disable_backups')
+
+    async def rename_droplet(self, droplet_id, name):
+        return await self._droplet_action(droplet_id, 'rename', {'name': name})
+
+    async def destroy_droplet(self, droplet_id, scrub_data=True):
+        json = await self.request('/droplets/%s' % droplet_id, method='DELETE')
+        json.pop('status', None)
+        return json
+
+    # regions==========================================
+    async def all_regions(self):
+        json = await self.request('/regions/')
+        return json['regions']
+
+    # images==========================================
+    async def all_images(self, filter='global', per_page=None):
+        json = await self.request_all('/images/', {'filter': filter}, per_page=per_page)
+        return json['images']
+
+    def iter_images(self, filter='global', per_page=None):
+        return self.iter_request('/images/', 'images', {'filter': filter}, per_page=per_page)
+
+    async def private_images(self):
+        json = await self.request('/images', {'private': 'true'})
+        return json['images']
+
+    async def image_v2_action(self, image_id, image_type, params=None):
+        if params is None:
+            params = {}
+        params['type'] = image_type
+        return await self.request('/images/%s/actions' % image_id, params=params, method='POST')
+
+    async def show_image(self, image_id):
+        json = await self.request('/images/%s' % image_id)
+        return json['image']
+
+    async def destroy_image(self, image_id):
+        await self.request('/images/%s' % image_id, method='DELETE')
+        return True
+
+    async def transfer_image(self, image_id, region_id):
+        json = await self.image_v2_action(image_id, 'transfer', {'region': region_id})
+        json.pop('status', None)
+        return json
+
+    # ssh_keys=========================================
+    async def all_ssh_keys(self):
+        json = await self.request('/account/keys')
+        return json['ssh_keys']
+
+    async def new_ssh_key(self, name, pub_key):
+        params = {'name': name, 'public_key': pub_key}
+        json = await self.request('/account/keys', params, method='POST')
+        return json['ssh_key']
+
+    async def show_ssh_key(self, key_id):
+        json = await self.request('/account/keys/%s/' % key_id)
+        return json['ssh_key']
+
+    async def edit_ssh_key(self, key_id, name, pub_key):
+        # v2 API doesn't allow to change key body now
+        json = await self.request('/account/keys/%s/' % key_id, {'name': name}, method='PUT')
+        return json['ssh_key']
+
+    async def destroy_ssh_key(self, key_id):
+        await self.request('/account/keys/%s' % key_id, method='DELETE')
+        return True
+
+    # sizes============================================
+    async def sizes(self):
+        json = await self.request('/sizes/')
+        return json['sizes']
+
+    # domains==========================================
+    async def all_domains(self):
+        json = await self.request('/domains/')
+        return json['domains']
+
+    async def new_domain(self, name, ip):
+        json = await self.request('/domains', method='POST',
+                                  params={'name': name, 'ip_address': ip})
+        return json['domain']
+
+    async def show_domain(self, domain_id):
+        json = await self.request('/domains/%s/' % domain_id)
+        return json['domain']
+
+    async def destroy_domain(self, domain_id):
+        await self.request('/domains/%s' % domain_id, method='DELETE')
+        return True
+
+    async def all_domain_records(self, domain_id, per_page=None):
+        json = await self.request_all('/domains/%s/records/' % domain_id, per_page=per_page)
+        return json['domain_records']
+
+    def iter_domain_records(self, domain_id, per_page=None):
+        return self.iter_request('/domains/%s/records/' % domain_id, 'domain_records',
+                                 per_page=per_page)
+
+    async def new_domain_record(self, domain_id, record_type, data, name=None, priority=None,
+                                port=None, weight=None, ttl=None, flags=None, tag=None):
+        params = domain_record_params(record_type, data, name, priority, port, weight, ttl,
+                                      flags, tag)
+        json = await self.request('/domains/%s/records/' % domain_id, params, method='POST')
+        return json['domain_record']
+
+    async def show_domain_record(self, domain_id, record_id):
+        json = await self.request('/domains/%s/records/%s' % (domain_id, record_id))
+        return json['domain_record']
+
+    async def edit_domain_record(self, domain_id, record_id, record_type, data,
+                                 name=None, priority=None, port=None, weight=None):
+        # API v.2 allows only record name change
+        json = await self.request('/domains/%s/records/%s' % (domain_id, record_id),
+                                  {'name': name}, method='PUT')
+        return json['domain_record']
+
+    async def destroy_domain_record(self, domain_id, record_id):
+        await self.request('/domains/%s/records/%s' % (domain_id, record_id), method='DELETE')
+        return True
+
+    # events(actions in v2 API)========================
+    async def show_all_actions(self):
+        json = await self.request('/actions')
+        return json['actions']
+
+    async def show_action(self, action_id):
+        json = await self.request('/actions/%s' % action_id)
+        return json['action']
+
+    async def show_event(self, event_id):
+        return await self.show_action(event_id)
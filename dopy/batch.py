@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+#coding: utf-8
+"""
+This module runs many ``dopy.manager`` commands through one process and one
+pooled client: a batch of newline-delimited JSON commands, or a long-lived
+daemon listening on a Unix socket.
+
+Each command is a JSON object such as
+``{"id": 1, "method": "show_droplet", "args": [123]}``; each answer is a JSON
+line carrying the same ``id`` and either a ``result`` or an ``error``.
+
+    python -m dopy.manager --batch commands.jsonl --workers 8
+    python -m dopy.manager --daemon ~/.dopy.sock
+    DO_DAEMON_SOCKET=~/.dopy.sock python -m dopy.manager show_droplet 123
+"""
+
+import json
+import os
+import socket
+import sys
+import threading
+
+# argparse and concurrent.futures are imported where they are used, so that
+# forwarding one command to a daemon (``call``) stays cheap to start
+from dopy.commands import resolve
+from dopy.exceptions import DoError
+
+DEFAULT_WORKERS = 4
+
+
+class Dispatcher(object):
+    """Resolve command names to methods of one shared set of API objects."""
+
+    def __init__(self, manager=None, workers=DEFAULT_WORKERS):
+        if manager is None:
+            from dopy.api.v2 import DoManager
+            from dopy.session import Session
+            manager = DoManager(Session(pool_size=max(workers, 10)))
+        self.manager = manager
+        self.targets = manager.targets()
+        self._methods = {}
+
+    def resolve(self, name):
+        method = self._methods.get(name)
+        if method is None:
+            target, attr = resolve(name)
+            method = self._methods[name] = getattr(self.targets[target], attr)
+        return method
+
+    def call(self, command):
+        if not isinstance(command, dict) or 'method' not in command:
+            raise DoError('A command needs a "method"')
+        method = self.resolve(command['method'])
+        return method(*command.get('args', ()), **command.get('kwargs', {}))
+
+    def execute(self, command, line=None):
+        """Run one command and return its answer (never raises)."""
+        answer = {'id': command.get('id') if isinstance(command, dict) else None}
+        if line is not None:
+            answer['line'] = line
+        try:
+            answer['result'] = self.call(command)
+        except Exception as e:
+            answer['error'] = {'type': e.__class__.__name__, 'message': str(e)}
+        return answer
+
+    def close(self):
+        self.manager.close()
+
+
+def dumps(answer):
+    return json.dumps(answer, default=_encode, separators=(',', ':'))
+
+
+def _encode(value):
+    if hasattr(value, 'to_dict'):
+        return value.to_dict()
+    return str(value)
+
+
+def parse(line, number):
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return {'id': None, 'method': None, '_invalid': 'line %s: %s' % (number, e)}
+
+
+def run_batch(lines, out, dispatcher, workers=DEFAULT_WORKERS):
+    """Run the commands of ``lines`` and write one JSON answer per command.
+
+    Answers are written as the commands complete, so they may come back out
+    of order; match them on ``id`` (or ``line``). At most ``workers * 2``
+    commands are read ahead of their answers, so ``lines`` may be endless.
+    Returns the number of failed commands.
+    """
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+    write_lock = threading.Lock()
+    failed = [0]
+
+    def run(number, command):
+        if isinstance(command, dict) and '_invalid' in command:
+            answer = {'id': None, 'line': number,
+                      'error': {'type': 'ValueError', 'message': command['_invalid']}}
+        else:
+            answer = dispatcher.execute(command, number)
+        with write_lock:
+            if 'error' in answer:
+                failed[0] += 1
+            out.write(dumps(answer) + '\n')
+            out.flush()
+
+    window = workers * 2
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = set()
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            if len(futures) >= window:
+                done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+            futures.add(executor.submit(run, number, parse(line, number)))
+        for future in futures:
+            future.result()
+    return failed[0]
+
+
+# daemon===============================================
+class Daemon(object):
+
+    def __init__(self, path, dispatcher, workers=DEFAULT_WORKERS):
+        self.path = os.path.expanduser(path)
+        self.dispatcher = dispatcher
+        self.workers = workers
+        self._socket = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Create the socket file owner-only from the start, rather than
+        # narrowing it after bind()
+        umask = os.umask(0o177)
+        try:
+            self._socket.bind(self.path)
+        finally:
+            os.umask(umask)
+        self._socket.listen(16)
+        return self
+
+    def serve_forever(self):
+        self._socket.settimeout(0.2)
+        while not self._stop.is_set():
+            try:
+                connection, _ = self._socket.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            connection.settimeout(None)
+            thread = threading.Thread(target=self._handle, args=(connection,))
+            thread.daemon = True
+            thread.start()
+
+    def _handle(self, connection):
+        reader = connection.makefile('r')
+        writer = connection.makefile('w')
+        try:
+            run_batch(reader, writer, self.dispatcher, self.workers)
+        except (IOError, OSError):
+            # The client went away before reading every answer
+            pass
+        finally:
+            reader.close()
+            writer.close()
+            connection.close()
+
+    def stop(self):
+        self._stop.set()
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def send(path, commands):
+    """Send ``commands`` to a daemon and yield its answers as they arrive."""
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    connection.connect(os.path.expanduser(path))
+    try:
+        payload = ''.join(json.dumps(command) + '\n' for command in commands)
+        connection.sendall(payload.encode('utf-8'))
+        connection.shutdown(socket.SHUT_WR)
+        for line in connection.makefile('r'):
+            yield json.loads(line)
+    finally:
+        connection.close()
+
+
+def call(path, method, *args):
+    """Run one command through a daemon and return its result."""
+    for answer in send(path, [{'id': 1, 'method': method, 'args': list(args)}]):
+        if 'error' in answer:
+            raise DoError('%(type)s: %(message)s' % answer['error'])
+        return answer['result']
+    raise DoError('The daemon at %s closed the connection' % path)
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog='python -m dopy.manager')
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--batch', nargs='?', const='-', metavar='FILE',
+                       help='read JSON commands from FILE (default: stdin)')
+    group.add_argument('--daemon', metavar='SOCKET', help='serve commands on a Unix socket')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args(argv)
+
+    dispatcher = Dispatcher(workers=args.workers)
+    try:
+        if args.daemon:
+            with Daemon(args.daemon, dispatcher, args.workers) as daemon:
+                try:
+                    daemon.serve_forever()
+                except KeyboardInterrupt:
+                    pass
+            return 0
+        if args.batch == '-':
+            return 1 if run_batch(sys.stdin, sys.stdout, dispatcher, args.workers) else 0
+        with open(args.batch) as lines:
+            return 1 if run_batch(lines, sys.stdout, dispatcher, args.workers) else 0
+    finally:
+        dispatcher.close()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+#coding: utf-8
+"""
+This module keeps an in-process TTL + LRU cache of API GET responses,
+for the read-mostly catalog endpoints (sizes, regions, images, keys).
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAXSIZE = 256
+
+# Seconds each endpoint prefix stays cached; other paths use ``ttl``.
+DEFAULT_TTLS = {
+    '/sizes': 3600,
+    '/regions': 3600,
+    '/images': 600,
+    '/account/keys': 600,
+}
+
+
+def resource_path(path):
+    path = path.split('?', 1)[0].rstrip('/')
+    if not path.startswith('/'):
+        path = '/' + path
+    return path
+
+
+def _related(first, second):
+    return first == second or first.startswith(second + '/') or second.startswith(first + '/')
+
+
+class ResponseCache(object):
+
+    clock = staticmethod(time.time)
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=0, ttls=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def ttl_for(self, path):
+        path = resource_path(path)
+        best, ttl = -1, self.ttl
+        for prefix, seconds in self.ttls.items():
+            if (path == prefix or path.startswith(prefix + '/')) and len(prefix) > best:
+                best, ttl = len(prefix), seconds
+        return ttl
+
+    @staticmethod
+    def key(path, params=None):
+        items = sorted((params or {}).items())
+        return (path.rstrip('/'), tuple((k, repr(v)) for k, v in items))
+
+    def get(self, path, params=None, default=None):
+        key = self.key(path, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self.clock():
+                # Re-insert to mark the entry most recently used
+                # (OrderedDict.move_to_end does not exist on Python 2)
+                self._entries[key] = self._entries.pop(key)
+                self.hits += 1
+                return copy.deepcopy(entry[1])
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+        return default
+
+    def set(self, path, params, value):
+        ttl = self.ttl_for(path)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        key = self.key(path, params)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (self.clock() + ttl, copy.deepcopy(value))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, path):
+        """Drop the cached entries of ``path`` and of its parent and child resources."""
+        path = resource_path(path)
+        with self._lock:
+            stale = [key for key in self._entries if _related(resource_path(key[0]), path)]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+            }
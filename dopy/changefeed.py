@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+#coding: utf-8
+"""
+This module turns successive listings (droplets, domain records) into a feed
+of added/removed/modified events with field-level diffs.
+
+Every item is fingerprinted with a content hash, so an unchanged item costs
+one hash comparison. Consumers keep a cursor and only read the events after
+it; ``dump``/``load`` persist the feed between runs.
+"""
+
+import hashlib
+import json
+import threading
+from collections import deque
+
+from dopy.exceptions import DoError
+
+ADDED = 'added'
+REMOVED = 'removed'
+MODIFIED = 'modified'
+
+
+def content_hash(item):
+    encoded = json.dumps(item, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+
+
+def field_diff(old, new):
+    changes = {}
+    for field in set(old) | set(new):
+        if old.get(field) != new.get(field):
+            changes[field] = [old.get(field), new.get(field)]
+    return changes
+
+
+class ChangeFeed(object):
+
+    def __init__(self, fetch, key='id', history=10000):
+        self.fetch = fetch
+        self.key = key
+        self.seq = 0
+        self._snapshot = {}
+        self._events = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    def _emit(self, event_type, key, item, changes=None):
+        self.seq += 1
+        event = {'seq': self.seq, 'type': event_type, 'key': key, 'item': item}
+        if changes is not None:
+            event['changes'] = changes
+        self._events.append(event)
+        return event
+
+    def poll(self):
+        """Fetch a fresh listing and return the events it produced."""
+        items = self.fetch()
+        with self._lock:
+            events = []
+            seen = set()
+            for item in items:
+                if not isinstance(item, dict):
+                    item = dict(item.items())
+                key = item[self.key]
+                seen.add(key)
+                digest = content_hash(item)
+                previous = self._snapshot.get(key)
+                if previous is None:
+                    events.append(self._emit(ADDED, key, item))
+                elif previous[0] != digest:
+                    events.append(self._emit(MODIFIED, key, item, field_diff(previous[1], item)))
+                else:
+                    continue
+                self._snapshot[key] = (digest, item)
+            for key in [key for key in self._snapshot if key not in seen]:
+                events.append(self._emit(REMOVED, key, self._snapshot.pop(key)[1]))
+            return events
+
+    def changes(self, cursor=0):
+        """Return ``(events, cursor)`` for the events after ``cursor``.
+
+        Raises ``DoError`` when the events after ``cursor`` have already been
+        dropped from the history; the consumer then has to resync from the
+        current snapshot.
+        """
+        with self._lock:
+            if cursor > self.seq:
+                raise DoError('Cursor %s is ahead of the feed (%s)' % (cursor, self.seq))
+            oldest = self._events[0]['seq'] if self._events else self.seq + 1
+            if cursor + 1 < oldest:
+                raise DoError('Cursor %s has expired, resync from the snapshot' % cursor)
+            return [event for event in self._events if event['seq'] > cursor], self.seq
+
+    def snapshot(self):
+        with self._lock:
+            return [item for _, item in self._snapshot.values()], self.seq
+
+    def dump(self):
+        with self._lock:
+            return {
+                'seq': self.seq,
+                'snapshot': [[key, digest, item]
+                             for key, (digest, item) in self._snapshot.items()],
+                'events': list(self._events),
+            }
+
+    def load(self, state):
+        with self._lock:
+            self.seq = state['seq']
+            self._snapshot = dict((key, (digest, item))
+                                  for key, digest, item in state['snapshot'])
+            self._events.clear()
+            self._events.extend(state.get('events', []))
+        return self
+
+
+def droplet_feed(droplets, per_page=200, **kwargs):
+    return ChangeFeed(lambda: droplets.list(per_page=per_page), **kwargs)
+
+
+def domain_record_feed(domains, domain_id, per_page=200, **kwargs):
+    return ChangeFeed(lambda: domains.all_domain_records(domain_id, per_page=per_page), **kwargs)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+#coding: utf-8
+"""
+This module holds ``DoClient``, one Digital Ocean account: its token, pooled
+session, rate-limit budget and response cache. Several clients can live in
+one process, and ``fan_out`` runs the same query on many of them at once.
+
+    >>> accounts = [DoClient(token, name=team) for team, token in tokens.items()]
+    >>> droplets, errors = fan_out(accounts, 'all_active_droplets')
+    >>> droplets[0]['account']
+    'web-team'
+"""
+
+from dopy import common as c
+from dopy.api.v2 import API_TOKEN, DoManager
+from dopy.cache import ResponseCache
+from dopy.coalesce import SingleFlight
+from dopy.commands import COMMANDS, DOMAINS, DROPLETS
+from dopy.ratelimit import get_limiter
+from dopy.session import Session
+
+DEFAULT_FAN_OUT_WORKERS = 8
+
+
+class DoClient(object):
+
+    def __init__(self, token=None, name=None, session=None, cache=True, api_endpoint=None,
+                 coalesce=False):
+        self.token = token
+        self.name = name
+        self.session = session if session is not None else Session()
+        # True gives the client its own ResponseCache; None or False, none
+        if cache is True:
+            cache = ResponseCache()
+        elif cache is False:
+            cache = None
+        # Concurrent identical GETs of this account share one request
+        flights = SingleFlight() if coalesce else None
+        self.manager = DoManager(self.session, cache, api_endpoint, token, flights)
+        targets = self.manager.targets()
+        self.droplets = targets[DROPLETS]
+        self.domains = targets[DOMAINS]
+
+    def __repr__(self):
+        return '<DoClient %s>' % (self.name or 'default')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def cache(self):
+        return self.manager.cache
+
+    @property
+    def limiter(self):
+        return get_limiter(self.token or API_TOKEN)
+
+    @property
+    def listeners(self):
+        return self.manager.listeners
+
+    def __getattr__(self, name):
+        # The CLI commands (show_droplet, all_domains, ...) of this account
+        try:
+            target, attr = COMMANDS[name]
+        except KeyError:
+            raise AttributeError(name)
+        return getattr(self.manager.targets()[target], attr)
+
+    def call(self, query, *args, **kwargs):
+        """Run ``query``, a command name or a ``func(client)``."""
+        if callable(query):
+            return query(self, *args, **kwargs)
+        return getattr(self, query)(*args, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+def _tag(item, account, key):
+    if hasattr(item, 'to_dict'):
+        item = item.to_dict()
+    if isinstance(item, dict):
+        item[key] = account
+    return item
+
+
+def fan_out(clients, query, args=(), kwargs=None, max_workers=DEFAULT_FAN_OUT_WORKERS,
+            key='account'):
+    """Run ``query`` on every client concurrently and merge the results.
+
+    ``query`` is a command name (``'all_active_droplets'``) or a
+    ``func(client)``. Every item of the merged list carries the name of its
+    account under ``key``. Returns ``(items, errors)``, ``errors`` mapping
+    the name of each account that failed to its exception. A client without
+    a name is known by its index in ``clients``.
+    """
+    kwargs = kwargs or {}
+    items = []
+    errors = {}
+    results = c.map_concurrently(lambda client: client.call(query, *args, **kwargs),
+                                 clients, max_workers)
+    for index, (client, result, error) in enumerate(results):
+        # An unnamed client goes by its position in ``clients``
+        account = client.name if client.name is not None else index
+        if error is not None:
+            errors[account] = error
+        elif isinstance(result, list):
+            items.extend(_tag(item, account, key) for item in result)
+        else:
+            items.append(_tag(result, account, key))
+    return items, errors
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+#coding: utf-8
+"""
+This module coalesces concurrent identical GETs: the first caller (the
+leader) sends the request and every caller arriving while it is in flight
+waits for, and shares, its result.
+
+Followers get a deep copy, and so does the leader once anyone shared its
+flight, so no caller can mutate another one's response.
+
+Coalescing is opt-in and scoped to the clients given the same instance:
+
+    >>> do = DoManager(flights=SingleFlight())
+"""
+
+import copy
+import threading
+
+
+class _Flight(object):
+
+    __slots__ = ('done', 'result', 'error', 'followers')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight(object):
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key, func):
+        """Return ``func()``, sharing one call among concurrent callers of ``key``."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.leaders += 1
+            else:
+                flight.followers += 1
+                self.coalesced += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return copy.deepcopy(flight.result)
+
+        try:
+            flight.result = func()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        if flight.followers:
+            return copy.deepcopy(flight.result)
+        return flight.result
+
+    def stats(self):
+        with self._lock:
+            return {
+                'requests': self.leaders,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._flights),
+            }
+
+
+def flight_key(endpoint, path, params=None, token=None):
+    items = sorted((params or {}).items())
+    return (token, endpoint, path.rstrip('/'), tuple((k, repr(v)) for k, v in items))
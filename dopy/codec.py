@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+#coding: utf-8
+"""
+This module decodes API responses with the fastest JSON library installed
+(orjson, ujson or simplejson, else the standard library), and parses the
+item array of a listing page incrementally, item by item, as its body
+arrives.
+
+Set ``DO_JSON_BACKEND`` (or call ``use``) to pick a backend by name.
+"""
+
+import codecs
+import json
+import os
+import re
+
+BACKENDS = ('orjson', 'ujson', 'simplejson', 'json')
+
+backend = None
+loads = None
+
+
+def use(name=None):
+    """Decode with the backend ``name``, or the first one installed."""
+    global backend, loads
+    for candidate in ([name] if name else BACKENDS):
+        try:
+            module = __import__(candidate)
+        except ImportError:
+            if name:
+                raise
+            continue
+        backend, loads = candidate, module.loads
+        return backend
+
+
+use(os.environ.get('DO_JSON_BACKEND'))
+
+_SEPARATORS = re.compile(r'[\s,]*')
+_raw_decode = json.JSONDecoder().raw_decode
+
+
+class ItemStream(object):
+    """Yield the items of ``key`` from the JSON body read from ``chunks``.
+
+    Items are decoded as soon as their closing brace has been read, so the
+    first one is handed over long before the page is complete. Once the
+    stream is exhausted, ``envelope`` holds the rest of the body (``links``,
+    ``meta``) with an empty ``key`` array, and ``bytes`` its size. Only a
+    body whose first member is ``key`` is streamed; any other body is
+    decoded whole.
+
+    The fast backends have no incremental API, so the items themselves are
+    decoded with the standard library's C scanner.
+    """
+
+    def __init__(self, chunks, key):
+        self.chunks = iter(chunks)
+        self.key = key
+        self.envelope = None
+        self.bytes = 0
+        self._head = re.compile(r'\s*\{\s*%s\s*:\s*\[' % re.escape(json.dumps(key)))
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+
+    def _read(self):
+        for chunk in self.chunks:
+            if chunk:
+                self.bytes += len(chunk)
+                self._buffer += self._decoder.decode(chunk)
+                return True
+        self._buffer += self._decoder.decode(b'', True)
+        return False
+
+    def _whole(self):
+        while self._read():
+            pass
+        body = loads(self._buffer) if self._buffer.strip() else {}
+        items = body.get(self.key, []) if isinstance(body, dict) else []
+        if isinstance(body, dict) and self.key in body:
+            body[self.key] = []
+        self.envelope = body
+        return items
+
+    def __iter__(self):
+        match = None
+        more = True
+        while match is None and more:
+            more = self._read()
+            match = self._head.match(self._buffer)
+            if match is None and len(self._buffer.lstrip()) > len(self.key) + 16:
+                break
+        if match is None:
+            for item in self._whole():
+                yield item
+            return
+
+        position = match.end()
+        while True:
+            position = _SEPARATORS.match(self._buffer, position).end()
+            if position < len(self._buffer) and self._buffer[position] == ']':
+                position += 1
+                break
+            try:
+                item, end = _raw_decode(self._buffer, position)
+                complete = end < len(self._buffer) or isinstance(item, (dict, list))
+            except ValueError:
+                complete = False
+            if not complete:
+                if not more:
+                    raise ValueError('The listing body ends inside the %r array' % self.key)
+                # Drop what was consumed before reading on
+                self._buffer = self._buffer[position:]
+                position = 0
+                more = self._read()
+                continue
+            position = end
+            yield item
+
+        self._buffer = self._buffer[position:]
+        while self._read():
+            pass
+        self.envelope = loads('{%s:[]%s' % (json.dumps(self.key), self._buffer))
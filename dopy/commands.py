@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+#coding: utf-8
+"""
+This module maps the command names of the CLI (and of
+``DoManager.retro_execution``) to the API object and method that serve them.
+
+It imports nothing heavy, so a command can be resolved before ``requests``
+is loaded.
+"""
+
+from dopy.exceptions import DoError
+
+MANAGER = 'manager'
+DROPLETS = 'droplets'
+DOMAINS = 'domains'
+
+# Command names that differ from the method serving them
+_RENAMED = {
+    'all_active_droplets': (DROPLETS, 'list'),
+    'new_droplet': (DROPLETS, 'create'),
+    'all_domains': (DOMAINS, 'list'),
+    'new_domain': (DOMAINS, 'create'),
+    'show_domain': (DOMAINS, 'show'),
+}
+
+_METHODS = {
+    MANAGER: ('all_regions', 'all_images', 'private_images', 'image_v2_action', 'show_image',
+              'destroy_image', 'transfer_image', 'all_ssh_keys', 'new_ssh_key',
+              'show_ssh_key', 'edit_ssh_key', 'destroy_ssh_key', 'sizes',
+              'show_all_actions', 'show_action', 'show_event', 'wait_for_actions'),
+    DROPLETS: ('show_droplet', 'droplet_v2_action', 'reboot_droplet', 'power_cycle_droplet',
+               'shutdown_droplet', 'power_off_droplet', 'power_on_droplet',
+               'password_reset_droplet', 'resize_droplet', 'snapshot_droplet',
+               'restore_droplet', 'rebuild_droplet', 'enable_backups_droplet',
+               'disable_backups_droplet', 'rename_droplet', 'destroy_droplet',
+               'bulk_action', 'populate_droplet_ips'),
+    DOMAINS: ('destroy_domain', 'all_domain_records', 'new_domain_record',
+              'show_domain_record', 'edit_domain_record', 'update_domain_record',
+              'destroy_domain_record'),
+}
+
+COMMANDS = dict((name, (target, name))
+                for target, names in _METHODS.items() for name in names)
+COMMANDS.update(_RENAMED)
+
+
+def resolve(name):
+    """Return the ``(target, method name)`` serving the command ``name``."""
+    try:
+        return COMMANDS[name]
+    except KeyError:
+        raise DoError('Unknown method %s' % name)
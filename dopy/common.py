@@ -1,25 +1,12 @@
 import json
-import requests
+import math
+from concurrent.futures import ThreadPoolExecutor
 from six import wraps
+from six.moves.urllib.parse import parse_qs, urlparse
+from dopy.session import get_default_session
 
-
-class MockResponse(object):
-    def __init__(self, method=None, url=None, params=None, headers=None,
-                 timeout=None, data=None):
-        self.url = url
-        self.method = method
-        self.params = params
-        self.headers = headers
-        self.timeout = timeout
-        self.data = data
-        self.status_code = 200
-        self.id = '12345'
-        self.droplets = []
-        self.domains = []
-        self.domain = {}
-
-    def json(self):
-        return self.__dict__
+MAX_PER_PAGE = 200
+DEFAULT_PAGE_WORKERS = 4
 
 
 def _compile_request_args(params, headers, timeout):
@@ -32,56 +19,173 @@ def _compile_request_args(params, headers, timeout):
     return kwargs
 
 
+def _page_number(url):
+    query = parse_qs(urlparse(url).query)
+    try:
+        return int(query['page'][0])
+    except (KeyError, IndexError, ValueError):
+        return None
+
+
+def _items_key(result):
+    for key, value in result.items():
+        if isinstance(value, list):
+            return key
+    return None
+
+
+def _page_count(result, per_page=None):
+    pages = result.get('links', {}).get('pages', {})
+    if 'last' in pages:
+        last = _page_number(pages['last'])
+        if last is not None:
+            return last
+    total = result.get('meta', {}).get('total')
+    key = _items_key(result)
+    if per_page is None and key is not None:
+        per_page = len(result[key])
+    if total and per_page:
+        return int(math.ceil(float(total) / per_page))
+    return 1
+
+
+def _merge_pages(pages):
+    out = {}
+    for result in pages:
+        for key, value in result.items():
+            if key in out and isinstance(out[key], list):
+                out[key].extend(value)
+            else:
+                out[key] = value
+    return out
+
+
 def paginated(func):
+    """Fetch every page of a listing, the remaining pages concurrently.
+
+    ``func(url, params)`` returns the decoded JSON of a single page. The
+    page count is read from ``links.pages.last`` (or ``meta.total``) of the
+    first page and the other pages are merged in order. ``transform`` is
+    applied to each page as soon as it arrives.
+    """
     @wraps(func)
-    def wrapper(url, headers=None, params=None, timeout=60):
-        nxt = url
-        out = {}
-
-        while nxt is not None:
-            result = func(nxt, headers, params, 'GET')
-            nxt = None
-
-            if isinstance(result, dict):
-                for key, value in result.items():
-                    if key in out and isinstance(out[key], list):
-                        out[key].extend(value)
-                    else:
-                        out[key] = value
-
-                if 'links' in result \
-                        and 'pages' in result['links'] \
-                        and 'next' in result['links']['pages']:
-                    nxt = result['links']['pages']['next']
-
-        return out
+    def wrapper(url, params=None, per_page=None, max_workers=DEFAULT_PAGE_WORKERS,
+                transform=None):
+        params = dict(params or {})
+        if per_page is not None:
+            params['per_page'] = min(int(per_page), MAX_PER_PAGE)
+        first = func(url, params)
+        if not isinstance(first, dict):
+            return first
+        last = _page_count(first, params.get('per_page'))
+        if transform is not None:
+            first = transform(first)
+        if last < 2:
+            return first
+
+        def fetch(page):
+            result = func(url, dict(params, page=page))
+            return result if transform is None else transform(result)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, last - 1))) as pool:
+            rest = list(pool.map(fetch, range(2, last + 1)))
+        return _merge_pages([first] + rest)
     return wrapper
 
 
-def post_request(url, params=None, headers=None, timeout=60):
+def iter_pages(func, url, params=None, per_page=None):
+    """Yield the pages of a listing one at a time.
+
+    The next page is requested in the background while the caller works
+    through the current one, so only two pages are ever held in memory.
+    """
+    params = dict(params or {})
+    if per_page is not None:
+        params['per_page'] = min(int(per_page), MAX_PER_PAGE)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        page, last = 1, None
+        future = pool.submit(func, url, params)
+        while future is not None:
+            result = future.result()
+            future = None
+            if last is None and isinstance(result, dict):
+                last = _page_count(result, params.get('per_page'))
+            if last is not None and page < last:
+                page += 1
+                future = pool.submit(func, url, dict(params, page=page))
+            yield result
+
+
+def iter_items(func, url, key, params=None, per_page=None):
+    for result in iter_pages(func, url, params, per_page):
+        for item in result.get(key, []):
+            yield item
+
+
+def stream_items(open_page, url, key, params=None, per_page=None):
+    """Yield the items of a listing as each page's body is parsed.
+
+    ``open_page(url, params)`` returns an ``ApiRequest``; its ``stream(key)``
+    yields the items of one page and leaves the rest of the body in
+    ``json``, where the page count is read from.
+    """
+    params = dict(params or {})
+    if per_page is not None:
+        params['per_page'] = min(int(per_page), MAX_PER_PAGE)
+    page, last = 1, None
+    while True:
+        request = open_page(url, dict(params, page=page) if page > 1 else params)
+        count = 0
+        for item in request.stream(key):
+            count += 1
+            yield item
+        if last is None:
+            last = _page_count(request.json, params.get('per_page') or count)
+        if page >= last:
+            return
+        page += 1
+
+
+def map_concurrently(func, items, max_workers=DEFAULT_PAGE_WORKERS):
+    """Call ``func`` on every item through a bounded thread pool.
+
+    Returns ``(item, result, error)`` tuples in the order of ``items``; an
+    exception raised for one item is reported instead of aborting the rest.
+    """
+    def call(item):
+        try:
+            return item, func(item), None
+        except Exception as e:
+            return item, None, e
+
+    items = list(items)
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as pool:
+        return list(pool.map(call, items))
+
+
+def post_request(url, params=None, headers=None, timeout=60, session=None):
     kwargs = _compile_request_args(params, headers, timeout)
     kwargs['data'] = json.dumps(kwargs['params'])
     del(kwargs['params'])
-    # return requests.post(url, **kwargs)
-    return MockResponse('POST', url, **kwargs)
+    return (session or get_default_session()).post(url, **kwargs)
 
 
-def put_request(url, params=None, headers=None, timeout=60):
+def put_request(url, params=None, headers=None, timeout=60, session=None):
     kwargs = _compile_request_args(params, headers, timeout)
-    # return requests.put(url, **kwargs)
-    return MockResponse('PUT', url, **kwargs)
+    kwargs['data'] = json.dumps(kwargs['params'])
+    del(kwargs['params'])
+    return (session or get_default_session()).put(url, **kwargs)
 
 
-def delete_request(url, params=None, headers=None, timeout=60):
+def delete_request(url, params=None, headers=None, timeout=60, session=None):
     kwargs = _compile_request_args(params, headers, timeout)
-    # resp = requests.delete(url, **kwargs)
-    # resp.json = {'status': resp.status_code}
-    # return resp
-    return MockResponse('DELETE', url, **kwargs)
+    return (session or get_default_session()).delete(url, **kwargs)
 
 
-# @paginated
-def get_request(url, params=None, headers=None, timeout=60):
+def get_request(url, params=None, headers=None, timeout=60, session=None, stream=False):
     kwargs = _compile_request_args(params, headers, timeout)
-    return requests.get(url, **kwargs)
-    # return MockResponse('GET', url, **kwargs)
+    if stream:
+        kwargs['stream'] = True
+    return (session or get_default_session()).get(url, **kwargs)
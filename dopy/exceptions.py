@@ -4,3 +4,19 @@
 
 class DoError(RuntimeError):
     pass
+
+
+class DoTimeoutError(DoError):
+
+    def __init__(self, message, pending=None):
+        super(DoTimeoutError, self).__init__(message)
+        self.pending = pending or []
+
+
+class DoBatchError(DoError):
+
+    def __init__(self, message, created=None, failed=None):
+        super(DoBatchError, self).__init__(message)
+        # What the batch did create, and the (names, error) that failed
+        self.created = created or []
+        self.failed = failed or []
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+#coding: utf-8
+"""
+This module exposes before/after/error hooks around every API request and a
+latency histogram that can be dumped or exported in Prometheus text format.
+
+Each hook is called with an event dict carrying the ``method``, the
+normalized ``endpoint`` template (``/droplets/{id}/actions``), the ``path``,
+and, once the request is over, its ``status``, response ``bytes``,
+``retries``, ``duration`` in seconds and, for error hooks, the ``error``.
+With no hook registered a request pays one truth test.
+"""
+
+import bisect
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Collections whose next path segment names one resource, whatever it looks like
+_NAMED = {'domains': '{name}', 'tags': '{name}', 'images': '{id}', 'keys': '{id}'}
+
+_templates = {}
+
+
+def endpoint_template(path):
+    """Return ``path`` with its identifiers replaced by placeholders."""
+    template = _templates.get(path)
+    if template is not None:
+        return template
+    segments = path.split('?', 1)[0].strip('/').split('/')
+    normalized = []
+    for index, segment in enumerate(segments):
+        previous = segments[index - 1] if index else None
+        if segment.isdigit():
+            normalized.append('{id}')
+        elif previous in _NAMED and segment != 'actions':
+            normalized.append(_NAMED[previous])
+        else:
+            normalized.append(segment)
+    template = '/' + '/'.join(normalized)
+    if len(_templates) < 10000:
+        _templates[path] = template
+    return template
+
+
+class Hooks(object):
+
+    def __init__(self):
+        self.before = []
+        self.after = []
+        self.error = []
+
+    def __bool__(self):
+        return bool(self.before or self.after or self.error)
+    __nonzero__ = __bool__
+
+    def add(self, before=None, after=None, error=None):
+        for hooks, hook in ((self.before, before), (self.after, after), (self.error, error)):
+            if hook is not None:
+                hooks.append(hook)
+
+    def remove(self, before=None, after=None, error=None):
+        for hooks, hook in ((self.before, before), (self.after, after), (self.error, error)):
+            if hook in hooks:
+                hooks.remove(hook)
+
+    def clear(self):
+        del self.before[:], self.after[:], self.error[:]
+
+    # called by ApiRequest===============================
+    def start(self, method, path):
+        event = {'method': method, 'endpoint': endpoint_template(path), 'path': path}
+        for hook in self.before:
+            hook(event)
+        event['started'] = time.time()
+        return event
+
+    def _complete(self, event, response, size=None):
+        event['duration'] = time.time() - event.pop('started')
+        event['status'] = getattr(response, 'status_code', None)
+        if size is None:
+            content = getattr(response, 'content', None)
+            size = len(content) if content else 0
+        event['bytes'] = size
+        event['retries'] = getattr(response, 'retries', 0)
+        return event
+
+    def finish(self, event, response, size=None):
+        self._complete(event, response, size)
+        for hook in self.after:
+            hook(event)
+
+    def fail(self, event, response, error, size=None):
+        self._complete(event, response, size)
+        event['error'] = error
+        for hook in self.error:
+            hook(event)
+
+
+HOOKS = Hooks()
+
+
+def add_hooks(before=None, after=None, error=None):
+    HOOKS.add(before, after, error)
+
+
+def remove_hooks(before=None, after=None, error=None):
+    HOOKS.remove(before, after, error)
+
+
+class LatencyHistogram(object):
+    """Request durations, bytes and retries per (method, endpoint, status)."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def install(self, hooks=HOOKS):
+        hooks.add(after=self.observe, error=self.observe)
+        return self
+
+    def uninstall(self, hooks=HOOKS):
+        hooks.remove(after=self.observe, error=self.observe)
+
+    def observe(self, event):
+        status = str(event['status']) if event.get('status') else 'error'
+        key = (event['method'], event['endpoint'], status)
+        index = bisect.bisect_left(self.buckets, event['duration'])
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'counts': [0] * (len(self.buckets) + 1),
+                                              'sum': 0.0, 'bytes': 0, 'retries': 0}
+            series['counts'][index] += 1
+            series['sum'] += event['duration']
+            series['bytes'] += event['bytes']
+            series['retries'] += event['retries']
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def dump(self):
+        with self._lock:
+            series = sorted((key, dict(value, counts=list(value['counts'])))
+                            for key, value in self._series.items())
+        result = []
+        for (method, endpoint, status), value in series:
+            cumulative = []
+            total = 0
+            for bound, count in zip(self.buckets + (float('inf'),), value['counts']):
+                total += count
+                cumulative.append([bound, total])
+            result.append({'method': method, 'endpoint': endpoint, 'status': status,
+                           'count': total, 'sum': value['sum'], 'buckets': cumulative,
+                           'bytes': value['bytes'], 'retries': value['retries']})
+        return result
+
+    def prometheus(self, prefix='dopy_request'):
+        """Return the histogram in the Prometheus text exposition format."""
+        series = self.dump()
+        lines = ['# HELP %s_duration_seconds Duration of Digital Ocean API requests.' % prefix,
+                 '# TYPE %s_duration_seconds histogram' % prefix]
+        for s in series:
+            labels = 'method="%s",endpoint="%s",status="%s"' % (
+                s['method'], s['endpoint'], s['status'])
+            for bound, count in s['buckets']:
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append('%s_duration_seconds_bucket{%s,le="%s"} %d'
+                             % (prefix, labels, le, count))
+            lines.append('%s_duration_seconds_sum{%s} %r' % (prefix, labels, s['sum']))
+            lines.append('%s_duration_seconds_count{%s} %d' % (prefix, labels, s['count']))
+        for name, field, help_text in (('bytes', 'bytes', 'Response bytes received.'),
+                                       ('retries', 'retries', 'Retried attempts.')):
+            lines.append('# HELP %s_%s_total %s' % (prefix, name, help_text))
+            lines.append('# TYPE %s_%s_total counter' % (prefix, name))
+            for s in series:
+                lines.append('%s_%s_total{method="%s",endpoint="%s",status="%s"} %d'
+                             % (prefix, name, s['method'], s['endpoint'], s['status'], s[field]))
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+#coding: utf-8
+"""
+This module keeps an in-memory inventory of the account's droplets, indexed
+by id, name, IP address, tag, region and size, so lookups cost no API call.
+
+Droplets created or destroyed through the same ``DoApiDroplets`` are
+applied at once; the effect of a droplet action (rename, resize, power) is
+applied once ``settle`` finds the action completed.
+"""
+
+import re
+import threading
+from functools import partial
+
+from dopy.waiter import ActionWaiter
+
+INDEXES = ('name', 'ip', 'tag', 'region', 'size')
+
+_DROPLET_PATH = re.compile(r'^/?droplets/(\d+)(/actions)?/?$')
+
+
+def droplet_ips(droplet):
+    networks = droplet.get('networks') or {}
+    return [network['ip_address']
+            for version in ('v4', 'v6') for network in networks.get(version, [])]
+
+
+def index_keys(droplet):
+    region = droplet.get('region') or {}
+    yield 'name', droplet.get('name')
+    for ip in droplet_ips(droplet):
+        yield 'ip', ip
+    for tag in droplet.get('tags') or []:
+        yield 'tag', tag
+    yield 'region', region.get('slug') if isinstance(region, dict) else region
+    yield 'size', droplet.get('size_slug')
+
+
+class Inventory(object):
+
+    def __init__(self, droplets, refresh_interval=None, per_page=200):
+        self.droplets = droplets
+        self.refresh_interval = refresh_interval
+        self.per_page = per_page
+        self.refreshes = 0
+        self._by_id = {}
+        self._indexes = dict((name, {}) for name in INDEXES)
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._actions = ActionWaiter(droplets)
+        self._listen()
+
+    def _listen(self):
+        if self._on_mutation not in self.droplets.listeners:
+            self.droplets.listeners.append(self._on_mutation)
+
+    # indexes==========================================
+    def _index(self, droplet):
+        self._by_id[droplet['id']] = droplet
+        for index, key in index_keys(droplet):
+            if key is not None:
+                self._indexes[index].setdefault(key, set()).add(droplet['id'])
+
+    def _unindex(self, droplet_id):
+        droplet = self._by_id.pop(droplet_id, None)
+        if droplet is None:
+            return
+        for index, key in index_keys(droplet):
+            ids = self._indexes[index].get(key)
+            if ids is not None:
+                ids.discard(droplet_id)
+                if not ids:
+                    del self._indexes[index][key]
+
+    def _put(self, droplet):
+        with self._lock:
+            self._unindex(droplet['id'])
+            self._index(droplet)
+
+    def refresh(self):
+        """Reload the droplet list and re-index only what changed."""
+        listing = self.droplets.list(per_page=self.per_page)
+        added = updated = 0
+        with self._lock:
+            seen = set()
+            for droplet in listing:
+                seen.add(droplet['id'])
+                current = self._by_id.get(droplet['id'])
+                if current is None:
+                    added += 1
+                elif current != droplet:
+                    updated += 1
+                else:
+                    continue
+                self._unindex(droplet['id'])
+                self._index(droplet)
+            removed = [droplet_id for droplet_id in self._by_id if droplet_id not in seen]
+            for droplet_id in removed:
+                self._unindex(droplet_id)
+            self.refreshes += 1
+        return {'added': added, 'updated': updated, 'removed': len(removed)}
+
+    # background=======================================
+    def start(self):
+        if self.refresh_interval is None:
+            raise ValueError('Inventory needs a refresh_interval to refresh in the background')
+        self._listen()
+        self.refresh()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='dopy-inventory')
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.settle()
+                self.refresh()
+            except Exception:
+                # Keep serving the last good snapshot until the API is back
+                pass
+
+    def stop(self):
+        """Stop refreshing and stop following the mutations of ``droplets``."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._on_mutation in self.droplets.listeners:
+            self.droplets.listeners.remove(self._on_mutation)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # mutations========================================
+    def _on_mutation(self, method, path, params, json):
+        if method == 'POST' and path.rstrip('/') in ('/droplets', 'droplets'):
+            for droplet in json.get('droplets') or [json.get('droplet')]:
+                if droplet:
+                    self.droplets.populate_droplet_ips(droplet)
+                    self._put(droplet)
+            return
+
+        match = _DROPLET_PATH.match(path)
+        if match is None:
+            return
+        droplet_id = int(match.group(1))
+        if method == 'DELETE' and not match.group(2):
+            with self._lock:
+                self._unindex(droplet_id)
+            return
+
+        if method != 'POST' or not match.group(2) or not json.get('action'):
+            return
+        action_type = (params or {}).get('type')
+        if action_type == 'rename':
+            fields = {'name': params['name']}
+        elif action_type == 'resize':
+            fields = {'size_slug': params['size']}
+        elif action_type in ('power_off', 'shutdown'):
+            fields = {'status': 'off'}
+        elif action_type in ('power_on', 'reboot', 'power_cycle'):
+            fields = {'status': 'active'}
+        else:
+            return
+        # Applied once the action completes; an errored one changes nothing
+        self._actions.add(json, partial(self._apply, droplet_id, fields))
+
+    def _apply(self, droplet_id, fields, action):
+        if action['status'] != 'completed':
+            return
+        with self._lock:
+            current = self._by_id.get(droplet_id)
+            if current is not None:
+                self._put(dict(current, **fields))
+
+    def settle(self):
+        """Read the action list once and apply the droplet actions that completed.
+
+        Returns the ids of the actions still in progress.
+        """
+        self._actions.poll()
+        return self._actions.pending
+
+    # lookups==========================================
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._by_id.values()))
+
+    def get(self, droplet_id):
+        return self._by_id.get(int(droplet_id))
+
+    def _lookup(self, index, key):
+        with self._lock:
+            ids = self._indexes[index].get(key, ())
+            return [self._by_id[droplet_id] for droplet_id in sorted(ids)]
+
+    def by_name(self, name):
+        return self._lookup('name', name)
+
+    def by_ip(self, ip):
+        droplets = self._lookup('ip', ip)
+        return droplets[0] if droplets else None
+
+    def by_tag(self, tag):
+        return self._lookup('tag', tag)
+
+    def by_region(self, region):
+        return self._lookup('region', region)
+
+    def by_size(self, size):
+        return self._lookup('size', size)
@@ -3,26 +3,77 @@
 """
 This module simply sends request to the Digital Ocean API,
 and returns their response as a dict.
+
+Heavy modules (``requests``, ``pprint``, the API classes) are imported only
+once a command is known to need them.
 """
 
+import os
 import sys
-import pprint
 from dopy import API_VERSION
+from dopy.commands import resolve
+from dopy.exceptions import DoError
 
+CACHED_READS = ('all_active_droplets', 'all_images', 'all_domains', 'all_domain_records',
+                'all_ssh_keys', 'sizes', 'all_regions')
+
+
+def output(result):
+    import pprint
+    pprint.pprint(result)
+
+
+def run_v1(fname, args):
+    from dopy.api.v1 import DoManager
+    from dopy import CLIENT_ID, API_KEY
+    do = DoManager(CLIENT_ID, API_KEY, 1)
+    output(getattr(do, fname)(*args))
+
+
+def run_cached(cache_path, fname, args):
+    from dopy.api.v2 import DoApiDomains, DoApiDroplets, DoManager
+    from dopy.store import CachedReads, InventoryStore
+    store = InventoryStore(cache_path, max_age=int(os.environ.get('DO_CACHE_MAX_AGE', 300)))
+    reads = CachedReads(store, DoManager(), DoApiDroplets(), DoApiDomains())
+    output(getattr(reads, fname)(*args))
+    sys.stdout.flush()
+    # Let a stale entry finish revalidating before the process exits
+    store.wait()
+
+
+def run(target, name, args):
+    from dopy.api.v2 import DoManager
+    do = DoManager()
+    output(getattr(do.targets()[target], name)(*args))
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        sys.stderr.write('usage: python -m dopy.manager COMMAND [ARGS...] | --batch [FILE] '
+                         '| --daemon SOCKET\n')
+        return 2
+    fname, args = argv[0], argv[1:]
 
-if __name__ == '__main__':
     if API_VERSION == 1:
-        from dopy.api.v1 import DoManager
-        from dopy import CLIENT_ID, API_KEY
-        do = DoManager(CLIENT_ID, API_KEY, 1)
-        fname = sys.argv[1]
-        pprint.pprint(getattr(do, fname)(*sys.argv[2:]))
+        run_v1(fname, args)
+    elif fname in ('--batch', '--daemon'):
+        from dopy.batch import main as batch_main
+        return batch_main(argv)
+    elif os.environ.get('DO_DAEMON_SOCKET'):
+        from dopy.batch import call
+        output(call(os.environ['DO_DAEMON_SOCKET'], fname, *args))
+    elif os.environ.get('DO_CACHE_PATH') and fname in CACHED_READS:
+        run_cached(os.environ['DO_CACHE_PATH'], fname, args)
     else:
-        from dopy.api.v2 import DoManager
-        do = DoManager()
-        fname = sys.argv[1]
-
         try:
-            pprint.pprint(do.retro_execution(fname, *sys.argv[2:]))
-        except:
-            pprint.pprint(getattr(do, fname)(*sys.argv[2:]))
+            target, name = resolve(fname)
+        except DoError as e:
+            sys.stderr.write('%s\n' % e)
+            return 2
+        run(target, name, args)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
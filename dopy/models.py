@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+#coding: utf-8
+"""
+This module holds compact ``__slots__`` classes for droplets, domains and
+domain records, an opt-in alternative to the raw response dicts.
+
+Fields that are not declared, or left out of a ``fields`` projection, are
+dropped when the JSON is decoded. The models still read like dicts
+(``droplet['name']``, ``droplet.get('ip_address')``).
+"""
+
+
+class Model(object):
+
+    __slots__ = ()
+    # Computed properties that can be read like fields
+    computed = ()
+    # Fields the computed properties are derived from
+    requires = ()
+
+    def __init__(self, data, fields=None):
+        names = self.__slots__ if fields is None else self.project(fields)
+        for name in names:
+            if name in data:
+                setattr(self, name, data[name])
+
+    @classmethod
+    def project(cls, fields):
+        fields = set(fields)
+        if fields & set(cls.computed):
+            fields.update(cls.requires)
+        return [name for name in cls.__slots__ if name in fields]
+
+    @classmethod
+    def decode_page(cls, key, fields=None):
+        """Return a function decoding the ``key`` items of a listing page."""
+        def decode(page):
+            if isinstance(page, dict) and key in page:
+                page[key] = [cls(item, fields) for item in page[key]]
+            return page
+        return decode
+
+    def _has_computed(self):
+        return all(hasattr(self, name) for name in self.requires)
+
+    def keys(self):
+        names = [name for name in self.__slots__
+                 if not name.startswith('_') and hasattr(self, name)]
+        if self.computed and self._has_computed():
+            names.extend(self.computed)
+        return names
+
+    def items(self):
+        return [(name, getattr(self, name)) for name in self.keys()]
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __getitem__(self, key):
+        if key in self.computed:
+            if not self._has_computed():
+                raise KeyError(key)
+        elif key.startswith('_') or key not in self.__slots__:
+            raise KeyError(key)
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __eq__(self, other):
+        if isinstance(other, Model):
+            other = other.to_dict()
+        return self.to_dict() == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return '<%s %s>' % (self.__class__.__name__, self.to_dict())
+
+
+class Droplet(Model):
+
+    __slots__ = ('id', 'name', 'memory', 'vcpus', 'disk', 'locked', 'status', 'kernel',
+                 'created_at', 'features', 'backup_ids', 'snapshot_ids', 'volume_ids',
+                 'image', 'size', 'size_slug', 'networks', 'region', 'tags',
+                 'next_backup_window', '_ips')
+    computed = ('ip_address', 'private_ip_address', 'ip_v6_address')
+    requires = ('networks',)
+
+    def _addresses(self):
+        try:
+            return self._ips
+        except AttributeError:
+            pass
+        ips = {'public': '', 'private': None, 'v6': None}
+        networks = getattr(self, 'networks', None) or {}
+        for network in networks.get('v4', []):
+            if network['type'] in ('public', 'private'):
+                ips[network['type']] = network['ip_address']
+        for network in networks.get('v6', []):
+            if network['type'] == 'public':
+                ips['v6'] = network['ip_address']
+        self._ips = ips
+        return ips
+
+    @property
+    def ip_address(self):
+        return self._addresses()['public']
+
+    @property
+    def private_ip_address(self):
+        return self._addresses()['private']
+
+    @property
+    def ip_v6_address(self):
+        return self._addresses()['v6']
+
+
+class Domain(Model):
+
+    __slots__ = ('name', 'ttl', 'zone_file')
+
+
+class DomainRecord(Model):
+
+    __slots__ = ('id', 'type', 'name', 'data', 'priority', 'port', 'ttl', 'weight',
+                 'flags', 'tag')
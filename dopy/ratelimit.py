@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+#coding: utf-8
+"""
+This module paces requests with the ``RateLimit-*`` headers returned by the
+Digital Ocean API, sharing one budget between every thread and asyncio task
+using the same API token. ``acquire`` blocks the calling thread; the
+asyncio side (``dopy.api.v2_async.acquire``) is built on the same
+non-blocking ``try_acquire`` and ``waiting``, and lives there so that this
+module still imports on Python 2.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+DEFAULT_LIMIT = 5000
+DEFAULT_PERIOD = 3600
+
+
+class RateLimiter(object):
+
+    clock = staticmethod(time.time)
+    sleep = staticmethod(time.sleep)
+
+    def __init__(self, limit=DEFAULT_LIMIT, period=DEFAULT_PERIOD,
+                 reserve=0.05, pace_below=0.2, max_sleep=1.0):
+        self.limit = limit
+        self.period = period
+        # Fraction of the budget only INTERACTIVE requests may spend
+        self.reserve = reserve
+        # Below this fraction of the budget, requests are spread evenly
+        # over the time left until the window resets
+        self.pace_below = pace_below
+        self.max_sleep = max_sleep
+        self.remaining = limit
+        self.reset = None
+        self.granted = 0
+        self.waited = 0.0
+        self._next_at = 0
+        self._waiting = [0, 0]
+        self._lock = threading.Lock()
+
+    def update(self, headers):
+        try:
+            limit = int(headers['RateLimit-Limit'])
+            remaining = int(headers['RateLimit-Remaining'])
+            reset = float(headers['RateLimit-Reset'])
+        except (KeyError, TypeError, ValueError):
+            return
+        with self._lock:
+            self.limit = limit
+            if self.reset is None or reset != self.reset:
+                self.remaining = remaining
+            else:
+                # Requests granted since this response was sent are not in it
+                self.remaining = min(self.remaining, remaining)
+            self.reset = reset
+
+    def exhaust(self, reset=None):
+        with self._lock:
+            self.remaining = 0
+            if reset is not None:
+                self.reset = reset
+
+    def try_acquire(self, priority=INTERACTIVE):
+        """Take one request from the budget without blocking.
+
+        Returns 0 when it is granted, otherwise the seconds to wait before
+        trying again.
+        """
+        wait = self._reserve(priority)
+        if wait > 0:
+            with self._lock:
+                self.waited += wait
+        return wait
+
+    def _reserve(self, priority):
+        with self._lock:
+            now = self.clock()
+            if self.reset is not None and now >= self.reset:
+                self.remaining = self.limit
+                self.reset = None
+            if priority != INTERACTIVE and self._waiting[INTERACTIVE]:
+                return self.max_sleep / 10.0
+
+            floor = 0 if priority == INTERACTIVE else int(self.limit * self.reserve)
+            available = self.remaining - floor
+            window = self.period if self.reset is None else self.reset - now
+            if available <= 0:
+                if self.reset is not None:
+                    return min(window, self.max_sleep)
+                # The window is unknown: trickle requests out until a
+                # response tells us where the budget stands
+                available = 1
+            if available <= self.limit * self.pace_below:
+                if now < self._next_at:
+                    return min(self._next_at - now, self.max_sleep)
+                self._next_at = now + float(window) / available
+            self.remaining -= 1
+            self.granted += 1
+            return 0
+
+    @contextmanager
+    def waiting(self, priority=INTERACTIVE):
+        """Count the caller as waiting for the budget while in the block.
+
+        BACKGROUND requests are held back while an INTERACTIVE one waits.
+        """
+        with self._lock:
+            self._waiting[priority] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._waiting[priority] -= 1
+
+    def acquire(self, priority=INTERACTIVE):
+        with self.waiting(priority):
+            while True:
+                wait = self.try_acquire(priority)
+                if wait <= 0:
+                    return
+                self.sleep(wait)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'remaining': self.remaining,
+                'reset': self.reset,
+                'granted': self.granted,
+                'waited': self.waited,
+            }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(token):
+    with _limiters_lock:
+        if token not in _limiters:
+            _limiters[token] = RateLimiter()
+        return _limiters[token]
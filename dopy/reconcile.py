@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+#coding: utf-8
+"""
+This module brings a domain's records in line with a desired record set
+using as few API calls as it can, applied concurrently.
+
+Current records are indexed by (type, name, data). A desired record that
+exists is left alone, or updated when its ttl/priority/port/weight/flags/
+tag differ. A record that is missing from the zone takes over a surplus
+record with the same type and name (one update instead of a delete and a
+create). Anything left is created or deleted.
+
+    >>> plan = ZoneReconciler(DoApiDomains(), 'example.com').plan(desired)
+    >>> print('\\n'.join(plan.describe()))
+    >>> ZoneReconciler(DoApiDomains(), 'example.com').apply(plan)
+"""
+
+import time
+from collections import OrderedDict
+
+from dopy import common as c
+
+CREATE = 'create'
+UPDATE = 'update'
+DELETE = 'delete'
+
+ATTRIBUTES = ('ttl', 'priority', 'port', 'weight', 'flags', 'tag')
+# Types whose data is a host name, compared without the trailing dot
+HOSTNAME_TYPES = ('CNAME', 'MX', 'NS', 'SRV')
+DEFAULT_WORKERS = 8
+
+
+def normalize(record, domain=None):
+    """Return a copy of ``record`` with an upper-case type and a name
+    relative to ``domain`` (``@`` for the apex)."""
+    record = dict(record)
+    record['type'] = record['type'].upper()
+    name = (record.get('name') or '@').rstrip('.')
+    if domain:
+        if name == domain:
+            name = '@'
+        elif name.endswith('.' + domain):
+            name = name[:-len(domain) - 1]
+    record['name'] = name
+    return record
+
+
+def record_key(record):
+    data = '' if record.get('data') is None else str(record['data'])
+    if record['type'] in HOSTNAME_TYPES:
+        data = data.rstrip('.').lower()
+    return record['type'], record['name'].lower(), data
+
+
+def _format(record):
+    extra = ''.join(' %s=%s' % (attr, record[attr]) for attr in ATTRIBUTES
+                    if record.get(attr) is not None)
+    return '%s %s %s%s' % (record['type'], record['name'], record.get('data'), extra)
+
+
+class Change(object):
+
+    def __init__(self, op, record, current=None, fields=None):
+        self.op = op
+        self.record = record
+        self.current = current
+        self.fields = fields or {}
+        self.result = None
+        self.error = None
+
+    def describe(self):
+        if self.op == CREATE:
+            return '+ %s' % _format(self.record)
+        if self.op == DELETE:
+            return '- %s' % _format(self.current)
+        changed = ', '.join('%s %s -> %s' % (field, self.current.get(field), value)
+                            for field, value in sorted(self.fields.items()))
+        return '~ %s %s (%s)' % (self.current['type'], self.current['name'], changed)
+
+    def __repr__(self):
+        return '<Change %s>' % self.describe()
+
+
+class Plan(object):
+
+    def __init__(self, domain_id, changes, unchanged, timings):
+        self.domain_id = domain_id
+        self.changes = changes
+        self.unchanged = unchanged
+        self.timings = timings
+        self.applied = False
+
+    def __len__(self):
+        return len(self.changes)
+
+    def _of(self, op):
+        return [change for change in self.changes if change.op == op]
+
+    @property
+    def creates(self):
+        return self._of(CREATE)
+
+    @property
+    def updates(self):
+        return self._of(UPDATE)
+
+    @property
+    def deletes(self):
+        return self._of(DELETE)
+
+    @property
+    def errors(self):
+        return [change for change in self.changes if change.error is not None]
+
+    def describe(self):
+        return [change.describe() for change in self.changes]
+
+    def summary(self):
+        return {
+            'create': len(self.creates),
+            'update': len(self.updates),
+            'delete': len(self.deletes),
+            'unchanged': self.unchanged,
+            'errors': len(self.errors),
+            'applied': self.applied,
+            'timings': dict(self.timings),
+        }
+
+
+class ZoneReconciler(object):
+
+    def __init__(self, domains, domain_id, max_workers=DEFAULT_WORKERS, prune=True):
+        self.domains = domains
+        self.domain_id = domain_id
+        self.max_workers = max_workers
+        # Delete the records that are not desired
+        self.prune = prune
+
+    def _managed(self, records, desired):
+        # SOA and the apex NS records belong to DigitalOcean unless asked for
+        apex_ns = any(r['type'] == 'NS' and r['name'] == '@' for r in desired)
+        return [r for r in records if r['type'] != 'SOA' and
+                (apex_ns or r['type'] != 'NS' or r['name'] != '@')]
+
+    def plan(self, desired, current=None):
+        """Compute the changes turning ``current`` (fetched when None) into ``desired``."""
+        timings = {}
+        started = time.time()
+        if current is None:
+            current = self.domains.all_domain_records(self.domain_id)
+            timings['fetch'] = time.time() - started
+            started = time.time()
+
+        desired = [normalize(record, self.domain_id) for record in desired]
+        current = self._managed([normalize(record, self.domain_id) for record in current],
+                                desired)
+        index = {}
+        for record in current:
+            index.setdefault(record_key(record), []).append(record)
+
+        changes = []
+        missing = []
+        unchanged = 0
+        seen = set()
+        for record in desired:
+            key = record_key(record)
+            if key in seen:
+                continue
+            seen.add(key)
+            matches = index.get(key)
+            if not matches:
+                missing.append(record)
+                continue
+            existing = matches.pop(0)
+            fields = self._diff(record, existing)
+            if fields:
+                changes.append(Change(UPDATE, record, existing, fields))
+            else:
+                unchanged += 1
+
+        # In the order of the zone, so the plan does not depend on dict order
+        left = set(id(record) for records in index.values() for record in records)
+        surplus = OrderedDict()
+        for record in current:
+            if id(record) in left:
+                surplus.setdefault((record['type'], record['name'].lower()), []).append(record)
+        for record in missing:
+            spare = surplus.get((record['type'], record['name'].lower()))
+            if spare and self.prune:
+                existing = spare.pop(0)
+                fields = self._diff(record, existing)
+                fields['data'] = record['data']
+                changes.append(Change(UPDATE, record, existing, fields))
+            else:
+                changes.append(Change(CREATE, record))
+        if self.prune:
+            for records in surplus.values():
+                changes.extend(Change(DELETE, None, record) for record in records)
+
+        timings['plan'] = time.time() - started
+        return Plan(self.domain_id, changes, unchanged, timings)
+
+    @staticmethod
+    def _diff(record, existing):
+        return dict((attr, record[attr]) for attr in ATTRIBUTES
+                    if record.get(attr) is not None and record[attr] != existing.get(attr))
+
+    def _apply(self, change):
+        record = change.record
+        if change.op == CREATE:
+            return self.domains.new_domain_record(
+                self.domain_id, record['type'], record['data'], name=record['name'],
+                priority=record.get('priority'), port=record.get('port'),
+                weight=record.get('weight'), ttl=record.get('ttl'),
+                flags=record.get('flags'), tag=record.get('tag'))
+        if change.op == UPDATE:
+            return self.domains.update_domain_record(self.domain_id, change.current['id'],
+                                                     **change.fields)
+        return self.domains.destroy_domain_record(self.domain_id, change.current['id'])
+
+    def apply(self, plan):
+        """Apply ``plan``: creates and updates first, then deletes.
+
+        Changes run concurrently up to ``max_workers``; a failed change is
+        recorded on it (``change.error``) and does not stop the others.
+        """
+        started = time.time()
+        for phase in ((CREATE, UPDATE), (DELETE,)):
+            changes = [change for change in plan.changes if change.op in phase]
+            for change, result, error in c.map_concurrently(self._apply, changes,
+                                                            self.max_workers):
+                change.result, change.error = result, error
+        plan.timings['apply'] = time.time() - started
+        plan.applied = True
+        return plan
+
+    def reconcile(self, desired, dry_run=False):
+        """Plan and, unless ``dry_run``, apply the changes. Returns the plan."""
+        plan = self.plan(desired)
+        if dry_run:
+            return plan
+        return self.apply(plan)
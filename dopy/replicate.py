@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+#coding: utf-8
+"""
+This module copies images to many regions and follows the transfers until
+every replica is ready.
+
+The images are looked up in one listing of the private images (falling back
+to ``show_image`` for the others), and the regions an image is already in
+are skipped. At most ``max_transfers`` transfers are in flight; the next
+one starts as soon as one completes. Their actions are read from one action
+listing per tick.
+
+    >>> replicator = ImageReplicator(DoManager(), max_transfers=4)
+    >>> replication = replicator.replicate(['golden-web', 'golden-db'],
+    ...                                    ['nyc3', 'ams3', 'sgp1', 'fra1'])
+    >>> replication.summary()
+"""
+
+import time
+from functools import partial
+
+from dopy import common as c
+from dopy.exceptions import DoError, DoTimeoutError
+from dopy.waiter import ActionWaiter
+
+PENDING = 'pending'
+IN_PROGRESS = 'in-progress'
+COMPLETED = 'completed'
+FAILED = 'failed'
+
+DEFAULT_TRANSFERS = 4
+
+
+class Transfer(object):
+
+    def __init__(self, image, region):
+        self.image = image
+        self.region = region
+        self.status = PENDING
+        self.action = None
+        self.error = None
+        self.started = None
+        self.finished = None
+
+    def describe(self):
+        return '%s -> %s %s' % (self.image.get('name') or self.image['id'], self.region,
+                                self.status)
+
+    def __repr__(self):
+        return '<Transfer %s>' % self.describe()
+
+
+class Replication(object):
+
+    def __init__(self, images, transfers, present):
+        self.images = images
+        self.transfers = transfers
+        # (image id, region) pairs that needed no transfer
+        self.present = present
+        self.started = None
+        self.finished = None
+
+    def __len__(self):
+        return len(self.transfers)
+
+    def _of(self, status):
+        return [transfer for transfer in self.transfers if transfer.status == status]
+
+    @property
+    def completed(self):
+        return self._of(COMPLETED)
+
+    @property
+    def failed(self):
+        return self._of(FAILED)
+
+    @property
+    def in_progress(self):
+        return self._of(IN_PROGRESS)
+
+    @property
+    def pending(self):
+        return self._of(PENDING)
+
+    @property
+    def ready(self):
+        return all(transfer.status == COMPLETED for transfer in self.transfers)
+
+    def regions(self):
+        """Return ``{image id: regions}`` holding a ready replica."""
+        regions = dict((image['id'], set(image.get('regions') or ())) for image in self.images)
+        for image_id, region in self.present:
+            regions[image_id].add(region)
+        for transfer in self.completed:
+            regions[transfer.image['id']].add(transfer.region)
+        return dict((image_id, sorted(names)) for image_id, names in regions.items())
+
+    def describe(self):
+        return [transfer.describe() for transfer in self.transfers]
+
+    def summary(self):
+        elapsed = None
+        if self.started is not None and self.finished is not None:
+            elapsed = self.finished - self.started
+        return {
+            'transfers': len(self.transfers),
+            'present': len(self.present),
+            'completed': len(self.completed),
+            'in_progress': len(self.in_progress),
+            'pending': len(self.pending),
+            'failed': len(self.failed),
+            'elapsed': elapsed,
+        }
+
+
+class ImageReplicator(object):
+
+    sleep = staticmethod(time.sleep)
+    clock = staticmethod(time.time)
+
+    def __init__(self, manager, max_transfers=DEFAULT_TRANSFERS, interval=5, progress=None):
+        self.manager = manager
+        self.max_transfers = max_transfers
+        self.interval = interval
+        # Called with the replication after every tick
+        self.progress = progress
+        self._listing = None
+
+    def private_images(self):
+        """The private images, listed once per replicator."""
+        if self._listing is None:
+            self._listing = self.manager.private_images()
+        return self._listing
+
+    def resolve(self, image):
+        """Return the JSON of ``image``, given by id, slug, name or JSON."""
+        if isinstance(image, dict) and 'regions' in image:
+            return image
+        key = image['id'] if isinstance(image, dict) else image
+        for known in self.private_images():
+            if str(key) in (str(known['id']), known.get('slug'), known.get('name')):
+                return known
+        return self.manager.show_image(key)
+
+    def plan(self, images, regions):
+        """Return the replication of ``images`` to ``regions``, not started."""
+        resolved = []
+        seen = set()
+        for image in images:
+            image = self.resolve(image)
+            if image['id'] not in seen:
+                seen.add(image['id'])
+                resolved.append(image)
+        transfers = []
+        present = []
+        for image in resolved:
+            for region in sorted(set(regions)):
+                if region in (image.get('regions') or ()):
+                    present.append((image['id'], region))
+                else:
+                    transfers.append(Transfer(image, region))
+        return Replication(resolved, transfers, present)
+
+    def _start(self, transfer):
+        return self.manager.transfer_image(transfer.image['id'], transfer.region)
+
+    def _done(self, transfer, action):
+        transfer.finished = self.clock()
+        if action['status'] == 'completed':
+            transfer.status = COMPLETED
+        else:
+            transfer.status = FAILED
+            transfer.error = DoError('Transfer of image %s to %s errored'
+                                     % (transfer.image['id'], transfer.region))
+
+    def apply(self, replication, timeout=None):
+        """Run the transfers of ``replication`` and wait until they are over.
+
+        A transfer that fails to start or errors is marked failed and does
+        not stop the others. Raises ``DoTimeoutError`` when ``timeout``
+        seconds pass first; the replication then tells what is left.
+        """
+        replication.started = self.clock()
+        deadline = None if timeout is None else replication.started + timeout
+        waiter = ActionWaiter(self.manager)
+        queue = list(replication.pending)
+        while queue or waiter.pending:
+            slots = self.max_transfers - len(waiter.pending)
+            batch, queue = queue[:slots], queue[slots:]
+            for transfer, json, error in c.map_concurrently(self._start, batch,
+                                                            self.max_transfers):
+                transfer.started = self.clock()
+                if error is not None:
+                    transfer.status, transfer.error = FAILED, error
+                    transfer.finished = transfer.started
+                    continue
+                transfer.status = IN_PROGRESS
+                transfer.action = json['action']['id']
+                waiter.add(json, partial(self._done, transfer))
+            if not waiter.pending:
+                continue
+            if deadline is not None and self.clock() >= deadline:
+                raise DoTimeoutError('Timed out replicating images: %s'
+                                     % ', '.join(t.describe() for t in replication.in_progress),
+                                     waiter.pending)
+            self.sleep(self.interval)
+            waiter.poll()
+            if self.progress is not None:
+                self.progress(replication)
+        replication.finished = self.clock()
+        return replication
+
+    def replicate(self, images, regions, timeout=None):
+        """Plan and apply the replication of ``images`` to ``regions``."""
+        return self.apply(self.plan(images, regions), timeout)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+#coding: utf-8
+"""
+This module retries requests that failed for a transient reason (429, 5xx,
+reset connections) with jittered exponential backoff.
+"""
+
+import email.utils
+import random
+import threading
+import time
+
+from requests import ConnectionError, Timeout
+from six.moves.urllib.parse import urlparse
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'PUT', 'DELETE')
+
+
+def retry_after(response):
+    """Seconds to wait according to the ``Retry-After`` header, if any."""
+    value = getattr(response, 'headers', {}).get('Retry-After')
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    parsed = email.utils.parsedate_tz(value)
+    if parsed is None:
+        return None
+    return max(email.utils.mktime_tz(parsed) - time.time(), 0)
+
+
+class RetryPolicy(object):
+
+    sleep = staticmethod(time.sleep)
+    clock = staticmethod(time.time)
+
+    def __init__(self, max_attempts=5, backoff=0.5, max_backoff=30, budget=120,
+                 retry_post=False, statuses=RETRY_STATUSES,
+                 errors=(ConnectionError, Timeout)):
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        # Total seconds a request may spend, retries included
+        self.budget = budget
+        self.retry_post = retry_post
+        self.statuses = statuses
+        self.errors = errors
+        self.retries = {}
+        self._lock = threading.Lock()
+
+    def retryable(self, method):
+        return method in IDEMPOTENT_METHODS or (method == 'POST' and self.retry_post)
+
+    def _delay(self, attempt, response):
+        wait = retry_after(response) if response is not None else None
+        if wait is None:
+            wait = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        return wait
+
+    def next_delay(self, method, url, attempt, start, response=None):
+        """Seconds to wait before retrying, or None when the request is done.
+
+        ``attempt`` counts from 0 and ``start`` is the clock time of the
+        first one. ``response`` is the attempt's response, or None when it
+        raised one of ``errors``.
+        """
+        if response is not None and not self._should_retry(response):
+            return None
+        if not self.retryable(method) or attempt + 1 >= self.max_attempts:
+            return None
+        wait = self._delay(attempt, response)
+        if self.clock() - start + wait > self.budget:
+            return None
+        endpoint = (method, urlparse(url).path)
+        with self._lock:
+            self.retries[endpoint] = self.retries.get(endpoint, 0) + 1
+        return wait
+
+    def _should_retry(self, response):
+        return response.status_code in self.statuses
+
+    def call(self, method, url, send):
+        """Call ``send()`` until it returns a response that needs no retry."""
+        start = self.clock()
+        attempt = 0
+        while True:
+            try:
+                response = send()
+            except self.errors:
+                wait = self.next_delay(method, url, attempt, start)
+                if wait is None:
+                    raise
+            else:
+                response.retries = attempt
+                wait = self.next_delay(method, url, attempt, start, response)
+                if wait is None:
+                    return response
+                response.close()
+            self.sleep(wait)
+            attempt += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self.retries)
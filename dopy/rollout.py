@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+#coding: utf-8
+"""
+This module runs an operation over a fleet of droplets in rolling waves.
+
+Every droplet goes through a chain of steps (for example ``power_off``, then
+``snapshot``, then ``power_on``); a step starts once the action of the
+previous one has completed. At most ``concurrency`` droplets are in flight,
+and the actions of all of them are read from one action listing per tick.
+Once more than ``max_failures`` droplets have failed, no new droplet is
+started.
+
+    >>> rollout = Rollout(DoApiDroplets(), ['power_off', Step('resize', 's-2vcpu-4gb'),
+    ...                                     'power_on'], wave_size=10, concurrency=5)
+    >>> report = rollout.run(droplet_ids)
+    >>> print(report.describe())
+"""
+
+import time
+
+from dopy import common as c
+from dopy.exceptions import DoError, DoTimeoutError
+from dopy.waiter import ActionWaiter, action_id
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+
+class Step(object):
+    """One step of a droplet's chain.
+
+    ``action`` names a ``DoApiDroplets`` method, with or without its
+    ``_droplet`` suffix (``'snapshot'``, ``'resize_droplet'``), or is a
+    ``func(droplets, droplet_id, *args)``. It is called with the droplet id
+    and ``args``; a callable argument is first called with the droplet id,
+    so ``Step('snapshot', lambda droplet_id: 'pre-resize-%s' % droplet_id)``
+    names every snapshot after its droplet.
+    """
+
+    def __init__(self, action, *args, **kwargs):
+        self.action = action
+        self.args = args
+        self.kwargs = kwargs
+
+    def __repr__(self):
+        return '<Step %s>' % getattr(self.action, '__name__', self.action)
+
+    def run(self, droplets, droplet_id):
+        args = [arg(droplet_id) if callable(arg) else arg for arg in self.args]
+        if callable(self.action):
+            return self.action(droplets, droplet_id, *args, **self.kwargs)
+        method = getattr(droplets, '%s_droplet' % self.action, None)
+        if method is None:
+            method = getattr(droplets, self.action)
+        return method(droplet_id, *args, **self.kwargs)
+
+
+class Task(object):
+    """The progress of one droplet through the steps."""
+
+    def __init__(self, droplet_id, wave):
+        self.droplet_id = droplet_id
+        self.wave = wave
+        self.status = PENDING
+        self.step = 0
+        self.action = None
+        self.actions = []
+        self.error = None
+        self.started = None
+        self.step_started = None
+        self.finished = None
+
+    def __repr__(self):
+        return '<Task %s %s step %s>' % (self.droplet_id, self.status, self.step)
+
+
+class Report(object):
+
+    def __init__(self, tasks, clock):
+        self.tasks = tasks
+        self.clock = clock
+        self.started = clock()
+        self.finished = None
+        self.stopped = False
+
+    def _count(self, status):
+        return sum(1 for task in self.tasks if task.status == status)
+
+    @property
+    def done(self):
+        return self._count(DONE)
+
+    @property
+    def failed(self):
+        return self._count(FAILED)
+
+    @property
+    def running(self):
+        return self._count(RUNNING)
+
+    @property
+    def pending(self):
+        return self._count(PENDING)
+
+    @property
+    def skipped(self):
+        return self._count(SKIPPED)
+
+    @property
+    def errors(self):
+        return dict((task.droplet_id, task.error) for task in self.tasks
+                    if task.error is not None)
+
+    @property
+    def elapsed(self):
+        return (self.finished or self.clock()) - self.started
+
+    @property
+    def throughput(self):
+        """Droplets completed per minute."""
+        elapsed = self.elapsed
+        return self.done * 60.0 / elapsed if elapsed > 0 else 0.0
+
+    def waves(self):
+        waves = {}
+        for task in self.tasks:
+            wave = waves.setdefault(task.wave, {'wave': task.wave, 'size': 0, 'done': 0,
+                                                'failed': 0, 'started': None, 'finished': None})
+            wave['size'] += 1
+            if task.status in (DONE, FAILED):
+                wave[task.status] += 1
+            if task.started is not None:
+                wave['started'] = min(wave['started'] or task.started, task.started)
+            if task.finished is not None:
+                wave['finished'] = max(wave['finished'] or task.finished, task.finished)
+        return [waves[key] for key in sorted(waves)]
+
+    def summary(self):
+        return {
+            'total': len(self.tasks),
+            'done': self.done,
+            'failed': self.failed,
+            'running': self.running,
+            'pending': self.pending,
+            'skipped': self.skipped,
+            'stopped': self.stopped,
+            'elapsed': self.elapsed,
+            'throughput': self.throughput,
+        }
+
+    def describe(self):
+        return ('%(done)s/%(total)s done, %(failed)s failed, %(running)s running, '
+                '%(pending)s pending, %(skipped)s skipped in %(elapsed).1fs '
+                '(%(throughput).1f/min)%(stop)s'
+                % dict(self.summary(), stop=', stopped' if self.stopped else ''))
+
+
+class Rollout(object):
+
+    sleep = staticmethod(time.sleep)
+    clock = staticmethod(time.time)
+
+    def __init__(self, droplets, steps, wave_size=None, concurrency=5, pipelining=True,
+                 max_failures=0, step_timeout=None, interval=2, progress=None):
+        self.droplets = droplets
+        self.steps = [step if isinstance(step, Step) else Step(step) for step in steps]
+        self.concurrency = concurrency
+        self.wave_size = wave_size or concurrency
+        # Start a droplet of the next wave as soon as a slot frees up,
+        # rather than once the whole wave is over
+        self.pipelining = pipelining
+        # A count, or a fraction of the fleet when below 1
+        self.max_failures = max_failures
+        self.step_timeout = step_timeout
+        self.interval = interval
+        # Called with the report after every tick
+        self.progress = progress
+
+    def _budget(self, total):
+        if 0 < self.max_failures < 1:
+            return int(self.max_failures * total)
+        return self.max_failures
+
+    def _fire(self, task):
+        return self.steps[task.step].run(self.droplets, task.droplet_id)
+
+    def _finish(self, task, status, error=None):
+        task.status = status
+        task.error = error
+        task.action = None
+        task.finished = self.clock()
+
+    def _advance(self, task, ready):
+        task.step += 1
+        task.action = None
+        if task.step < len(self.steps):
+            ready.append(task)
+        else:
+            self._finish(task, DONE)
+
+    def run(self, droplets):
+        """Run the steps over ``droplets`` (ids or droplet JSON) and return the report."""
+        ids = [droplet['id'] if isinstance(droplet, dict) else droplet for droplet in droplets]
+        tasks = [Task(droplet_id, index // self.wave_size)
+                 for index, droplet_id in enumerate(ids)]
+        report = Report(tasks, self.clock)
+        budget = self._budget(len(tasks))
+        waiter = ActionWaiter(self.droplets, per_page=max(50, self.concurrency * 2))
+        queue = list(tasks)
+        waiting = {}
+        ready = []
+        while True:
+            running = [task for task in tasks if task.status == RUNNING]
+            if report.failed > budget:
+                report.stopped = True
+            while queue and not report.stopped and len(running) < self.concurrency:
+                task = queue[0]
+                if not self.pipelining and any(t.wave < task.wave for t in running):
+                    break
+                queue.pop(0)
+                task.status = RUNNING
+                task.started = self.clock()
+                running.append(task)
+                ready.append(task)
+
+            fired, ready = ready, []
+            for task, json, error in c.map_concurrently(self._fire, fired, self.concurrency):
+                if error is not None:
+                    self._finish(task, FAILED, error)
+                elif isinstance(json, dict) and json.get('action'):
+                    task.action = action_id(json)
+                    task.actions.append(task.action)
+                    task.step_started = self.clock()
+                    waiting[task.action] = task
+                    waiter.add(task.action)
+                else:
+                    self._advance(task, ready)
+            if ready:
+                continue
+
+            if not waiting and (report.stopped or not queue):
+                break
+            if waiting:
+                self.sleep(self.interval)
+                for action in waiter.poll():
+                    task = waiting.pop(action['id'], None)
+                    if task is None:
+                        continue
+                    if action['status'] == 'errored':
+                        self._finish(task, FAILED, DoError(
+                            '%s action %s errored on droplet %s'
+                            % (action.get('type'), action['id'], task.droplet_id)))
+                    else:
+                        self._advance(task, ready)
+                if self.step_timeout is not None:
+                    now = self.clock()
+                    for key, task in list(waiting.items()):
+                        if now - task.step_started > self.step_timeout:
+                            del waiting[key]
+                            self._finish(task, FAILED, DoTimeoutError(
+                                'Timed out waiting for action %s on droplet %s'
+                                % (key, task.droplet_id), [key]))
+            if self.progress is not None:
+                self.progress(report)
+
+        for task in queue:
+            task.status = SKIPPED
+        report.finished = self.clock()
+        if self.progress is not None:
+            self.progress(report)
+        return report
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+#coding: utf-8
+"""
+This module keeps the HTTP connections to the Digital Ocean API alive,
+so that successive requests reuse the same pooled TCP/TLS connections.
+"""
+
+import atexit
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from dopy.retry import RetryPolicy
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_POOL_CONNECTIONS = 4
+
+
+class PoolStats(object):
+    """Counts, for every request sent, whether it reused a pooled connection."""
+
+    def __init__(self):
+        self.requests = 0
+        self.hits = 0
+        self.misses = 0
+        self.connections = 0
+        self.warmed = 0
+        self._lock = threading.Lock()
+        self._warming = threading.local()
+
+    def count(self, reused):
+        with self._lock:
+            if not reused:
+                self.connections += 1
+            if getattr(self._warming, 'active', False):
+                self.warmed += 0 if reused else 1
+            elif reused:
+                self.requests += 1
+                self.hits += 1
+            else:
+                self.requests += 1
+                self.misses += 1
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'connections': self.connections,
+                'warmed': self.warmed,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+def _counting_pool(pool_cls, stats):
+    # ConnectionCls and PoolManager.pool_classes_by_scheme are the urllib3
+    # extension points for this; each connection knows if it served before.
+    class Connection(pool_cls.ConnectionCls):
+
+        def __init__(self, *args, **kwargs):
+            super(Connection, self).__init__(*args, **kwargs)
+            self.served = 0
+
+        def request(self, *args, **kwargs):
+            stats.count(self.served > 0)
+            self.served += 1
+            return super(Connection, self).request(*args, **kwargs)
+
+    return type(pool_cls.__name__, (pool_cls,), {'ConnectionCls': Connection})
+
+
+class CountingAdapter(HTTPAdapter):
+
+    def __init__(self, stats, **kwargs):
+        self.stats = stats
+        super(CountingAdapter, self).__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super(CountingAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _counting_pool(HTTPConnectionPool, self.stats),
+            'https': _counting_pool(HTTPSConnectionPool, self.stats),
+        }
+
+
+class Session(object):
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE,
+                 pool_connections=DEFAULT_POOL_CONNECTIONS, pool_block=False, retry=None):
+        self.pool_size = int(pool_size)
+        self.pool_connections = int(pool_connections)
+        self.pool_block = pool_block
+        self.retry = retry if retry is not None else RetryPolicy()
+        self._lock = threading.Lock()
+        self._session = None
+        self._adapter = None
+        self._stats = PoolStats()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _get_session(self):
+        with self._lock:
+            if self._session is None:
+                self._adapter = CountingAdapter(self._stats,
+                                                pool_connections=self.pool_connections,
+                                                pool_maxsize=self.pool_size,
+                                                pool_block=self.pool_block)
+                self._session = requests.Session()
+                self._session.mount('https://', self._adapter)
+                self._session.mount('http://', self._adapter)
+            return self._session
+
+    def request(self, method, url, **kwargs):
+        session = self._get_session()
+        return self.retry.call(method, url, lambda: session.request(method, url, **kwargs))
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+    def warm(self, url, connections=1):
+        """Open ``connections`` connections to the host of ``url`` ahead of use.
+
+        Each one is opened by a HEAD request to ``url``; the responses are
+        all held open before being released, so no connection is reused
+        for the next one.
+        """
+        session = self._get_session()
+        responses = []
+        self._stats._warming.active = True
+        try:
+            for _ in range(min(int(connections), self.pool_size)):
+                responses.append(session.head(url, stream=True))
+        finally:
+            self._stats._warming.active = False
+            for response in responses:
+                # Reading the (empty) body hands the connection back to the pool
+                response.content
+
+    def stats(self):
+        """Requests sent, connections opened (``warmed`` of them by ``warm``),
+        and requests that reused a pooled connection (``hits``) or had to
+        open one (``misses``)."""
+        return self._stats.to_dict()
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+            self._session = None
+            self._adapter = None
+            self._stats = PoolStats()
+
+
+_default_session = None
+_default_lock = threading.Lock()
+
+
+def get_default_session():
+    global _default_session
+    with _default_lock:
+        if _default_session is None:
+            _default_session = Session()
+        return _default_session
+
+
+def close_default_session():
+    with _default_lock:
+        if _default_session is not None:
+            _default_session.close()
+
+
+atexit.register(close_default_session)
@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+#coding: utf-8
+"""
+This module keeps an optional on-disk (SQLite) cache of the account's
+droplets, images, domains, records, keys, sizes and regions.
+
+Fresh listings are served from disk; stale ones are served too while they
+are revalidated in the background. The database runs in WAL mode with a
+busy timeout, so several processes can share one file.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from dopy.inventory import index_keys
+
+DEFAULT_MAX_AGE = 300
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS resources (
+    kind TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (kind, scope, key)
+);
+CREATE TABLE IF NOT EXISTS resource_index (
+    kind TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    field TEXT NOT NULL,
+    value TEXT NOT NULL,
+    key TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS resource_index_lookup
+    ON resource_index (kind, field, value);
+CREATE TABLE IF NOT EXISTS freshness (
+    kind TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (kind, scope)
+);
+"""
+
+# kind -> field holding the item key
+KEYS = {
+    'droplets': 'id',
+    'images': 'id',
+    'domains': 'name',
+    'domain_records': 'id',
+    'ssh_keys': 'id',
+    'sizes': 'slug',
+    'regions': 'slug',
+}
+
+
+def index_values(kind, item):
+    if kind == 'droplets':
+        for field, value in index_keys(item):
+            yield field, value
+    elif kind == 'images':
+        yield 'name', item.get('name')
+        yield 'slug', item.get('slug')
+        for region in item.get('regions') or []:
+            yield 'region', region
+    elif kind == 'domain_records':
+        yield 'name', item.get('name')
+        yield 'type', item.get('type')
+        yield 'data', item.get('data')
+    elif kind == 'ssh_keys':
+        yield 'name', item.get('name')
+        yield 'fingerprint', item.get('fingerprint')
+    else:
+        yield 'name', item.get('name')
+
+
+class InventoryStore(object):
+
+    clock = staticmethod(time.time)
+
+    def __init__(self, path, max_age=DEFAULT_MAX_AGE, revalidate=True, timeout=30):
+        self.path = os.path.expanduser(path)
+        self.max_age = max_age
+        self.revalidate = revalidate
+        self.timeout = timeout
+        self._local = threading.local()
+        self._revalidating = {}
+        self._lock = threading.Lock()
+        self._db().executescript(SCHEMA)
+
+    def _db(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA busy_timeout=%d' % int(self.timeout * 1000))
+            self._local.db = db
+        return db
+
+    def _transaction(self):
+        return _Transaction(self._db())
+
+    def close(self):
+        db = getattr(self._local, 'db', None)
+        if db is not None:
+            db.close()
+            self._local.db = None
+
+    # writes===========================================
+    def replace(self, kind, items, scope=''):
+        """Store the full listing of ``kind`` (within ``scope``)."""
+        key_field = KEYS[kind]
+        rows = []
+        index = []
+        for item in items:
+            key = str(item[key_field])
+            rows.append((kind, scope, key, json.dumps(item)))
+            index.extend((kind, scope, field, str(value), key)
+                         for field, value in index_values(kind, item) if value is not None)
+        with self._transaction() as db:
+            db.execute('DELETE FROM resources WHERE kind = ? AND scope = ?', (kind, scope))
+            db.execute('DELETE FROM resource_index WHERE kind = ? AND scope = ?', (kind, scope))
+            db.executemany('INSERT INTO resources VALUES (?, ?, ?, ?)', rows)
+            db.executemany('INSERT INTO resource_index VALUES (?, ?, ?, ?, ?)', index)
+            db.execute('INSERT OR REPLACE INTO freshness VALUES (?, ?, ?)',
+                       (kind, scope, self.clock()))
+
+    def invalidate(self, kind, scope=''):
+        with self._transaction() as db:
+            db.execute('DELETE FROM freshness WHERE kind = ? AND scope = ?', (kind, scope))
+
+    # reads============================================
+    def age(self, kind, scope=''):
+        row = self._db().execute('SELECT fetched_at FROM freshness WHERE kind = ? AND scope = ?',
+                                 (kind, scope)).fetchone()
+        return None if row is None else self.clock() - row[0]
+
+    def items(self, kind, scope=''):
+        rows = self._db().execute('SELECT data FROM resources WHERE kind = ? AND scope = ? '
+                                  'ORDER BY rowid', (kind, scope)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def find(self, kind, field, value, scope=None):
+        query = ('SELECT DISTINCT r.data FROM resource_index i JOIN resources r '
+                 'ON r.kind = i.kind AND r.scope = i.scope AND r.key = i.key '
+                 'WHERE i.kind = ? AND i.field = ? AND i.value = ?')
+        args = [kind, field, str(value)]
+        if scope is not None:
+            query += ' AND i.scope = ?'
+            args.append(scope)
+        rows = self._db().execute(query + ' ORDER BY r.rowid', args).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def get(self, kind, fetch, scope='', max_age=None):
+        """Return the listing of ``kind``, calling ``fetch()`` only when needed.
+
+        A fresh copy is read from disk. A stale copy is returned as is and
+        refreshed in the background; without a copy ``fetch`` runs inline.
+        """
+        max_age = self.max_age if max_age is None else max_age
+        age = self.age(kind, scope)
+        if age is None or (age > max_age and not self.revalidate):
+            items = fetch()
+            self.replace(kind, items, scope)
+            return items
+        if age > max_age:
+            self._revalidate(kind, fetch, scope)
+        return self.items(kind, scope)
+
+    def _revalidate(self, kind, fetch, scope):
+        with self._lock:
+            running = self._revalidating.get((kind, scope))
+            if running is not None and running.is_alive():
+                return running
+            thread = threading.Thread(target=self._refresh, args=(kind, fetch, scope),
+                                      name='dopy-store-%s' % kind)
+            thread.daemon = True
+            self._revalidating[(kind, scope)] = thread
+        thread.start()
+        return thread
+
+    def _refresh(self, kind, fetch, scope):
+        try:
+            self.replace(kind, fetch(), scope)
+        except Exception:
+            # The stale copy keeps being served until a refresh succeeds
+            pass
+        finally:
+            self.close()
+
+    def wait(self, timeout=None):
+        """Wait for the background revalidations to finish."""
+        with self._lock:
+            threads = list(self._revalidating.values())
+        for thread in threads:
+            thread.join(timeout)
+
+
+class _Transaction(object):
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute('BEGIN IMMEDIATE')
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb):
+        self.db.execute('ROLLBACK' if exc_type is not None else 'COMMIT')
+
+
+class CachedReads(object):
+    """The listing methods of ``DoManager`` served through an ``InventoryStore``."""
+
+    def __init__(self, store, manager, droplets, domains, max_age=None):
+        self.store = store
+        self.manager = manager
+        self.droplets = droplets
+        self.domains = domains
+        self.max_age = max_age
+
+    def all_active_droplets(self):
+        return self.store.get('droplets', self.droplets.list, max_age=self.max_age)
+
+    def all_images(self, filter='global'):
+        return self.store.get('images', lambda: self.manager.all_images(filter),
+                              scope=filter, max_age=self.max_age)
+
+    def all_domains(self):
+        return self.store.get('domains', self.domains.list, max_age=self.max_age)
+
+    def all_domain_records(self, domain_id):
+        return self.store.get('domain_records',
+                              lambda: self.domains.all_domain_records(domain_id),
+                              scope=domain_id, max_age=self.max_age)
+
+    def all_ssh_keys(self):
+        return self.store.get('ssh_keys', self.manager.all_ssh_keys, max_age=self.max_age)
+
+    def sizes(self):
+        return self.store.get('sizes', self.manager.sizes, max_age=self.max_age)
+
+    def all_regions(self):
+        return self.store.get('regions', self.manager.all_regions, max_age=self.max_age)
+
+    def find_droplets(self, field, value):
+        self.all_active_droplets()
+        return self.store.find('droplets', field, value)
@@ -0,0 +1,601 @@
+#!/usr/bin/env python
+#coding: utf-8
+"""
+This module runs a local stand-in for the Digital Ocean v2 API, to test and
+benchmark dopy offline.
+
+    >>> with FakeDoServer(droplets=500, latency=0.01) as server:
+    ...     do = DoManager(api_endpoint=server.url)
+
+It serves the droplet, action, domain, record, image, SSH key, size and
+region endpoints dopy uses. Latency, page size, injected errors, the
+``RateLimit-*`` headers and the expected API token can be configured.
+
+``FakeDoTestCase`` gives every test a fresh server and a session to it.
+"""
+
+import json
+import math
+import random
+import re
+import threading
+import time
+import unittest
+
+from six.moves import BaseHTTPServer, socketserver
+from six.moves.urllib.parse import parse_qs, urlencode, urlparse
+
+from dopy.session import Session
+
+REGIONS = ['nyc1', 'nyc3', 'sfo2', 'ams3', 'sgp1', 'lon1', 'fra1', 'tor1']
+SIZES = ['512mb', '1gb', '2gb', '4gb', '8gb']
+
+
+def _now():
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+
+
+class ApiError(Exception):
+
+    def __init__(self, status, error_id, message):
+        super(ApiError, self).__init__(message)
+        self.status = status
+        self.error_id = error_id
+
+
+class FakeDoServer(object):
+
+    def __init__(self, droplets=0, domains=0, records=0, images=0, host='127.0.0.1', port=0,
+                 latency=0, page_size=20, error_rate=0, error_status=503,
+                 rate_limit=5000, rate_period=3600, action_duration=0, token=None):
+        self.latency = latency
+        self.page_size = page_size
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rate_limit = rate_limit
+        self.rate_period = rate_period
+        self.rate_remaining = rate_limit
+        self.rate_reset = time.time() + rate_period
+        self.action_duration = action_duration
+        # When set, requests must carry "Bearer <token>"
+        self.token = token
+        self.requests = 0
+        self.log = []
+        self._fail_next = []
+        self._ids = 0
+        self._lock = threading.RLock()
+        self.droplets = {}
+        self.actions = {}
+        self.domains = {}
+        self.records = {}
+        self.images = {}
+        self.keys = {}
+        self._seed(droplets, domains, records, images)
+        self._server = _Server((host, port), _Handler)
+        self._server.fake = self
+        self._thread = None
+
+    # lifecycle========================================
+    @property
+    def url(self):
+        return 'http://%s:%s' % self._server.server_address[:2]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,))
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def fail_next(self, count=1, status=503):
+        with self._lock:
+            self._fail_next.extend([status] * count)
+
+    # state============================================
+    def next_id(self):
+        with self._lock:
+            self._ids += 1
+            return self._ids
+
+    def _seed(self, droplets, domains, records, images):
+        for index in range(droplets):
+            self.add_droplet('droplet-%s' % index, region=REGIONS[index % len(REGIONS)],
+                             size=SIZES[index % len(SIZES)], tags=['tag-%s' % (index % 4)],
+                             status='active')
+        for index in range(images):
+            image_id = self.next_id()
+            self.images[image_id] = {
+                'id': image_id, 'name': 'image-%s' % index, 'slug': None,
+                'public': False, 'regions': [REGIONS[0]], 'type': 'snapshot',
+                'distribution': 'Ubuntu', 'min_disk_size': 20, 'created_at': _now(),
+            }
+        for index in range(domains):
+            name = 'example%s.com' % index
+            self.add_domain(name, '10.0.0.1')
+            for record in range(records):
+                self.add_record(name, {'type': 'A', 'name': 'host-%s' % record,
+                                       'data': '10.1.%s.%s' % (record // 250, record % 250)})
+
+    def add_droplet(self, name, region='nyc3', size='512mb', image='ubuntu-14-04-x64',
+                    tags=None, status='new'):
+        droplet_id = self.next_id()
+        created = time.time()
+        droplet = {
+            'id': droplet_id, 'name': name, 'memory': 512, 'vcpus': 1, 'disk': 20,
+            'locked': False, 'status': status, 'created_at': _now(), 'kernel': None,
+            'features': ['virtio'], 'backup_ids': [], 'snapshot_ids': [],
+            'image': {'slug': image, 'distribution': 'Ubuntu'},
+            'size_slug': size, 'region': {'slug': region, 'name': region},
+            'networks': {'v4': [], 'v6': []}, 'tags': list(tags or []),
+            '_created': created,
+        }
+        if status == 'active':
+            self._assign_networks(droplet)
+        with self._lock:
+            self.droplets[droplet_id] = droplet
+        return droplet
+
+    def _assign_networks(self, droplet):
+        droplet_id = droplet['id']
+        droplet['networks']['v4'] = [
+            {'ip_address': '192.0.%s.%s' % (droplet_id // 250 % 250, droplet_id % 250),
+             'netmask': '255.255.255.0', 'gateway': '192.0.2.1', 'type': 'public'},
+            {'ip_address': '10.128.%s.%s' % (droplet_id // 250 % 250, droplet_id % 250),
+             'netmask': '255.255.0.0', 'gateway': '10.128.0.1', 'type': 'private'},
+        ]
+
+    def add_domain(self, name, ip):
+        with self._lock:
+            self.domains[name] = {'name': name, 'ttl': 1800, 'zone_file': ''}
+            self.records[name] = {}
+        return self.domains[name]
+
+    def add_record(self, domain, params):
+        record_id = self.next_id()
+        record = {'id': record_id, 'type': params.get('type'), 'name': params.get('name', '@'),
+                  'data': params.get('data'), 'priority': params.get('priority'),
+                  'port': params.get('port'), 'ttl': params.get('ttl', 1800),
+                  'weight': params.get('weight'), 'flags': params.get('flags'),
+                  'tag': params.get('tag')}
+        with self._lock:
+            self.records[domain][record_id] = record
+        return record
+
+    def add_action(self, action_type, resource_id, resource_type='droplet', region=None):
+        action_id = self.next_id()
+        action = {'id': action_id, 'status': 'in-progress', 'type': action_type,
+                  'started_at': _now(), 'completed_at': None, 'resource_id': resource_id,
+                  'resource_type': resource_type, 'region_slug': region,
+                  '_started': time.time()}
+        with self._lock:
+            self.actions[action_id] = action
+        return action
+
+    def _refresh(self, obj):
+        # Actions complete, and new droplets boot, ``action_duration`` seconds later
+        started = obj.get('_started', obj.get('_created'))
+        if time.time() - started < self.action_duration:
+            return obj
+        if 'resource_type' in obj and obj['status'] == 'in-progress':
+            obj['status'] = 'completed'
+            obj['completed_at'] = _now()
+        elif obj.get('status') == 'new':
+            obj['status'] = 'active'
+            self._assign_networks(obj)
+        return obj
+
+    @staticmethod
+    def public(obj):
+        return dict((k, v) for k, v in obj.items() if not k.startswith('_'))
+
+    # http=============================================
+    def handle(self, method, path, query, body):
+        with self._lock:
+            self.requests += 1
+            self.log.append((method, path))
+            fail = self._fail_next.pop(0) if self._fail_next else None
+            now = time.time()
+            if now >= self.rate_reset:
+                # A new window: the budget is full again
+                self.rate_remaining = self.rate_limit
+                self.rate_reset = now + self.rate_period
+            if self.rate_remaining > 0:
+                self.rate_remaining -= 1
+            else:
+                fail = 429
+        if self.latency:
+            time.sleep(self.latency)
+        if fail is None and self.error_rate and random.random() < self.error_rate:
+            fail = self.error_status
+        if fail == 429:
+            raise ApiError(429, 'too_many_requests', 'API Rate limit exceeded.')
+        if fail is not None:
+            raise ApiError(fail, 'server_error', 'Injected error.')
+
+        for route_method, pattern, handler in ROUTES:
+            match = pattern.match(path)
+            if match and route_method == method:
+                return handler(self, query, body, *match.groups())
+        raise ApiError(404, 'not_found', 'The resource you were accessing could not be found.')
+
+    def rate_headers(self):
+        return {
+            'RateLimit-Limit': str(self.rate_limit),
+            'RateLimit-Remaining': str(self.rate_remaining),
+            'RateLimit-Reset': str(int(math.ceil(self.rate_reset))),
+        }
+
+    def paginate(self, path, query, key, items):
+        per_page = min(int(query.get('per_page', self.page_size)), 200)
+        page = int(query.get('page', 1))
+        last = max((len(items) + per_page - 1) // per_page, 1)
+        out = {key: items[(page - 1) * per_page:page * per_page],
+               'links': {}, 'meta': {'total': len(items)}}
+
+        def link(number):
+            params = dict(query, page=number, per_page=per_page)
+            return '%s/v2%s?%s' % (self.url, path, urlencode(sorted(params.items())))
+        pages = {}
+        if page > 1:
+            pages['first'] = link(1)
+            pages['prev'] = link(page - 1)
+        if page < last:
+            pages['next'] = link(page + 1)
+            pages['last'] = link(last)
+        if pages:
+            out['links']['pages'] = pages
+        return out
+
+    def _droplet(self, droplet_id):
+        droplet = self.droplets.get(int(droplet_id))
+        if droplet is None:
+            raise ApiError(404, 'not_found', 'The resource you were accessing could not be found.')
+        return droplet
+
+    # droplets=========================================
+    def list_droplets(self, query, body):
+        with self._lock:
+            droplets = [self.public(self._refresh(d)) for _, d in sorted(self.droplets.items())]
+        if 'tag_name' in query:
+            droplets = [d for d in droplets if query['tag_name'] in d['tags']]
+        return 200, self.paginate('/droplets', query, 'droplets', droplets)
+
+    def create_droplet(self, query, body):
+        names = body.get('names') or [body['name']]
+        tags = body.get('tags') or []
+        created = [self.public(self.add_droplet(name, body.get('region'), body.get('size'),
+                                                body.get('image'), tags))
+                   for name in names]
+        if 'names' in body:
+            return 202, {'droplets': created}
+        return 202, {'droplet': created[0]}
+
+    def show_droplet(self, query, body, droplet_id):
+        with self._lock:
+            return 200, {'droplet': self.public(self._refresh(self._droplet(droplet_id)))}
+
+    def destroy_droplet(self, query, body, droplet_id):
+        with self._lock:
+            self._droplet(droplet_id)
+            del self.droplets[int(droplet_id)]
+        return 204, None
+
+    def _apply_action(self, droplet, body):
+        action_type = body['type']
+        if action_type == 'rename':
+            droplet['name'] = body['name']
+        elif action_type in ('power_off', 'shutdown'):
+            droplet['status'] = 'off'
+        elif action_type in ('power_on', 'reboot', 'power_cycle'):
+            droplet['status'] = 'active'
+        elif action_type == 'resize':
+            droplet['size_slug'] = body['size']
+        elif action_type == 'snapshot':
+            image_id = self.next_id()
+            self.images[image_id] = {
+                'id': image_id, 'name': body.get('name'), 'slug': None, 'public': False,
+                'regions': [droplet['region']['slug']], 'type': 'snapshot',
+                'distribution': 'Ubuntu', 'min_disk_size': 20, 'created_at': _now(),
+            }
+            droplet['snapshot_ids'].append(image_id)
+        return self.public(self.add_action(action_type, droplet['id'],
+                                           region=droplet['region']['slug']))
+
+    def droplet_action(self, query, body, droplet_id):
+        with self._lock:
+            droplet = self._droplet(droplet_id)
+            if droplet['locked']:
+                raise ApiError(422, 'unprocessable_entity', 'Droplet already has a pending event.')
+            return 201, {'action': self._apply_action(droplet, body)}
+
+    def tag_action(self, query, body):
+        with self._lock:
+            droplets = [d for d in self.droplets.values() if query.get('tag_name') in d['tags']]
+            return 201, {'actions': [self._apply_action(d, body) for d in droplets]}
+
+    def destroy_tag(self, query, body, name):
+        with self._lock:
+            tagged = [d for d in self.droplets.values() if name in d['tags']]
+            if not tagged:
+                raise ApiError(404, 'not_found',
+                               'The resource you were accessing could not be found.')
+            for droplet in tagged:
+                droplet['tags'].remove(name)
+        return 204, None
+
+    # actions==========================================
+    def list_actions(self, query, body):
+        with self._lock:
+            actions = [self.public(self._refresh(a))
+                       for _, a in sorted(self.actions.items(), reverse=True)]
+        return 200, self.paginate('/actions', query, 'actions', actions)
+
+    def show_action(self, query, body, action_id):
+        with self._lock:
+            action = self.actions.get(int(action_id))
+            if action is None:
+                raise ApiError(404, 'not_found',
+                               'The resource you were accessing could not be found.')
+            return 200, {'action': self.public(self._refresh(action))}
+
+    # images===========================================
+    def _image(self, image_id):
+        image = self.images.get(int(image_id)) if str(image_id).isdigit() else None
+        if image is None:
+            raise ApiError(404, 'not_found', 'The resource you were accessing could not be found.')
+        return image
+
+    def list_images(self, query, body):
+        with self._lock:
+            images = [dict(i) for _, i in sorted(self.images.items())]
+        if query.get('private') == 'true':
+            images = [i for i in images if not i['public']]
+        return 200, self.paginate('/images', query, 'images', images)
+
+    def show_image(self, query, body, image_id):
+        with self._lock:
+            return 200, {'image': dict(self._image(image_id))}
+
+    def destroy_image(self, query, body, image_id):
+        with self._lock:
+            del self.images[self._image(image_id)['id']]
+        return 204, None
+
+    def image_action(self, query, body, image_id):
+        with self._lock:
+            image = self._image(image_id)
+            if body['type'] == 'transfer' and body['region'] not in image['regions']:
+                image['regions'].append(body['region'])
+            action = self.add_action(body['type'], image['id'], 'image', body.get('region'))
+            return 201, {'action': self.public(action)}
+
+    # domains==========================================
+    def _domain(self, name):
+        if name not in self.domains:
+            raise ApiError(404, 'not_found', 'The resource you were accessing could not be found.')
+        return self.domains[name]
+
+    def list_domains(self, query, body):
+        with self._lock:
+            domains = [dict(d) for _, d in sorted(self.domains.items())]
+        return 200, self.paginate('/domains', query, 'domains', domains)
+
+    def create_domain(self, query, body):
+        return 201, {'domain': dict(self.add_domain(body['name'], body.get('ip_address')))}
+
+    def show_domain(self, query, body, name):
+        with self._lock:
+            return 200, {'domain': dict(self._domain(name))}
+
+    def destroy_domain(self, query, body, name):
+        with self._lock:
+            self._domain(name)
+            del self.domains[name]
+            del self.records[name]
+        return 204, None
+
+    def _record(self, name, record_id):
+        self._domain(name)
+        record = self.records[name].get(int(record_id))
+        if record is None:
+            raise ApiError(404, 'not_found', 'The resource you were accessing could not be found.')
+        return record
+
+    def list_records(self, query, body, name):
+        with self._lock:
+            self._domain(name)
+            records = [dict(r) for _, r in sorted(self.records[name].items())]
+        return 200, self.paginate('/domains/%s/records' % name, query, 'domain_records', records)
+
+    def create_record(self, query, body, name):
+        with self._lock:
+            self._domain(name)
+            return 201, {'domain_record': dict(self.add_record(name, body))}
+
+    def show_record(self, query, body, name, record_id):
+        with self._lock:
+            return 200, {'domain_record': dict(self._record(name, record_id))}
+
+    def update_record(self, query, body, name, record_id):
+        with self._lock:
+            record = self._record(name, record_id)
+            record.update((k, v) for k, v in body.items() if k in record and k != 'id')
+            return 200, {'domain_record': dict(record)}
+
+    def destroy_record(self, query, body, name, record_id):
+        with self._lock:
+            del self.records[name][self._record(name, record_id)['id']]
+        return 204, None
+
+    # ssh_keys=========================================
+    def _key(self, key_id):
+        key = self.keys.get(int(key_id)) if str(key_id).isdigit() else None
+        if key is None:
+            raise ApiError(404, 'not_found', 'The resource you were accessing could not be found.')
+        return key
+
+    def list_keys(self, query, body):
+        with self._lock:
+            keys = [dict(k) for _, k in sorted(self.keys.items())]
+        return 200, self.paginate('/account/keys', query, 'ssh_keys', keys)
+
+    def create_key(self, query, body):
+        key_id = self.next_id()
+        key = {'id': key_id, 'name': body['name'], 'public_key': body['public_key'],
+               'fingerprint': '%032x' % key_id}
+        with self._lock:
+            self.keys[key_id] = key
+        return 201, {'ssh_key': dict(key)}
+
+    def show_key(self, query, body, key_id):
+        with self._lock:
+            return 200, {'ssh_key': dict(self._key(key_id))}
+
+    def update_key(self, query, body, key_id):
+        with self._lock:
+            key = self._key(key_id)
+            key['name'] = body.get('name', key['name'])
+            return 200, {'ssh_key': dict(key)}
+
+    def destroy_key(self, query, body, key_id):
+        with self._lock:
+            del self.keys[self._key(key_id)['id']]
+        return 204, None
+
+    # catalog==========================================
+    def list_sizes(self, query, body):
+        sizes = [{'slug': slug, 'memory': 512 * 2 ** i, 'vcpus': 2 ** i, 'disk': 20 * 2 ** i,
+                  'price_monthly': 5.0 * 2 ** i, 'regions': list(REGIONS), 'available': True}
+                 for i, slug in enumerate(SIZES)]
+        return 200, self.paginate('/sizes', query, 'sizes', sizes)
+
+    def list_regions(self, query, body):
+        regions = [{'slug': slug, 'name': slug, 'sizes': list(SIZES), 'available': True,
+                    'features': ['private_networking', 'backups', 'ipv6']} for slug in REGIONS]
+        return 200, self.paginate('/regions', query, 'regions', regions)
+
+
+def _route(method, pattern, handler):
+    return method, re.compile('^%s/?$' % pattern), handler
+
+
+ROUTES = [
+    _route('GET', '/droplets', FakeDoServer.list_droplets),
+    _route('POST', '/droplets', FakeDoServer.create_droplet),
+    _route('POST', '/droplets/actions', FakeDoServer.tag_action),
+    _route('GET', r'/droplets/(\d+)', FakeDoServer.show_droplet),
+    _route('DELETE', r'/droplets/(\d+)', FakeDoServer.destroy_droplet),
+    _route('POST', r'/droplets/(\d+)/actions', FakeDoServer.droplet_action),
+    _route('DELETE', '/tags/([^/]+)', FakeDoServer.destroy_tag),
+    _route('GET', '/actions', FakeDoServer.list_actions),
+    _route('GET', r'/actions/(\d+)', FakeDoServer.show_action),
+    _route('GET', '/images', FakeDoServer.list_images),
+    _route('GET', r'/images/([^/]+)', FakeDoServer.show_image),
+    _route('DELETE', r'/images/([^/]+)', FakeDoServer.destroy_image),
+    _route('POST', r'/images/([^/]+)/actions', FakeDoServer.image_action),
+    _route('GET', '/domains', FakeDoServer.list_domains),
+    _route('POST', '/domains', FakeDoServer.create_domain),
+    _route('GET', '/domains/([^/]+)', FakeDoServer.show_domain),
+    _route('DELETE', '/domains/([^/]+)', FakeDoServer.destroy_domain),
+    _route('GET', '/domains/([^/]+)/records', FakeDoServer.list_records),
+    _route('POST', '/domains/([^/]+)/records', FakeDoServer.create_record),
+    _route('GET', r'/domains/([^/]+)/records/(\d+)', FakeDoServer.show_record),
+    _route('PUT', r'/domains/([^/]+)/records/(\d+)', FakeDoServer.update_record),
+    _route('DELETE', r'/domains/([^/]+)/records/(\d+)', FakeDoServer.destroy_record),
+    _route('GET', '/account/keys', FakeDoServer.list_keys),
+    _route('POST', '/account/keys', FakeDoServer.create_key),
+    _route('GET', r'/account/keys/(\d+)', FakeDoServer.show_key),
+    _route('PUT', r'/account/keys/(\d+)', FakeDoServer.update_key),
+    _route('DELETE', r'/account/keys/(\d+)', FakeDoServer.destroy_key),
+    _route('GET', '/sizes', FakeDoServer.list_sizes),
+    _route('GET', '/regions', FakeDoServer.list_regions),
+]
+
+
+class _Server(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def _dispatch(self, method):
+        fake = self.server.fake
+        url = urlparse(self.path)
+        path = url.path[3:] if url.path.startswith('/v2') else url.path
+        query = dict((k, v[-1]) for k, v in parse_qs(url.query).items())
+        length = int(self.headers.get('Content-Length') or 0)
+        body = {}
+        if length:
+            try:
+                body = json.loads(self.rfile.read(length).decode('utf-8'))
+            except ValueError:
+                body = {}
+        try:
+            if fake.token and self.headers.get('Authorization') != 'Bearer %s' % fake.token:
+                raise ApiError(401, 'unauthorized', 'Unable to authenticate you.')
+            status, payload = fake.handle(method, path, query, body)
+        except ApiError as e:
+            status, payload = e.status, {'id': e.error_id, 'message': str(e)}
+        except (KeyError, TypeError, ValueError) as e:
+            status, payload = 422, {'id': 'unprocessable_entity', 'message': repr(e)}
+
+        data = b'' if payload is None else json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        for name, value in fake.rate_headers().items():
+            self.send_header(name, value)
+        if status == 429:
+            self.send_header('Retry-After', '1')
+        if data:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PUT(self):
+        self._dispatch('PUT')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeDoTestCase(unittest.TestCase):
+    """A test case with a fresh ``FakeDoServer`` and ``Session`` per test.
+
+    The server is built from ``server_options``; both are closed after
+    ``tearDown``. ``api(DoApiDroplets)`` binds an API class to the server.
+    """
+
+    server_options = {}
+
+    def create_session(self):
+        return Session()
+
+    def setUp(self):
+        self.server = FakeDoServer(**self.server_options).start()
+        self.addCleanup(self.server.stop)
+        self.session = self.create_session()
+        self.addCleanup(self.session.close)
+
+    def api(self, cls, **kwargs):
+        return cls(self.session, api_endpoint=self.server.url, **kwargs)
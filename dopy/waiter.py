@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+#coding: utf-8
+"""
+This module waits for many Digital Ocean actions (or new droplets) at once,
+reading one listing per tick instead of polling every action or droplet.
+"""
+
+import threading
+import time
+
+from dopy.exceptions import DoTimeoutError
+
+DONE_STATUSES = ('completed', 'errored')
+
+
+def action_id(action):
+    if isinstance(action, dict):
+        if 'action' in action:
+            action = action['action']
+        return int(action['id'])
+    return int(action)
+
+
+class ActionWaiter(object):
+
+    sleep = staticmethod(time.sleep)
+    clock = staticmethod(time.time)
+
+    def __init__(self, manager, interval=2, max_interval=30, backoff=1.5, per_page=200):
+        self.manager = manager
+        self.interval = interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.per_page = per_page
+        self.results = {}
+        self.requests = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self):
+        with self._lock:
+            return sorted(self._pending)
+
+    def add(self, action, callback=None):
+        """Track ``action`` (an id or action JSON); ``callback(action)`` fires once it is done."""
+        key = action_id(action)
+        with self._lock:
+            if key in self.results:
+                done = self.results[key]
+            else:
+                self._pending.setdefault(key, [])
+                if callback is not None:
+                    self._pending[key].append(callback)
+                return key
+        if callback is not None:
+            callback(done)
+        return key
+
+    def _resolve(self, action):
+        with self._lock:
+            callbacks = self._pending.pop(action['id'], None)
+            if callbacks is None:
+                return False
+            self.results[action['id']] = action
+        for callback in callbacks:
+            callback(action)
+        return True
+
+    def _request(self, path, params=None):
+        self.requests += 1
+        return self.manager.request(path, params or {})
+
+    def poll(self):
+        """Read the action list once and resolve the finished actions.
+
+        Returns the actions resolved by this tick.
+        """
+        wanted = set(self.pending)
+        if not wanted:
+            return []
+        seen = set()
+        resolved = []
+        oldest = min(wanted)
+        page = 1
+        while True:
+            json = self._request('/actions', {'page': page, 'per_page': self.per_page})
+            actions = json.get('actions', [])
+            for action in actions:
+                if action['id'] in wanted:
+                    seen.add(action['id'])
+                    if action['status'] in DONE_STATUSES and self._resolve(action):
+                        resolved.append(action)
+            # Actions are listed newest first, so once the oldest pending
+            # action is behind us the remaining pages cannot hold any more.
+            if seen == wanted or not actions or actions[-1]['id'] <= oldest:
+                break
+            if 'next' not in json.get('links', {}).get('pages', {}):
+                break
+            page += 1
+
+        for missing in wanted - seen:
+            action = self._request('/actions/%s' % missing)['action']
+            if action['status'] in DONE_STATUSES and self._resolve(action):
+                resolved.append(action)
+        return resolved
+
+    def wait(self, timeout=None):
+        """Poll until every tracked action is done and return them by id.
+
+        Raises ``DoTimeoutError`` when ``timeout`` seconds pass first.
+        """
+        deadline = None if timeout is None else self.clock() + timeout
+        interval = self.interval
+        while True:
+            if self.poll():
+                interval = self.interval
+            else:
+                interval = min(interval * self.backoff, self.max_interval)
+            pending = self.pending
+            if not pending:
+                return dict(self.results)
+            if deadline is not None:
+                remaining = deadline - self.clock()
+                if remaining <= 0:
+                    raise DoTimeoutError('Timed out waiting for actions %s' % pending, pending)
+                interval = min(interval, remaining)
+            self.sleep(interval)
+
+
+def droplet_ready(droplet):
+    networks = droplet.get('networks') or {}
+    return droplet.get('status') == 'active' and bool(networks.get('v4'))
+
+
+class DropletWaiter(object):
+    """Wait for new droplets sharing ``tag`` to boot, one tagged listing per tick."""
+
+    sleep = staticmethod(time.sleep)
+    clock = staticmethod(time.time)
+
+    def __init__(self, droplets, tag, interval=2, max_interval=15, backoff=1.5, per_page=200):
+        self.droplets = droplets
+        self.tag = tag
+        self.interval = interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.per_page = per_page
+        self.results = {}
+        self.requests = 0
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self):
+        with self._lock:
+            return sorted(self._pending)
+
+    def add(self, droplet):
+        """Track ``droplet`` (an id or droplet JSON)."""
+        key = int(droplet['id'] if isinstance(droplet, dict) else droplet)
+        with self._lock:
+            if key not in self.results:
+                self._pending.add(key)
+        return key
+
+    def poll(self):
+        """List the tag once and return the droplets that became ready."""
+        if not self.pending:
+            return []
+        self.requests += 1
+        json = self.droplets.request_all('/droplets/', {'tag_name': self.tag},
+                                         per_page=self.per_page)
+        ready = []
+        for droplet in json.get('droplets', []):
+            if not droplet_ready(droplet):
+                continue
+            with self._lock:
+                if droplet['id'] not in self._pending:
+                    continue
+                self._pending.discard(droplet['id'])
+                self.results[droplet['id']] = droplet
+            self.droplets.populate_droplet_ips(droplet)
+            ready.append(droplet)
+        return ready
+
+    def iter_ready(self, timeout=None):
+        """Yield each droplet as soon as a poll finds it ready.
+
+        Raises ``DoTimeoutError`` when ``timeout`` seconds pass first.
+        """
+        deadline = None if timeout is None else self.clock() + timeout
+        interval = self.interval
+        while True:
+            ready = self.poll()
+            for droplet in ready:
+                yield droplet
+            if ready:
+                interval = self.interval
+            else:
+                interval = min(interval * self.backoff, self.max_interval)
+            pending = self.pending
+            if not pending:
+                return
+            if deadline is not None:
+                remaining = deadline - self.clock()
+                if remaining <= 0:
+                    raise DoTimeoutError('Timed out waiting for droplets %s' % pending, pending)
+                interval = min(interval, remaining)
+            self.sleep(interval)
+
+    def wait(self, timeout=None):
+        """Poll until every tracked droplet is ready and return them by id."""
+        for _ in self.iter_ready(timeout):
+            pass
+        return dict(self.results)
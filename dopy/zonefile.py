@@ -0,0 +1,281 @@
+#!/usr/bin/env python
+#coding: utf-8
+"""
+This module exports a domain's records to a BIND zone file or JSON lines,
+page by page, and imports them back by parsing the file incrementally and
+creating the records through a bounded pool of workers.
+
+An import can keep a checkpoint file; run again with the same checkpoint,
+it skips every record that was already created.
+
+    >>> with open('example.com.zone', 'w') as out:
+    ...     export_zone(DoApiDomains(), 'example.com', out)
+    >>> with open('example.com.zone') as lines:
+    ...     import_zone(DoApiDomains(), 'example.com', lines, checkpoint='import.ckpt')
+"""
+
+import json
+import os
+import re
+import threading
+
+from six.moves import queue
+
+from dopy.reconcile import HOSTNAME_TYPES, normalize
+
+BIND = 'bind'
+JSONL = 'jsonl'
+DEFAULT_TTL = 1800
+DEFAULT_WORKERS = 8
+
+_TOKENS = re.compile(r'"(?:[^"\\]|\\.)*"|;.*|[()]|[^\s"();]+')
+_CLASSES = ('IN', 'CH', 'HS')
+# Atomic on every platform where it exists
+_replace = getattr(os, 'replace', os.rename)
+
+
+# export===============================================
+def _quote(value):
+    if value.startswith('"'):
+        return value
+    return '"%s"' % value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _host(value):
+    if value in ('@', '') or value.endswith('.'):
+        return value or '@'
+    return value + '.'
+
+
+def format_record(record):
+    """Return the zone-file line of an API record."""
+    record_type = record['type']
+    data = '' if record.get('data') is None else str(record['data'])
+    if record_type in HOSTNAME_TYPES:
+        data = _host(data)
+    if record_type == 'MX':
+        data = '%s %s' % (record.get('priority') or 0, data)
+    elif record_type == 'SRV':
+        data = '%s %s %s %s' % (record.get('priority') or 0, record.get('weight') or 0,
+                                record.get('port') or 0, data)
+    elif record_type == 'CAA':
+        data = '%s %s %s' % (record.get('flags') or 0, record.get('tag'), _quote(data))
+    elif record_type in ('TXT', 'SPF'):
+        data = _quote(data)
+    return '%s\t%s\tIN\t%s\t%s' % (record.get('name') or '@', record.get('ttl') or DEFAULT_TTL,
+                                   record_type, data)
+
+
+def export_zone(domains, domain_id, out, format=BIND, per_page=200):
+    """Write the records of ``domain_id`` to ``out`` as they are fetched.
+
+    Returns the number of records written.
+    """
+    if format == BIND:
+        out.write('$ORIGIN %s.\n' % domain_id.rstrip('.'))
+    count = 0
+    for record in domains.iter_domain_records(domain_id, per_page=per_page, stream=True):
+        if format == BIND:
+            out.write(format_record(record) + '\n')
+        else:
+            out.write(json.dumps(record, sort_keys=True) + '\n')
+        count += 1
+    return count
+
+
+# parse================================================
+def _unquote(token):
+    if token.startswith('"') and token.endswith('"'):
+        return re.sub(r'\\(.)', r'\1', token[1:-1])
+    return token
+
+
+def _absolute(name, origin):
+    if name == '@':
+        return origin
+    if name.endswith('.'):
+        return name[:-1]
+    return '%s.%s' % (name, origin)
+
+
+def parse_zone(lines, origin, default_ttl=DEFAULT_TTL):
+    """Yield API records from the zone-file ``lines``, one line at a time.
+
+    Handles ``$ORIGIN``/``$TTL``, comments, omitted owners and TTLs, and
+    records spanning parenthesized lines. Names come back relative to the
+    zone apex (``@``): the first ``$ORIGIN`` of the file when it comes before
+    any record, else ``origin``. A zone exported from one domain can so be
+    imported into another.
+    """
+    domain = origin.rstrip('.')
+    origin = domain
+    owner = '@'
+    pending = []
+    started = False
+    for line in lines:
+        tokens = [t for t in _TOKENS.findall(line) if not t.startswith(';')]
+        if pending:
+            pending.extend(tokens)
+        else:
+            if not tokens:
+                continue
+            pending = tokens
+            inherit = line[:1] in (' ', '\t')
+        if pending.count('(') > pending.count(')'):
+            continue
+        tokens, pending = [t for t in pending if t not in ('(', ')')], []
+
+        if tokens[0] == '$ORIGIN':
+            origin = tokens[1].rstrip('.')
+            if not started:
+                domain = origin
+            continue
+        if tokens[0] == '$TTL':
+            default_ttl = int(tokens[1])
+            continue
+        if tokens[0].startswith('$'):
+            continue
+        started = True
+        if not inherit:
+            owner = _absolute(tokens.pop(0), origin)
+        ttl = default_ttl
+        while tokens and (tokens[0].isdigit() or tokens[0].upper() in _CLASSES):
+            token = tokens.pop(0)
+            if token.isdigit():
+                ttl = int(token)
+        record_type, rdata = tokens[0].upper(), tokens[1:]
+
+        record = {'type': record_type, 'name': owner + '.', 'ttl': ttl}
+        if record_type == 'MX':
+            record['priority'], rdata = int(rdata[0]), rdata[1:]
+        elif record_type == 'SRV':
+            record['priority'], record['weight'], record['port'] = [int(t) for t in rdata[:3]]
+            rdata = rdata[3:]
+        elif record_type == 'CAA':
+            record['flags'], record['tag'], rdata = int(rdata[0]), rdata[1], rdata[2:]
+        if record_type in HOSTNAME_TYPES:
+            target = rdata[0]
+            record['data'] = '@' if _absolute(target, origin) == domain else (
+                _absolute(target, origin) + '.')
+        else:
+            record['data'] = ''.join(_unquote(t) for t in rdata)
+        yield normalize(record, domain)
+
+
+def parse_jsonl(lines):
+    for line in lines:
+        if line.strip():
+            yield json.loads(line)
+
+
+# import===============================================
+class Checkpoint(object):
+    """The records (by position in the source) an import already created."""
+
+    def __init__(self, path=None, save_every=100):
+        self.path = path
+        self.save_every = save_every
+        self.done_below = 0
+        self.done = set()
+        self._unsaved = 0
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path) as state:
+                state = json.load(state)
+            self.done_below = state['done_below']
+            self.done = set(state['done'])
+
+    def __contains__(self, index):
+        return index < self.done_below or index in self.done
+
+    def mark(self, index):
+        with self._lock:
+            self.done.add(index)
+            while self.done_below in self.done:
+                self.done.remove(self.done_below)
+                self.done_below += 1
+            self._unsaved += 1
+            if self._unsaved >= self.save_every:
+                self._save()
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        self._unsaved = 0
+        if not self.path:
+            return
+        temporary = '%s.tmp' % self.path
+        with open(temporary, 'w') as state:
+            json.dump({'done_below': self.done_below, 'done': sorted(self.done)}, state)
+        _replace(temporary, self.path)
+
+
+def _create(domains, domain_id, record):
+    return domains.new_domain_record(
+        domain_id, record['type'], record['data'], name=record.get('name'),
+        priority=record.get('priority'), port=record.get('port'), weight=record.get('weight'),
+        ttl=record.get('ttl'), flags=record.get('flags'), tag=record.get('tag'))
+
+
+def import_zone(domains, domain_id, lines, format=BIND, max_workers=DEFAULT_WORKERS,
+                checkpoint=None, queue_size=None):
+    """Create the records read from ``lines`` in ``domain_id``.
+
+    Parsing runs in the calling thread and feeds ``max_workers`` workers
+    through a queue of ``queue_size`` records (twice the workers by
+    default), so memory stays bounded whatever the size of the zone. SOA
+    and apex NS records, which DigitalOcean manages, are skipped.
+
+    Returns ``{'created', 'skipped', 'failed', 'errors'}``; ``errors`` lists
+    ``(position, record, exception)`` and the failed records are retried by
+    the next run with the same checkpoint.
+    """
+    if not isinstance(checkpoint, Checkpoint):
+        checkpoint = Checkpoint(checkpoint)
+    records = parse_zone(lines, domain_id) if format == BIND else parse_jsonl(lines)
+    work = queue.Queue(maxsize=queue_size or max_workers * 2)
+    result = {'created': 0, 'skipped': 0, 'failed': 0, 'errors': []}
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            item = work.get()
+            if item is None:
+                return
+            index, record = item
+            try:
+                _create(domains, domain_id, record)
+                checkpoint.mark(index)
+            except Exception as e:
+                # Record the failure and keep draining the queue, or the
+                # parser would block on a full queue with no worker left
+                with lock:
+                    result['failed'] += 1
+                    result['errors'].append((index, record, e))
+                continue
+            with lock:
+                result['created'] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(max_workers)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    try:
+        for index, record in enumerate(records):
+            if index in checkpoint:
+                result['skipped'] += 1
+                continue
+            if record['type'] == 'SOA' or (record['type'] == 'NS' and record['name'] == '@'):
+                checkpoint.mark(index)
+                result['skipped'] += 1
+                continue
+            work.put((index, record))
+    finally:
+        for _ in threads:
+            work.put(None)
+        for thread in threads:
+            thread.join()
+        checkpoint.save()
+    return result
@@ -29,5 +29,7 @@ setup(
                  "Programming Language :: Python :: 2.7"),
     license=read("LICENSE"),
     packages=['dopy'],
-    install_requires=["requests >= 1.0.4", "six >= 1.9.0"],
+    install_requires=["requests >= 1.0.4", "six >= 1.9.0",
+                      "futures >= 3.0; python_version < '3'"],
+    extras_require={"async": ["aiohttp >= 3.0; python_version >= '3.5'"]},
 )
@@ -1,5 +1,11 @@
+import time
 from unittest import TestCase
-from dopy.api.v2 import DoApiDomains
+
+from dopy.api.v2 import DoApiDomains, DoApiDroplets, DoManager
+from dopy.exceptions import DoError
+from dopy.retry import RetryPolicy
+from dopy.session import Session
+from dopy.testing import ApiError, FakeDoServer, FakeDoTestCase
 
 
 class DoApiV2Test(TestCase):
@@ -11,3 +17,71 @@ class DoApiV2Test(TestCase):
         self.assertEqual('/domains/', api.get_endpoint(trailing_slash=True))
         self.assertEqual('/domains/one/two/three', api.get_endpoint(['one', 'two', 'three']))
         self.assertEqual('/domains/one/', api.get_endpoint(['one'], trailing_slash=True))
+
+
+class DoManagerServerTest(FakeDoTestCase):
+
+    server_options = {'droplets': 45, 'domains': 1, 'records': 30, 'images': 3}
+
+    def create_session(self):
+        return Session(retry=RetryPolicy(backoff=0))
+
+    def setUp(self):
+        super(DoManagerServerTest, self).setUp()
+        self.do = self.api(DoManager)
+        self.droplets = self.api(DoApiDroplets)
+
+    def test_list_and_show(self):
+        """test_api_v2.DoManagerServerTest.test_list_and_show"""
+        droplets = self.do.retro_execution('all_active_droplets')
+        self.assertEqual(45, len(droplets))
+        self.assertEqual('192.0.0.1', droplets[0]['ip_address'])
+        self.assertEqual('droplet-3', self.droplets.show_droplet(4)['name'])
+        self.assertEqual(30, len(DoApiDomains(self.session, api_endpoint=self.server.url)
+                                 .all_domain_records('example0.com')))
+        self.assertEqual(5, len(self.do.sizes()))
+
+    def test_not_found(self):
+        """test_api_v2.DoManagerServerTest.test_not_found"""
+        with self.assertRaises(DoError):
+            self.droplets.show_droplet(1000)
+
+    def test_retry(self):
+        """test_api_v2.DoManagerServerTest.test_retry"""
+        self.server.fail_next(2, status=502)
+        self.assertEqual(8, len(self.do.all_regions()))
+        self.assertEqual(3, self.server.requests)
+
+    def test_rate_limit_window(self):
+        """test_api_v2.DoManagerServerTest.test_rate_limit_window"""
+        with FakeDoServer(rate_limit=2, rate_period=0.2) as server:
+            for _ in range(2):
+                server.handle('GET', '/regions', {}, None)
+            with self.assertRaises(ApiError) as raised:
+                server.handle('GET', '/regions', {}, None)
+            self.assertEqual(429, raised.exception.status)
+            time.sleep(0.25)
+            self.assertEqual(200, server.handle('GET', '/regions', {}, None)[0])
+            self.assertEqual('1', server.rate_headers()['RateLimit-Remaining'])
+
+    def test_bulk_action_and_wait(self):
+        """test_api_v2.DoManagerServerTest.test_bulk_action_and_wait"""
+        result = self.droplets.bulk_action('power_off', tag_name='tag-1')
+        self.assertEqual(11, len(result))
+        result = self.droplets.bulk_action('rename', droplet_ids=[1, 2, 999],
+                                           params={'name': 'renamed'})
+        self.assertIsInstance(result[999]['error'], DoError)
+        actions = [r['action'] for r in result.values() if r['action']]
+        done = self.do.wait_for_actions(actions, timeout=5)
+        self.assertEqual(['completed', 'completed'], [a['status'] for a in done.values()])
+        self.assertEqual('renamed', self.droplets.show_droplet(2)['name'])
+
+    def test_typed(self):
+        """test_api_v2.DoManagerServerTest.test_typed"""
+        droplets = self.droplets.list(typed=True, fields=('id', 'name', 'ip_address'))
+        self.assertEqual(45, len(droplets))
+        self.assertEqual('192.0.0.1', droplets[0]['ip_address'])
+        self.assertEqual(['droplet-0'], [d.name for d in self.droplets.iter_droplets(typed=True)][:1])
+        domains = DoApiDomains(self.session, api_endpoint=self.server.url)
+        records = list(domains.iter_domain_records('example0.com', typed=True))
+        self.assertEqual('host-0', records[0]['name'])
@@ -0,0 +1,130 @@
+import asyncio
+from unittest import TestCase
+
+import mock
+from aiohttp import web
+
+from dopy.api.v2_async import AsyncDoManager, AsyncSession, AsyncSingleFlight
+from dopy.exceptions import DoError
+
+DROPLETS = [
+    {'id': i, 'name': 'web-%s' % i,
+     'networks': {'v4': [{'type': 'public', 'ip_address': '10.0.0.%s' % i}]}}
+    for i in range(45)
+]
+
+
+async def list_droplets(request):
+    per_page = int(request.query.get('per_page', 20))
+    page = int(request.query.get('page', 1))
+    start = (page - 1) * per_page
+    return web.json_response({
+        'droplets': DROPLETS[start:start + per_page],
+        'links': {},
+        'meta': {'total': len(DROPLETS)},
+    })
+
+
+async def show_droplet(request):
+    droplet_id = int(request.match_info['id'])
+    if droplet_id >= len(DROPLETS):
+        return web.json_response({'id': 'not_found', 'message': 'The resource was not found.'},
+                                 status=404)
+    return web.json_response({'droplet': DROPLETS[droplet_id]})
+
+
+async def droplet_action(request):
+    body = await request.json()
+    return web.json_response({'action': {'id': 1, 'type': body['type'], 'status': 'in-progress'}},
+                             status=201)
+
+
+async def destroy_droplet(request):
+    return web.Response(status=204)
+
+
+class AsyncDoManagerTest(TestCase):
+
+    def run_async(self, test):
+        async def runner():
+            app = web.Application()
+            app.router.add_get('/v2/droplets/', list_droplets)
+            app.router.add_get('/v2/droplets/{id}', show_droplet)
+            app.router.add_post('/v2/droplets/{id}/actions', droplet_action)
+            app.router.add_delete('/v2/droplets/{id}', destroy_droplet)
+            app_runner = web.AppRunner(app)
+            await app_runner.setup()
+            site = web.TCPSite(app_runner, '127.0.0.1', 0)
+            await site.start()
+            port = site._server.sockets[0].getsockname()[1]
+            try:
+                with mock.patch('dopy.api.v2.API_ENDPOINT', 'http://127.0.0.1:%s' % port):
+                    async with AsyncDoManager(AsyncSession(pool_size=4), max_concurrency=2,
+                                              coalesce=True) as do:
+                        return await test(do)
+            finally:
+                await app_runner.cleanup()
+        return asyncio.run(runner())
+
+    def test_all_active_droplets(self):
+        """test_api_v2_async.AsyncDoManagerTest.test_all_active_droplets"""
+        droplets = self.run_async(lambda do: do.all_active_droplets())
+        self.assertEqual(list(range(45)), [d['id'] for d in droplets])
+        self.assertEqual('10.0.0.3', droplets[3]['ip_address'])
+
+    def test_iter_droplets(self):
+        """test_api_v2_async.AsyncDoManagerTest.test_iter_droplets"""
+        async def test(do):
+            return [d['id'] async for d in do.iter_droplets(per_page=10)]
+        self.assertEqual(list(range(45)), self.run_async(test))
+
+    def test_actions(self):
+        """test_api_v2_async.AsyncDoManagerTest.test_actions"""
+        async def test(do):
+            return await asyncio.gather(do.reboot_droplet(1), do.destroy_droplet(1))
+        action, destroyed = self.run_async(test)
+        self.assertEqual('reboot', action['action']['type'])
+        self.assertEqual({}, destroyed)
+
+    def test_not_found(self):
+        """test_api_v2_async.AsyncDoManagerTest.test_not_found"""
+        with self.assertRaises(DoError):
+            self.run_async(lambda do: do.show_droplet(100))
+
+    def test_coalesce(self):
+        """test_api_v2_async.AsyncDoManagerTest.test_coalesce"""
+        async def test(do):
+            droplets = await asyncio.gather(*[do.show_droplet(3) for _ in range(10)])
+            return droplets, do.flights.stats()
+        droplets, stats = self.run_async(test)
+        self.assertEqual([3] * 10, [d['id'] for d in droplets])
+        self.assertEqual(1, stats['requests'])
+        self.assertEqual(9, stats['coalesced'])
+        droplets[0]['name'] = 'changed'
+        self.assertEqual('web-3', droplets[1]['name'])
+
+
+class AsyncSingleFlightTest(TestCase):
+
+    def test_leader_cancelled(self):
+        """test_api_v2_async.AsyncSingleFlightTest.test_leader_cancelled"""
+        flights = AsyncSingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {'id': len(calls)}
+
+        async def test():
+            leader = asyncio.ensure_future(flights.do('key', fetch))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(flights.do('key', fetch))
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await leader
+            return await follower
+
+        self.assertEqual({'id': 2}, asyncio.run(test()))
+        self.assertEqual({'requests': 2, 'coalesced': 0, 'in_flight': 0}, flights.stats())
@@ -1,5 +1,9 @@
 from unittest import TestCase
-from dopy.api.v2 import DoApiDroplets
+
+import mock
+
+from dopy.api.v2 import DoApiDroplets, droplet_params
+from dopy.exceptions import DoError
 
 
 class DoApiDropletsTest(TestCase):
@@ -11,3 +15,49 @@ class DoApiDropletsTest(TestCase):
         self.assertEqual('/droplets/', api.get_endpoint(trailing_slash=True))
         self.assertEqual('/droplets/one/two/three', api.get_endpoint(['one', 'two', 'three']))
         self.assertEqual('/droplets/one/', api.get_endpoint(['one'], trailing_slash=True))
+
+    def test_droplet_params(self):
+        """test_api_v2_droplets.DoApiDropletsTest.test_droplet_params"""
+        for keys in ('12', 12, ['12'], ('12',)):
+            self.assertEqual(['12'], droplet_params('512mb', 'lamp', 'ams2', keys)['ssh_keys'])
+        params = droplet_params('512mb', 'lamp', 'ams2', ipv6=True)
+        self.assertEqual(('true', 'false'), (params['ipv6'], params['backups']))
+        self.assertNotIn('ssh_keys', params)
+
+    def test_bulk_action_ids(self):
+        """test_api_v2_droplets.DoApiDropletsTest.test_bulk_action_ids"""
+        def request(path, params={}, method='GET', priority=None):
+            droplet_id = int(path.split('/')[2])
+            if droplet_id == 3:
+                raise DoError('Droplet already has a pending event.')
+            return {'action': {'id': droplet_id * 10, 'type': params['type']}}
+
+        api = DoApiDroplets()
+        with mock.patch.object(api, 'request', side_effect=request):
+            result = api.bulk_action('reboot', droplet_ids=[1, 2, 3, 4])
+        self.assertEqual([1, 2, 3, 4], sorted(result))
+        self.assertEqual(20, result[2]['action']['id'])
+        self.assertIsNone(result[2]['error'])
+        self.assertIsInstance(result[3]['error'], DoError)
+
+    def test_bulk_action_tag(self):
+        """test_api_v2_droplets.DoApiDropletsTest.test_bulk_action_tag"""
+        api = DoApiDroplets()
+        actions = {'actions': [{'id': 7, 'resource_id': 1}, {'id': 8, 'resource_id': 2}]}
+        with mock.patch.object(api, 'request', return_value=actions) as request:
+            result = api.bulk_action('power_off', tag_name='web')
+        request.assert_called_once_with('/droplets/actions?tag_name=web',
+                                        params={'type': 'power_off'}, method='POST')
+        self.assertEqual(8, result[2]['action']['id'])
+
+    def test_bulk_action_tag_fan_out(self):
+        """test_api_v2_droplets.DoApiDropletsTest.test_bulk_action_tag_fan_out"""
+        def request(path, params={}, method='GET', priority=None):
+            if method == 'GET':
+                return {'droplets': [{'id': 5}, {'id': 6}], 'links': {}}
+            return {'action': {'id': 1, 'type': params['type']}}
+
+        api = DoApiDroplets()
+        with mock.patch.object(api, 'request', side_effect=request):
+            result = api.bulk_action('reboot', tag_name='web')
+        self.assertEqual([5, 6], sorted(result))
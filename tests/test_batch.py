@@ -0,0 +1,74 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+import six
+
+from dopy.api.v2 import DoManager
+from dopy.batch import Daemon, Dispatcher, call, run_batch, send
+from dopy.exceptions import DoError
+from dopy.testing import FakeDoTestCase
+
+
+class BatchTest(FakeDoTestCase):
+
+    server_options = {'droplets': 5}
+
+    def setUp(self):
+        super(BatchTest, self).setUp()
+        self.dispatcher = Dispatcher(self.api(DoManager))
+
+    def test_run_batch(self):
+        """test_batch.BatchTest.test_run_batch"""
+        ids = sorted(self.server.droplets)
+        lines = [json.dumps({'id': 'd%s' % i, 'method': 'show_droplet', 'args': [i]})
+                 for i in ids]
+        lines += ['', json.dumps({'id': 'all', 'method': 'all_active_droplets'}),
+                  json.dumps({'id': 'bad', 'method': 'no_such_method'}), 'not json']
+        out = six.StringIO()
+        failed = run_batch(lines, out, self.dispatcher, workers=4)
+        answers = [json.loads(line) for line in out.getvalue().splitlines()]
+        by_id = dict((answer['id'], answer) for answer in answers if answer['id'])
+        self.assertEqual(2, failed)
+        self.assertEqual(len(ids) + 3, len(answers))
+        self.assertEqual(ids[0], by_id['d%s' % ids[0]]['result']['id'])
+        self.assertEqual(5, len(by_id['all']['result']))
+        self.assertEqual('DoError', by_id['bad']['error']['type'])
+        self.assertEqual(len(lines), [a for a in answers if a['id'] is None][0]['line'])
+
+    def test_read_ahead(self):
+        """test_batch.BatchTest.test_read_ahead"""
+        out = six.StringIO()
+        ahead = []
+
+        def lines():
+            for number in range(50):
+                ahead.append(number - len(out.getvalue().splitlines()))
+                yield json.dumps({'id': number, 'method': 'sizes'})
+
+        self.assertEqual(0, run_batch(lines(), out, self.dispatcher, workers=2))
+        self.assertEqual(50, len(out.getvalue().splitlines()))
+        self.assertTrue(max(ahead) <= 4)
+
+    def test_daemon(self):
+        """test_batch.BatchTest.test_daemon"""
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'dopy.sock')
+        try:
+            with Daemon(path, self.dispatcher) as daemon:
+                self.assertEqual(0o600, os.stat(path).st_mode & 0o777)
+                thread = threading.Thread(target=daemon.serve_forever)
+                thread.start()
+                try:
+                    droplet_id = min(self.server.droplets)
+                    self.assertEqual(droplet_id, call(path, 'show_droplet', droplet_id)['id'])
+                    answers = list(send(path, [{'id': n, 'method': 'sizes'} for n in range(3)]))
+                    self.assertEqual([0, 1, 2], sorted(answer['id'] for answer in answers))
+                    self.assertRaises(DoError, call, path, 'no_such_method')
+                finally:
+                    daemon.stop()
+                    thread.join()
+        finally:
+            shutil.rmtree(directory)
@@ -0,0 +1,68 @@
+from unittest import TestCase
+
+import mock
+
+from dopy.api.v2 import ApiRequest, DoManager
+from dopy.cache import ResponseCache
+
+
+class ResponseCacheTest(TestCase):
+
+    def setUp(self):
+        self.now = [1000.0]
+        self.cache = ResponseCache(maxsize=2, ttl=0, ttls={'/sizes': 60, '/account/keys': 60})
+        self.cache.clock = lambda: self.now[0]
+
+    def test_ttl(self):
+        """test_cache.ResponseCacheTest.test_ttl"""
+        self.cache.set('/sizes/', {}, {'sizes': [1]})
+        self.cache.set('/droplets/1', {}, {'droplet': {}})
+        self.assertEqual({'sizes': [1]}, self.cache.get('/sizes/', {}))
+        self.assertIsNone(self.cache.get('/droplets/1', {}))
+        self.now[0] += 61
+        self.assertIsNone(self.cache.get('/sizes/', {}))
+        self.assertEqual({'hits': 1, 'misses': 2, 'evictions': 0, 'size': 0}, self.cache.stats())
+
+    def test_lru_eviction(self):
+        """test_cache.ResponseCacheTest.test_lru_eviction"""
+        self.cache.set('/sizes/', {'page': 1}, 1)
+        self.cache.set('/sizes/', {'page': 2}, 2)
+        self.cache.get('/sizes/', {'page': 1})
+        self.cache.set('/sizes/', {'page': 3}, 3)
+        self.assertEqual(1, self.cache.get('/sizes/', {'page': 1}))
+        self.assertIsNone(self.cache.get('/sizes/', {'page': 2}))
+        self.assertEqual(1, self.cache.stats()['evictions'])
+
+    def test_invalidate(self):
+        """test_cache.ResponseCacheTest.test_invalidate"""
+        self.cache.set('/account/keys', {}, 'list')
+        self.cache.set('/account/keys/5/', {}, 'key')
+        self.assertEqual(2, self.cache.invalidate('/account/keys/5'))
+        self.assertEqual(0, len(self.cache))
+
+
+class DoManagerCacheTest(TestCase):
+
+    def test_request(self):
+        """test_cache.DoManagerCacheTest.test_request"""
+        do = DoManager(cache=ResponseCache())
+        keys = {'ssh_keys': [{'id': 5}]}
+        with mock.patch.object(ApiRequest, 'run', return_value=keys) as run:
+            do.all_ssh_keys()
+            do.all_ssh_keys()[0]['id'] = 6
+            self.assertEqual(5, do.all_ssh_keys()[0]['id'])
+            self.assertEqual(1, run.call_count)
+            do.destroy_ssh_key(5)
+            do.all_ssh_keys()
+            self.assertEqual(3, run.call_count)
+        self.assertEqual(2, do.cache.stats()['hits'])
+
+    def test_uncacheable(self):
+        """test_cache.DoManagerCacheTest.test_uncacheable"""
+        do = DoManager(cache=ResponseCache())
+        with mock.patch.object(ApiRequest, 'run', return_value={'droplets': []}) as run:
+            do.request('/droplets/')
+            do.request('/droplets/')
+            self.assertEqual(2, run.call_count)
+        self.assertEqual({'hits': 0, 'misses': 0, 'evictions': 0, 'size': 0},
+                         do.cache.stats())
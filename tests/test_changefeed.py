@@ -0,0 +1,67 @@
+import json
+from unittest import TestCase
+
+from dopy.changefeed import ChangeFeed, domain_record_feed, droplet_feed
+from dopy.api.v2 import DoApiDomains, DoApiDroplets
+from dopy.exceptions import DoError
+from dopy.session import Session
+from dopy.testing import FakeDoServer
+
+
+class ChangeFeedTest(TestCase):
+
+    def setUp(self):
+        self.items = [{'id': 1, 'name': 'a', 'size': '1gb'}, {'id': 2, 'name': 'b', 'size': '1gb'}]
+        self.feed = ChangeFeed(lambda: [dict(item) for item in self.items], history=4)
+
+    def test_events(self):
+        """test_changefeed.ChangeFeedTest.test_events"""
+        self.assertEqual(['added', 'added'], [e['type'] for e in self.feed.poll()])
+        self.assertEqual([], self.feed.poll())
+        self.items[0]['size'] = '2gb'
+        del self.items[1]
+        self.items.append({'id': 3, 'name': 'c'})
+        events = self.feed.poll()
+        self.assertEqual([('modified', 1), ('added', 3), ('removed', 2)],
+                         [(e['type'], e['key']) for e in events])
+        self.assertEqual({'size': ['1gb', '2gb']}, events[0]['changes'])
+
+    def test_cursor(self):
+        """test_changefeed.ChangeFeedTest.test_cursor"""
+        self.feed.poll()
+        events, cursor = self.feed.changes()
+        self.assertEqual(2, len(events))
+        self.items[1]['name'] = 'bb'
+        self.feed.poll()
+        events, cursor = self.feed.changes(cursor)
+        self.assertEqual([3], [e['seq'] for e in events])
+        self.assertEqual(([], 3), self.feed.changes(cursor))
+        for name in ('x', 'y', 'z'):
+            self.items[0]['name'] = name
+            self.feed.poll()
+        self.assertRaises(DoError, self.feed.changes, 0)
+
+    def test_dump_load(self):
+        """test_changefeed.ChangeFeedTest.test_dump_load"""
+        self.feed.poll()
+        state = json.loads(json.dumps(self.feed.dump()))
+        feed = ChangeFeed(self.feed.fetch).load(state)
+        self.items[0]['name'] = 'renamed'
+        self.assertEqual([('modified', 1)], [(e['type'], e['key']) for e in feed.poll()])
+        self.assertEqual(3, feed.changes(2)[1])
+
+
+class ApiFeedTest(TestCase):
+
+    def test_droplets_and_records(self):
+        """test_changefeed.ApiFeedTest.test_droplets_and_records"""
+        with FakeDoServer(droplets=5, domains=1, records=4) as server:
+            with Session() as session:
+                droplets = droplet_feed(DoApiDroplets(session, api_endpoint=server.url))
+                records = domain_record_feed(DoApiDomains(session, api_endpoint=server.url),
+                                             'example0.com')
+                self.assertEqual(5, len(droplets.poll()))
+                self.assertEqual(4, len(records.poll()))
+                server.droplets[2]['status'] = 'off'
+                events = droplets.poll()
+                self.assertEqual({'status': ['active', 'off']}, events[0]['changes'])
@@ -0,0 +1,82 @@
+from unittest import TestCase
+
+from dopy.cache import ResponseCache
+from dopy.client import DoClient, fan_out
+from dopy.exceptions import DoError
+from dopy.testing import FakeDoServer
+
+
+class DoClientTest(TestCase):
+
+    def setUp(self):
+        self.servers = [FakeDoServer(droplets=count, token='token-%s' % count).start()
+                        for count in (2, 3)]
+        self.clients = [DoClient('token-%s' % count, name='team-%s' % count,
+                                 api_endpoint=server.url)
+                        for count, server in zip((2, 3), self.servers)]
+
+    def tearDown(self):
+        for client in self.clients:
+            client.close()
+        for server in self.servers:
+            server.stop()
+
+    def test_token(self):
+        """test_client.DoClientTest.test_token"""
+        self.assertEqual(2, len(self.clients[0].all_active_droplets()))
+        self.assertIsNot(self.clients[0].limiter, self.clients[1].limiter)
+        other = DoClient('wrong', api_endpoint=self.servers[0].url)
+        try:
+            self.assertRaises(DoError, other.all_active_droplets)
+        finally:
+            other.close()
+
+    def test_cache(self):
+        """test_client.DoClientTest.test_cache"""
+        with DoClient('token-2', cache=ResponseCache(), api_endpoint=self.servers[0].url) as do:
+            do.sizes()
+            requests = self.servers[0].requests
+            do.sizes()
+            self.assertEqual(requests, self.servers[0].requests)
+            self.assertEqual(1, do.cache.stats()['hits'])
+
+    def test_fan_out(self):
+        """test_client.DoClientTest.test_fan_out"""
+        broken = DoClient('wrong', name='broken', api_endpoint=self.servers[0].url)
+        try:
+            droplets, errors = fan_out(self.clients + [broken], 'all_active_droplets')
+        finally:
+            broken.close()
+        self.assertEqual(5, len(droplets))
+        self.assertEqual(['team-2'] * 2 + ['team-3'] * 3, [d['account'] for d in droplets])
+        self.assertEqual(['broken'], list(errors))
+
+        droplets, errors = fan_out(self.clients, lambda client: client.droplets.list(typed=True))
+        self.assertEqual(5, len(droplets))
+        self.assertEqual('team-3', droplets[-1]['account'])
+
+    def test_fan_out_unnamed(self):
+        """test_client.DoClientTest.test_fan_out_unnamed"""
+        clients = [DoClient('token-2', api_endpoint=self.servers[0].url),
+                   DoClient('wrong', api_endpoint=self.servers[0].url),
+                   DoClient('wrong', api_endpoint=self.servers[1].url)]
+        try:
+            droplets, errors = fan_out(clients, 'all_active_droplets')
+        finally:
+            for client in clients:
+                client.close()
+        self.assertEqual([0, 0], [d['account'] for d in droplets])
+        self.assertEqual([1, 2], sorted(errors))
+
+    def test_own_cache(self):
+        """test_client.DoClientTest.test_own_cache"""
+        first, second = self.clients
+        self.assertIsNot(first.cache, second.cache)
+        first.sizes()
+        self.assertEqual(1, len(first.cache))
+        self.assertEqual(0, len(second.cache))
+        requests = self.servers[1].requests
+        second.sizes()
+        self.assertEqual(requests + 1, self.servers[1].requests)
+        with DoClient('token-2', cache=False, api_endpoint=self.servers[0].url) as do:
+            self.assertIsNone(do.cache)
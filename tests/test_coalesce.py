@@ -0,0 +1,66 @@
+import threading
+import time
+from unittest import TestCase
+
+from dopy.api.v2 import DoApiDroplets
+from dopy.coalesce import SingleFlight
+from dopy.session import Session
+from dopy.testing import FakeDoServer
+
+
+class SingleFlightTest(TestCase):
+
+    def run_threads(self, count, target):
+        threads = [threading.Thread(target=target) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_do(self):
+        """test_coalesce.SingleFlightTest.test_do"""
+        flights = SingleFlight()
+        calls = []
+        results = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.1)
+            return {'sizes': ['1gb']}
+        self.run_threads(10, lambda: results.append(flights.do('sizes', fetch)))
+        self.assertEqual(1, len(calls))
+        self.assertEqual([{'sizes': ['1gb']}] * 10, results)
+        self.assertEqual(10, len(set(id(result) for result in results)))
+        self.assertEqual({'requests': 1, 'coalesced': 9, 'in_flight': 0}, flights.stats())
+        flights.do('sizes', fetch)
+        self.assertEqual(2, len(calls))
+
+    def test_error(self):
+        """test_coalesce.SingleFlightTest.test_error"""
+        flights = SingleFlight()
+        errors = []
+
+        def fetch():
+            time.sleep(0.1)
+            raise RuntimeError('down')
+
+        def call():
+            try:
+                flights.do('sizes', fetch)
+            except RuntimeError as e:
+                errors.append(e)
+        self.run_threads(5, call)
+        self.assertEqual(5, len(errors))
+        self.assertEqual(1, flights.stats()['requests'])
+
+    def test_request(self):
+        """test_coalesce.SingleFlightTest.test_request"""
+        with FakeDoServer(droplets=3, latency=0.1) as server:
+            with Session(pool_size=20) as session:
+                self.assertIsNone(DoApiDroplets(session, api_endpoint=server.url).flights)
+                droplets = DoApiDroplets(session, api_endpoint=server.url, flights=SingleFlight())
+                droplet_id = min(server.droplets)
+                self.run_threads(20, lambda: droplets.show_droplet(droplet_id))
+                self.assertTrue(server.requests < 5)
+                self.assertEqual(20, droplets.flights.stats()['requests'] +
+                                 droplets.flights.stats()['coalesced'])
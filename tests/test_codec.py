@@ -0,0 +1,100 @@
+#coding: utf-8
+import json
+from unittest import TestCase
+
+from dopy import codec
+from dopy.api.v2 import DoApiDroplets, DoManager
+from dopy.codec import ItemStream
+from dopy.exceptions import DoError
+from dopy.instrument import add_hooks, remove_hooks
+from dopy.testing import FakeDoTestCase
+
+
+def chunked(body, size):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+class ItemStreamTest(TestCase):
+
+    body = json.dumps({
+        'droplets': [{'id': i, 'name': u'web-%s "]}é' % i, 'tags': ['a', 'b']}
+                     for i in range(30)],
+        'links': {'pages': {}},
+        'meta': {'total': 30},
+    }).encode('utf-8')
+
+    def test_chunks(self):
+        """test_codec.ItemStreamTest.test_chunks"""
+        for size in (1, 5, 64, len(self.body)):
+            items = ItemStream(chunked(self.body, size), 'droplets')
+            self.assertEqual(list(range(30)), [item['id'] for item in items])
+            self.assertEqual({'droplets': [], 'links': {'pages': {}}, 'meta': {'total': 30}},
+                             items.envelope)
+            self.assertEqual(len(self.body), items.bytes)
+
+    def test_incremental(self):
+        """test_codec.ItemStreamTest.test_incremental"""
+        read = []
+
+        def chunks():
+            for chunk in chunked(self.body, 64):
+                read.append(chunk)
+                yield chunk
+        first = next(iter(ItemStream(chunks(), 'droplets')))
+        self.assertEqual(0, first['id'])
+        self.assertTrue(sum(len(chunk) for chunk in read) < len(self.body) / 4)
+
+    def test_other_layouts(self):
+        """test_codec.ItemStreamTest.test_other_layouts"""
+        items = ItemStream([b'{"meta": {"total": 1}, "droplets": [{"id": 1}]}'], 'droplets')
+        self.assertEqual([{'id': 1}], list(items))
+        self.assertEqual({'meta': {'total': 1}, 'droplets': []}, items.envelope)
+        self.assertRaises(ValueError, list, ItemStream([b'{"droplets": [{"id": 1}'], 'droplets'))
+
+    def test_backend(self):
+        """test_codec.ItemStreamTest.test_backend"""
+        backend = codec.backend
+        try:
+            self.assertEqual('json', codec.use('json'))
+            self.assertEqual({'a': [1]}, codec.loads(b'{"a": [1]}'))
+        finally:
+            codec.use(backend)
+
+
+class DecodeTest(FakeDoTestCase):
+
+    server_options = {'droplets': 25, 'page_size': 10}
+
+    def setUp(self):
+        super(DecodeTest, self).setUp()
+        self.droplets = self.api(DoApiDroplets)
+
+    def test_decode_once(self):
+        """test_codec.DecodeTest.test_decode_once"""
+        decoded = []
+        loads = codec.loads
+        codec.loads = lambda content: decoded.append(1) or loads(content)
+        try:
+            self.droplets.show_droplet(min(self.server.droplets))
+        finally:
+            codec.loads = loads
+        self.assertEqual(1, len(decoded))
+
+    def test_errors(self):
+        """test_codec.DecodeTest.test_errors"""
+        self.assertRaises(DoError, self.droplets.show_droplet, 999999)
+        self.assertTrue(DoManager(self.session, api_endpoint=self.server.url)
+                        .request('/droplets/%s' % min(self.server.droplets), method='DELETE'))
+
+    def test_stream(self):
+        """test_codec.DecodeTest.test_stream"""
+        events = []
+        add_hooks(after=events.append)
+        try:
+            droplets = list(self.droplets.iter_droplets(per_page=10, stream=True))
+        finally:
+            remove_hooks(after=events.append)
+        self.assertEqual(sorted(self.server.droplets), [d['id'] for d in droplets])
+        self.assertTrue(droplets[0]['ip_address'])
+        self.assertEqual(3, len(events))
+        self.assertTrue(all(event['bytes'] > 0 for event in events))
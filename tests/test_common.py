@@ -0,0 +1,86 @@
+import threading
+import time
+from unittest import TestCase
+
+from dopy import common as c
+
+URL = 'https://api.digitalocean.com/v2/droplets/'
+
+
+def _fake_listing(total, per_page=20, delay=0, use_meta=False):
+    calls = []
+    lock = threading.Lock()
+    state = {'active': 0, 'peak': 0}
+
+    def fetch(url, params):
+        with lock:
+            calls.append(dict(params))
+            state['active'] += 1
+            state['peak'] = max(state['peak'], state['active'])
+        time.sleep(delay)
+        size = params.get('per_page', per_page)
+        page = params.get('page', 1)
+        last = (total + size - 1) // size
+        result = {
+            'droplets': [{'id': i} for i in range((page - 1) * size, min(page * size, total))],
+            'links': {},
+            'meta': {'total': total},
+        }
+        if not use_meta and page < last:
+            result['links']['pages'] = {'last': '%s?page=%s&per_page=%s' % (url, last, size)}
+        with lock:
+            state['active'] -= 1
+        return result
+    return fetch, calls, state
+
+
+class PaginatedTest(TestCase):
+
+    def test_pages_in_order(self):
+        """test_common.PaginatedTest.test_pages_in_order"""
+        fetch, calls, state = _fake_listing(95, delay=0.01)
+        result = c.paginated(fetch)(URL, max_workers=2)
+        self.assertEqual(list(range(95)), [d['id'] for d in result['droplets']])
+        self.assertEqual(5, len(calls))
+        self.assertTrue(state['peak'] <= 2)
+
+    def test_meta_total(self):
+        """test_common.PaginatedTest.test_meta_total"""
+        fetch, calls, _ = _fake_listing(45, use_meta=True)
+        result = c.paginated(fetch)(URL)
+        self.assertEqual(45, len(result['droplets']))
+        self.assertEqual(3, len(calls))
+
+    def test_per_page(self):
+        """test_common.PaginatedTest.test_per_page"""
+        fetch, calls, _ = _fake_listing(450)
+        result = c.paginated(fetch)(URL, {'tag_name': 'web'}, per_page=500)
+        self.assertEqual(450, len(result['droplets']))
+        self.assertEqual([200, 200, 200], [p['per_page'] for p in calls])
+        self.assertEqual('web', calls[-1]['tag_name'])
+
+    def test_single_page(self):
+        """test_common.PaginatedTest.test_single_page"""
+        fetch, calls, _ = _fake_listing(3)
+        self.assertEqual(3, len(c.paginated(fetch)(URL)['droplets']))
+        self.assertEqual(1, len(calls))
+
+
+class IterPagesTest(TestCase):
+
+    def test_iter_items(self):
+        """test_common.IterPagesTest.test_iter_items"""
+        fetch, calls, _ = _fake_listing(95)
+        items = c.iter_items(fetch, URL, 'droplets')
+        self.assertEqual({'id': 0}, next(items))
+        self.assertTrue(len(calls) <= 2)
+        self.assertEqual(list(range(1, 95)), [d['id'] for d in items])
+        self.assertEqual([1, 2, 3, 4, 5], [p.get('page', 1) for p in calls])
+
+    def test_stop_early(self):
+        """test_common.IterPagesTest.test_stop_early"""
+        fetch, calls, _ = _fake_listing(200, per_page=10)
+        pages = c.iter_pages(fetch, URL, per_page=10)
+        next(pages)
+        pages.close()
+        self.assertTrue(len(calls) <= 2)
@@ -0,0 +1,75 @@
+from unittest import TestCase
+
+from dopy.api.v2 import DoManager
+from dopy.instrument import Hooks, LatencyHistogram, add_hooks, endpoint_template, remove_hooks
+from dopy.retry import RetryPolicy
+from dopy.session import Session
+from dopy.testing import FakeDoTestCase
+
+
+class EndpointTemplateTest(TestCase):
+
+    def test_endpoint_template(self):
+        """test_instrument.EndpointTemplateTest.test_endpoint_template"""
+        self.assertEqual('/droplets/{id}/actions', endpoint_template('/droplets/123/actions'))
+        self.assertEqual('/droplets/actions', endpoint_template('/droplets/actions?tag_name=web'))
+        self.assertEqual('/domains/{name}/records/{id}',
+                         endpoint_template('domains/example.com/records/7'))
+        self.assertEqual('/images/{id}', endpoint_template('/images/ubuntu-20-04-x64'))
+        self.assertEqual('/droplets', endpoint_template('/droplets/'))
+
+
+class HooksTest(FakeDoTestCase):
+
+    server_options = {'droplets': 3}
+
+    def create_session(self):
+        return Session(retry=RetryPolicy(backoff=0))
+
+    def setUp(self):
+        super(HooksTest, self).setUp()
+        self.do = self.api(DoManager)
+        self.events = []
+        self.histogram = LatencyHistogram().install()
+        add_hooks(before=self.events.append, after=self.events.append,
+                  error=self.events.append)
+
+    def tearDown(self):
+        remove_hooks(before=self.events.append, after=self.events.append,
+                     error=self.events.append)
+        self.histogram.uninstall()
+
+    def test_events(self):
+        """test_instrument.HooksTest.test_events"""
+        droplet_id = min(self.server.droplets)
+        self.server.fail_next(1, status=503)
+        self.do.retro_execution('show_droplet', droplet_id)
+        self.assertRaises(Exception, self.do.retro_execution, 'show_droplet', 999999)
+
+        after = self.events[1]
+        self.assertIs(self.events[0], after)
+        self.assertEqual('GET', after['method'])
+        self.assertEqual('/droplets/{id}', after['endpoint'])
+        self.assertEqual(200, after['status'])
+        self.assertEqual(1, after['retries'])
+        self.assertTrue(after['bytes'] > 0)
+        self.assertTrue(after['duration'] >= 0)
+        self.assertEqual(404, self.events[3]['status'])
+        self.assertIn('error', self.events[3])
+
+    def test_histogram(self):
+        """test_instrument.HooksTest.test_histogram"""
+        for droplet_id in sorted(self.server.droplets):
+            self.do.retro_execution('show_droplet', droplet_id)
+        series = self.histogram.dump()
+        self.assertEqual(1, len(series))
+        self.assertEqual(3, series[0]['count'])
+        self.assertEqual(3, series[0]['buckets'][-1][1])
+        text = self.histogram.prometheus()
+        self.assertIn('dopy_request_duration_seconds_count{method="GET",'
+                      'endpoint="/droplets/{id}",status="200"} 3', text)
+        self.assertIn('le="+Inf"} 3', text)
+
+    def test_no_hooks(self):
+        """test_instrument.HooksTest.test_no_hooks"""
+        self.assertFalse(Hooks())
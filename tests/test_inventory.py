@@ -0,0 +1,79 @@
+import time
+
+from dopy.api.v2 import DoApiDroplets
+from dopy.inventory import Inventory
+from dopy.testing import FakeDoTestCase
+
+
+class InventoryTest(FakeDoTestCase):
+
+    server_options = {'droplets': 30}
+
+    def setUp(self):
+        super(InventoryTest, self).setUp()
+        self.droplets = self.api(DoApiDroplets)
+        self.inventory = Inventory(self.droplets)
+        self.inventory.refresh()
+
+    def tearDown(self):
+        self.inventory.stop()
+
+    def test_lookups(self):
+        """test_inventory.InventoryTest.test_lookups"""
+        requests = self.server.requests
+        self.assertEqual(30, len(self.inventory))
+        self.assertEqual('droplet-4', self.inventory.get(5)['name'])
+        self.assertEqual(5, self.inventory.by_name('droplet-4')[0]['id'])
+        self.assertEqual(5, self.inventory.by_ip('192.0.0.5')['id'])
+        self.assertEqual(5, self.inventory.by_ip('10.128.0.5')['id'])
+        self.assertEqual(8, len(self.inventory.by_tag('tag-0')))
+        self.assertEqual(4, len(self.inventory.by_region('nyc1')))
+        self.assertEqual(6, len(self.inventory.by_size('512mb')))
+        self.assertIsNone(self.inventory.by_ip('203.0.113.1'))
+        self.assertEqual(requests, self.server.requests)
+
+    def test_incremental_refresh(self):
+        """test_inventory.InventoryTest.test_incremental_refresh"""
+        self.assertEqual({'added': 0, 'updated': 0, 'removed': 0}, self.inventory.refresh())
+        self.server.droplets[3]['name'] = 'changed'
+        del self.server.droplets[4]
+        self.server.add_droplet('new', status='active')
+        self.assertEqual({'added': 1, 'updated': 1, 'removed': 1}, self.inventory.refresh())
+        self.assertEqual([], self.inventory.by_name('droplet-2'))
+        self.assertEqual(3, self.inventory.by_name('changed')[0]['id'])
+
+    def test_mutations(self):
+        """test_inventory.InventoryTest.test_mutations"""
+        self.droplets.rename_droplet(7, 'renamed')
+        self.assertEqual(7, self.inventory.by_name('droplet-6')[0]['id'])
+        self.assertEqual([], self.inventory.settle())
+        self.assertEqual([], self.inventory.by_name('droplet-6'))
+        self.assertEqual(7, self.inventory.by_name('renamed')[0]['id'])
+        self.droplets.destroy_droplet(8)
+        self.assertIsNone(self.inventory.get(8))
+        self.assertIsNone(self.inventory.by_ip('192.0.0.8'))
+
+    def test_errored_action(self):
+        """test_inventory.InventoryTest.test_errored_action"""
+        action = self.droplets.power_off_droplet(9)['action']
+        self.server.actions[action['id']]['status'] = 'errored'
+        self.assertEqual([], self.inventory.settle())
+        self.assertEqual('active', self.inventory.get(9)['status'])
+
+    def test_stop(self):
+        """test_inventory.InventoryTest.test_stop"""
+        self.inventory.stop()
+        self.assertEqual([], self.droplets.listeners)
+        self.droplets.destroy_droplet(8)
+        self.assertIsNotNone(self.inventory.get(8))
+
+    def test_background(self):
+        """test_inventory.InventoryTest.test_background"""
+        inventory = Inventory(self.droplets, refresh_interval=0.05).start()
+        self.server.add_droplet('late', status='active')
+        for _ in range(100):
+            if inventory.by_name('late'):
+                break
+            time.sleep(0.02)
+        inventory.stop()
+        self.assertEqual(1, len(inventory.by_name('late')))
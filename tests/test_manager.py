@@ -0,0 +1,26 @@
+from unittest import TestCase
+
+from benchmarks.bench_startup import DISPATCH_TARGET, measure
+from dopy.api.v2 import DoApiDomains, DoApiDroplets, DoManager
+from dopy.commands import COMMANDS, DOMAINS, DROPLETS, MANAGER
+from dopy.manager import main
+
+
+class ManagerTest(TestCase):
+
+    def test_commands(self):
+        """test_manager.ManagerTest.test_commands"""
+        classes = {MANAGER: DoManager, DROPLETS: DoApiDroplets, DOMAINS: DoApiDomains}
+        for command, (target, name) in COMMANDS.items():
+            self.assertTrue(callable(getattr(classes[target], name, None)), command)
+
+    def test_unknown_command(self):
+        """test_manager.ManagerTest.test_unknown_command"""
+        self.assertEqual(2, main(['no_such_method']))
+
+    def test_startup(self):
+        """test_manager.ManagerTest.test_startup"""
+        result = measure(repeat=3)
+        self.assertFalse(result['imports_requests'])
+        self.assertFalse(result['imports_pprint'])
+        self.assertLess(result['p50_ms'], DISPATCH_TARGET * 1000)
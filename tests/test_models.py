@@ -0,0 +1,56 @@
+from unittest import TestCase
+
+from dopy.api.v2 import DoApiDroplets
+from dopy.models import Domain, DomainRecord, Droplet
+
+DROPLET = {
+    'id': 3, 'name': 'web-1', 'status': 'active', 'memory': 512,
+    'image': {'slug': 'ubuntu-14-04-x64', 'distribution': 'Ubuntu'},
+    'networks': {
+        'v4': [{'type': 'private', 'ip_address': '10.128.0.3'},
+               {'type': 'public', 'ip_address': '192.0.2.3'}],
+        'v6': [{'type': 'public', 'ip_address': '2001:db8::3'}],
+    },
+    'undocumented': {'large': 'blob'},
+}
+
+
+class DropletTest(TestCase):
+
+    def test_dict_compatible(self):
+        """test_models.DropletTest.test_dict_compatible"""
+        droplet = Droplet(DROPLET)
+        expected = dict(DROPLET)
+        del expected['undocumented']
+        DoApiDroplets().populate_droplet_ips(expected)
+        self.assertEqual('web-1', droplet['name'])
+        self.assertEqual(expected['ip_address'], droplet['ip_address'])
+        self.assertEqual(expected['private_ip_address'], droplet.private_ip_address)
+        self.assertEqual('2001:db8::3', droplet.get('ip_v6_address'))
+        self.assertNotIn('undocumented', droplet)
+        self.assertIsNone(droplet.get('kernel'))
+        self.assertRaises(KeyError, lambda: droplet['_ips'])
+
+    def test_projection(self):
+        """test_models.DropletTest.test_projection"""
+        droplet = Droplet(DROPLET, fields=('id', 'name'))
+        self.assertEqual({'id': 3, 'name': 'web-1'}, droplet)
+        self.assertRaises(KeyError, lambda: droplet['ip_address'])
+        self.assertRaises(AttributeError, lambda: droplet.image)
+
+        droplet = Droplet(DROPLET, fields=('name', 'ip_address'))
+        self.assertEqual('192.0.2.3', droplet['ip_address'])
+        self.assertIn('networks', droplet)
+
+    def test_decode_page(self):
+        """test_models.DropletTest.test_decode_page"""
+        page = Droplet.decode_page('droplets', ('id',))({'droplets': [DROPLET], 'links': {}})
+        self.assertEqual([{'id': 3}], page['droplets'])
+        self.assertFalse(hasattr(page['droplets'][0], '__dict__'))
+
+    def test_domain_models(self):
+        """test_models.DropletTest.test_domain_models"""
+        self.assertEqual('example.com', Domain({'name': 'example.com', 'ttl': 1800})['name'])
+        record = DomainRecord({'id': 1, 'type': 'A', 'name': '@', 'data': '192.0.2.1'})
+        self.assertEqual([('id', 1), ('type', 'A'), ('name', '@'), ('data', '192.0.2.1')],
+                         record.items())
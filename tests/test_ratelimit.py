@@ -0,0 +1,69 @@
+import threading
+from unittest import TestCase
+
+from dopy.ratelimit import BACKGROUND, INTERACTIVE, RateLimiter, get_limiter
+
+
+class RateLimiterTest(TestCase):
+
+    def make_limiter(self):
+        self.now = [1000.0]
+        limiter = RateLimiter(max_sleep=100)
+        limiter.clock = lambda: self.now[0]
+
+        def sleep(seconds):
+            self.now[0] += seconds
+        limiter.sleep = sleep
+        return limiter
+
+    def headers(self, remaining, reset):
+        return {'RateLimit-Limit': '100', 'RateLimit-Remaining': str(remaining),
+                'RateLimit-Reset': str(reset)}
+
+    def test_no_wait_with_budget(self):
+        """test_ratelimit.RateLimiterTest.test_no_wait_with_budget"""
+        limiter = self.make_limiter()
+        limiter.update(self.headers(90, 1060))
+        for _ in range(50):
+            limiter.acquire(BACKGROUND)
+        self.assertEqual(0, limiter.waited)
+        self.assertEqual(40, limiter.remaining)
+
+    def test_paces_low_budget(self):
+        """test_ratelimit.RateLimiterTest.test_paces_low_budget"""
+        limiter = self.make_limiter()
+        limiter.update(self.headers(10, 1100))
+        for _ in range(10):
+            limiter.acquire(INTERACTIVE)
+        # Ten requests spread over the 100 seconds left in the window
+        self.assertTrue(80 <= self.now[0] - 1000 < 100)
+        limiter.acquire(INTERACTIVE)
+        self.assertTrue(self.now[0] >= 1100)
+
+    def test_background_keeps_reserve(self):
+        """test_ratelimit.RateLimiterTest.test_background_keeps_reserve"""
+        limiter = self.make_limiter()
+        limiter.update(self.headers(5, 1030))
+        limiter.acquire(BACKGROUND)
+        self.assertTrue(self.now[0] >= 1030)
+        self.assertEqual(99, limiter.remaining)
+
+    def test_interactive_first(self):
+        """test_ratelimit.RateLimiterTest.test_interactive_first"""
+        limiter = RateLimiter()
+        with limiter.waiting(INTERACTIVE):
+            self.assertTrue(limiter.try_acquire(BACKGROUND) > 0)
+            self.assertEqual(0, limiter.try_acquire(INTERACTIVE))
+        self.assertEqual(0, limiter.try_acquire(BACKGROUND))
+
+    def test_shared_per_token(self):
+        """test_ratelimit.RateLimiterTest.test_shared_per_token"""
+        limiters = []
+        threads = [threading.Thread(target=lambda: limiters.append(get_limiter('token')))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(1, len(set(id(limiter) for limiter in limiters)))
+        self.assertIsNot(limiters[0], get_limiter('other'))
@@ -0,0 +1,55 @@
+from dopy.api.v2 import DoApiDomains
+from dopy.reconcile import CREATE, DELETE, UPDATE, ZoneReconciler, normalize, record_key
+from dopy.testing import FakeDoTestCase
+
+
+class ZoneReconcilerTest(FakeDoTestCase):
+
+    server_options = {'domains': 1, 'records': 6}
+
+    def setUp(self):
+        super(ZoneReconcilerTest, self).setUp()
+        self.server.add_record('example0.com', {'type': 'NS', 'name': '@',
+                                                'data': 'ns1.digitalocean.com'})
+        self.reconciler = ZoneReconciler(self.api(DoApiDomains), 'example0.com', max_workers=4)
+        self.desired = [
+            {'type': 'A', 'name': 'host-0', 'data': '10.1.0.0'},
+            {'type': 'A', 'name': 'host-1.example0.com.', 'data': '10.1.0.1', 'ttl': 60},
+            {'type': 'A', 'name': 'host-2', 'data': '10.9.9.9'},
+            {'type': 'a', 'name': 'host-3', 'data': '10.1.0.3'},
+            {'type': 'A', 'name': 'host-3', 'data': '10.1.0.3'},
+            {'type': 'CNAME', 'name': 'www', 'data': 'example0.com.'},
+        ]
+
+    def zone(self):
+        return sorted(record_key(normalize(record))
+                      for record in self.server.records['example0.com'].values())
+
+    def test_plan(self):
+        """test_reconcile.ZoneReconcilerTest.test_plan"""
+        before = self.zone()
+        plan = self.reconciler.reconcile(self.desired, dry_run=True)
+        self.assertEqual(before, self.zone())
+        self.assertEqual([CREATE], [change.op for change in plan.creates])
+        self.assertEqual({'data': '10.9.9.9'}, plan.updates[1].fields)
+        self.assertEqual({'ttl': 60}, plan.updates[0].fields)
+        self.assertEqual(['10.1.0.4', '10.1.0.5'], [change.current['data'] for change in plan.deletes])
+        self.assertEqual(2, plan.summary()['unchanged'])
+        self.assertEqual(['fetch', 'plan'], sorted(plan.timings))
+        self.assertIn('+ CNAME www example0.com.', plan.describe())
+
+    def test_apply(self):
+        """test_reconcile.ZoneReconcilerTest.test_apply"""
+        requests = self.server.requests
+        plan = self.reconciler.reconcile(self.desired)
+        self.assertEqual([], plan.errors)
+        # One listing request plus one per change
+        self.assertEqual(1 + 5, self.server.requests - requests)
+        self.assertEqual(sorted([('A', 'host-0', '10.1.0.0'), ('A', 'host-1', '10.1.0.1'),
+                                 ('A', 'host-2', '10.9.9.9'), ('A', 'host-3', '10.1.0.3'),
+                                 ('CNAME', 'www', 'example0.com'),
+                                 ('NS', '@', 'ns1.digitalocean.com')]), self.zone())
+        self.assertEqual(0, len(self.reconciler.reconcile(self.desired)))
+        self.assertIn('apply', plan.timings)
+        self.assertEqual(DELETE, plan.changes[-1].op)
+        self.assertEqual(UPDATE, plan.changes[0].op)
@@ -0,0 +1,63 @@
+from dopy.api.v2 import DoManager
+from dopy.exceptions import DoTimeoutError
+from dopy.replicate import COMPLETED, FAILED, ImageReplicator
+from dopy.testing import FakeDoTestCase
+
+
+class ImageReplicatorTest(FakeDoTestCase):
+
+    server_options = {'images': 3, 'action_duration': 0.05}
+
+    def setUp(self):
+        super(ImageReplicatorTest, self).setUp()
+        self.manager = self.api(DoManager)
+        self.replicator = ImageReplicator(self.manager, max_transfers=2, interval=0.01,
+                                          progress=self.track)
+        self.in_flight = []
+
+    def track(self, replication):
+        self.in_flight.append(len(replication.in_progress))
+
+    def test_plan_skips_present_regions(self):
+        """test_replicate.ImageReplicatorTest.test_plan_skips_present_regions"""
+        image_ids = sorted(self.server.images)
+        replication = self.replicator.plan([image_ids[0], 'image-1', 'image-1'],
+                                           ['nyc1', 'ams3', 'fra1'])
+        self.assertEqual(4, len(replication))
+        self.assertEqual([(image_ids[0], 'nyc1'), (image_ids[1], 'nyc1')],
+                         replication.present)
+        self.assertEqual(1, self.server.log.count(('GET', '/images')))
+        self.assertFalse([path for method, path in self.server.log
+                          if path.startswith('/images/')])
+
+    def test_replicate(self):
+        """test_replicate.ImageReplicatorTest.test_replicate"""
+        regions = ['nyc1', 'ams3', 'sgp1', 'fra1']
+        replication = self.manager.replicate_images(
+            sorted(self.server.images), regions, max_transfers=2, interval=0.01)
+        self.assertTrue(replication.ready)
+        self.assertEqual(9, len(replication.completed))
+        self.assertEqual(dict((key, sorted(regions)) for key in self.server.images),
+                         replication.regions())
+        for image in self.server.images.values():
+            self.assertEqual(sorted(regions), sorted(image['regions']))
+
+    def test_transfer_limit(self):
+        """test_replicate.ImageReplicatorTest.test_transfer_limit"""
+        replication = self.replicator.replicate(sorted(self.server.images), ['ams3', 'sgp1'])
+        self.assertEqual([COMPLETED] * 6, [t.status for t in replication.transfers])
+        self.assertTrue(max(self.in_flight) <= 2)
+        self.assertEqual(6, replication.summary()['completed'])
+
+    def test_failures_and_timeout(self):
+        """test_replicate.ImageReplicatorTest.test_failures_and_timeout"""
+        replication = self.replicator.plan([{'id': 424242, 'name': 'gone', 'regions': []}],
+                                           ['ams3'])
+        self.replicator.apply(replication)
+        self.assertEqual([FAILED], [t.status for t in replication.transfers])
+
+        self.server.action_duration = 60
+        replication = self.replicator.plan(sorted(self.server.images)[:1], ['ams3'])
+        with self.assertRaises(DoTimeoutError) as raised:
+            self.replicator.apply(replication, timeout=0.05)
+        self.assertEqual([replication.transfers[0].action], raised.exception.pending)
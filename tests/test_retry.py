@@ -0,0 +1,71 @@
+from unittest import TestCase
+
+import mock
+from requests import ConnectionError
+
+from dopy.retry import RetryPolicy, retry_after
+
+URL = 'https://api.digitalocean.com/v2/droplets/'
+
+
+def response(status, headers=None):
+    return mock.Mock(status_code=status, headers=headers or {})
+
+
+class RetryPolicyTest(TestCase):
+
+    def make_policy(self, **kwargs):
+        policy = RetryPolicy(**kwargs)
+        self.slept = []
+        policy.sleep = self.slept.append
+        policy.clock = lambda: sum(self.slept)
+        return policy
+
+    def test_retry_get(self):
+        """test_retry.RetryPolicyTest.test_retry_get"""
+        policy = self.make_policy(backoff=1)
+        send = mock.Mock(side_effect=[response(502), ConnectionError('reset'), response(200)])
+        result = policy.call('GET', URL, send)
+        self.assertEqual(200, result.status_code)
+        self.assertEqual(2, result.retries)
+        self.assertEqual(3, send.call_count)
+        self.assertTrue(self.slept[0] <= 1 and self.slept[1] <= 2)
+        self.assertEqual({('GET', '/v2/droplets/'): 2}, policy.stats())
+
+    def test_post_opt_in(self):
+        """test_retry.RetryPolicyTest.test_post_opt_in"""
+        send = mock.Mock(side_effect=[response(503), response(201)])
+        self.assertEqual(503, self.make_policy().call('POST', URL, send).status_code)
+        send = mock.Mock(side_effect=[response(503), response(201)])
+        self.assertEqual(201, self.make_policy(retry_post=True).call('POST', URL, send).status_code)
+
+    def test_retry_after(self):
+        """test_retry.RetryPolicyTest.test_retry_after"""
+        policy = self.make_policy()
+        send = mock.Mock(side_effect=[response(429, {'Retry-After': '7'}), response(200)])
+        policy.call('DELETE', URL, send)
+        self.assertEqual([7], self.slept)
+        self.assertIsNone(retry_after(response(200)))
+
+    def test_budget_and_attempts(self):
+        """test_retry.RetryPolicyTest.test_budget_and_attempts"""
+        policy = self.make_policy(budget=10)
+        send = mock.Mock(return_value=response(503, {'Retry-After': '6'}))
+        self.assertEqual(503, policy.call('GET', URL, send).status_code)
+        self.assertEqual(2, send.call_count)
+
+        policy = self.make_policy(max_attempts=3, backoff=0)
+        send = mock.Mock(side_effect=ConnectionError('reset'))
+        with self.assertRaises(ConnectionError):
+            policy.call('GET', URL, send)
+        self.assertEqual(3, send.call_count)
+
+    def test_next_delay(self):
+        """test_retry.RetryPolicyTest.test_next_delay"""
+        policy = self.make_policy(max_attempts=2)
+        self.assertIsNone(policy.next_delay('GET', URL, 0, 0, response(200)))
+        throttled = response(503, {'Retry-After': '3'})
+        self.assertEqual(3, policy.next_delay('GET', URL, 0, 0, throttled))
+        self.assertIsNotNone(policy.next_delay('GET', URL, 0, 0))
+        self.assertIsNone(policy.next_delay('GET', URL, 1, 0))
+        self.assertIsNone(policy.next_delay('POST', URL, 0, 0))
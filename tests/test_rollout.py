@@ -0,0 +1,72 @@
+from dopy.api.v2 import DoApiDroplets
+from dopy.exceptions import DoTimeoutError
+from dopy.rollout import DONE, FAILED, SKIPPED, Rollout, Step
+from dopy.testing import FakeDoTestCase
+
+
+class RolloutTest(FakeDoTestCase):
+
+    server_options = {'droplets': 6, 'action_duration': 0.05}
+
+    def setUp(self):
+        super(RolloutTest, self).setUp()
+        self.droplets = self.api(DoApiDroplets)
+        self.ids = sorted(self.server.droplets)
+        self.reports = []
+
+    def rollout(self, steps, **options):
+        options.setdefault('interval', 0.01)
+        rollout = Rollout(self.droplets, steps, progress=self.track, **options)
+        return rollout.run(self.ids)
+
+    def track(self, report):
+        self.reports.append(report.running)
+
+    def test_step_chain(self):
+        """test_rollout.RolloutTest.test_step_chain"""
+        report = self.rollout(['power_off', Step('snapshot', lambda key: 'pre-%s' % key),
+                               'power_on'], concurrency=2)
+        self.assertEqual(6, report.done)
+        self.assertEqual([3] * 6, [len(task.actions) for task in report.tasks])
+        self.assertTrue(max(self.reports) <= 2)
+        self.assertEqual(['active'] * 6, [d['status'] for d in self.server.droplets.values()])
+        self.assertEqual(sorted('pre-%s' % key for key in self.ids),
+                         sorted(image['name'] for image in self.server.images.values()))
+        self.assertEqual(0, self.server.log.count(('GET', '/actions/%s' % report.tasks[0].actions[0])))
+        self.assertIn('6/6 done', report.describe())
+
+    def test_waves_without_pipelining(self):
+        """test_rollout.RolloutTest.test_waves_without_pipelining"""
+        report = self.rollout([Step('resize', '1gb')], concurrency=3, wave_size=2,
+                              pipelining=False)
+        waves = report.waves()
+        self.assertEqual([2, 2, 2], [wave['size'] for wave in waves])
+        for previous, wave in zip(waves, waves[1:]):
+            self.assertTrue(previous['finished'] <= wave['started'])
+        self.assertEqual(['1gb'] * 6, [d['size_slug'] for d in self.server.droplets.values()])
+
+    def test_failure_budget(self):
+        """test_rollout.RolloutTest.test_failure_budget"""
+        self.ids = [999991, 999992] + self.ids
+        report = self.rollout(['reboot'], concurrency=1, max_failures=1)
+        self.assertTrue(report.stopped)
+        self.assertEqual([FAILED, FAILED] + [SKIPPED] * 6,
+                         [task.status for task in report.tasks])
+        self.assertEqual([999991, 999992], sorted(report.errors))
+
+    def test_step_timeout(self):
+        """test_rollout.RolloutTest.test_step_timeout"""
+        self.server.action_duration = 60
+        self.ids = self.ids[:2]
+        report = self.rollout(['power_off', 'power_on'], step_timeout=0.05, max_failures=5)
+        self.assertEqual([FAILED, FAILED], [task.status for task in report.tasks])
+        self.assertTrue(all(isinstance(error, DoTimeoutError)
+                            for error in report.errors.values()))
+
+    def test_droplets_rollout(self):
+        """test_rollout.RolloutTest.test_droplets_rollout"""
+        report = self.droplets.rollout(self.ids[:2], ['rename'], interval=0.01)
+        self.assertEqual(FAILED, report.tasks[0].status)
+        report = self.droplets.rollout(self.ids[:2], [Step('rename', 'renamed')],
+                                       interval=0.01, max_failures=0)
+        self.assertEqual([DONE, DONE], [task.status for task in report.tasks])
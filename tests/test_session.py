@@ -0,0 +1,81 @@
+import json
+import threading
+from unittest import TestCase
+
+from six.moves import BaseHTTPServer, socketserver
+
+from dopy.session import Session
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        body = json.dumps({'path': self.path}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class SessionTest(TestCase):
+
+    def setUp(self):
+        self.server = _Server(('127.0.0.1', 0), _Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.url = 'http://127.0.0.1:%s/v2/sizes' % self.server.server_port
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_keep_alive(self):
+        """test_session.SessionTest.test_keep_alive"""
+        with Session(pool_size=2) as session:
+            for _ in range(5):
+                self.assertEqual('/v2/sizes', session.get(self.url).json()['path'])
+            stats = session.stats()
+        self.assertEqual(5, stats['requests'])
+        self.assertEqual(1, stats['misses'])
+        self.assertEqual(4, stats['hits'])
+
+    def test_warm(self):
+        """test_session.SessionTest.test_warm"""
+        session = Session(pool_size=2)
+        session.warm(self.url, connections=1)
+        session.get(self.url)
+        stats = session.stats()
+        self.assertEqual(0, stats['misses'])
+        self.assertEqual(1, stats['hits'])
+        self.assertEqual((1, 1), (stats['requests'], stats['warmed']))
+        session.close()
+        self.assertEqual(0, session.stats()['requests'])
+
+    def test_warm_many(self):
+        """test_session.SessionTest.test_warm_many"""
+        with Session(pool_size=3) as session:
+            session.warm(self.url, connections=3)
+            self.assertEqual(3, session.stats()['warmed'])
+            threads = [threading.Thread(target=session.get, args=(self.url,)) for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            stats = session.stats()
+        self.assertEqual({'requests': 3, 'connections': 3, 'warmed': 3, 'hits': 3, 'misses': 0},
+                         stats)
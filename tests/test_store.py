@@ -0,0 +1,90 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from dopy.api.v2 import DoApiDomains, DoApiDroplets, DoManager
+from dopy.session import Session
+from dopy.store import CachedReads, InventoryStore
+from dopy.testing import FakeDoServer
+
+
+def _write_droplets(path, start):
+    store = InventoryStore(path)
+    for offset in range(20):
+        store.replace('droplets', [{'id': start + offset, 'name': 'p%s' % start}])
+
+
+class InventoryStoreTest(TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'inventory.db')
+        self.now = [1000.0]
+        self.store = InventoryStore(self.path, max_age=60)
+        self.store.clock = lambda: self.now[0]
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.dir)
+
+    def test_fresh_and_stale(self):
+        """test_store.InventoryStoreTest.test_fresh_and_stale"""
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            return [{'slug': 'nyc%s' % len(calls), 'name': 'New York'}]
+        self.assertEqual('nyc1', self.store.get('regions', fetch)[0]['slug'])
+        self.assertEqual('nyc1', self.store.get('regions', fetch)[0]['slug'])
+        self.assertEqual(1, len(calls))
+        self.now[0] += 61
+        self.assertEqual('nyc1', self.store.get('regions', fetch)[0]['slug'])
+        self.store.wait()
+        self.assertEqual(2, len(calls))
+        self.assertEqual('nyc2', self.store.items('regions')[0]['slug'])
+
+    def test_find(self):
+        """test_store.InventoryStoreTest.test_find"""
+        droplet = {'id': 7, 'name': 'web', 'tags': ['prod'], 'size_slug': '1gb',
+                   'region': {'slug': 'ams3'},
+                   'networks': {'v4': [{'type': 'public', 'ip_address': '192.0.2.7'}]}}
+        self.store.replace('droplets', [droplet, {'id': 8, 'name': 'db', 'tags': ['prod']}])
+        self.assertEqual([droplet], self.store.find('droplets', 'ip', '192.0.2.7'))
+        self.assertEqual([7, 8], [d['id'] for d in self.store.find('droplets', 'tag', 'prod')])
+        self.assertEqual([], self.store.find('droplets', 'name', 'missing'))
+
+    def test_processes(self):
+        """test_store.InventoryStoreTest.test_processes"""
+        workers = [multiprocessing.Process(target=_write_droplets, args=(self.path, start))
+                   for start in (100, 200, 300)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual([0, 0, 0], [worker.exitcode for worker in workers])
+        self.assertEqual(1, len(self.store.items('droplets')))
+
+
+class CachedReadsTest(TestCase):
+
+    def test_reads(self):
+        """test_store.CachedReadsTest.test_reads"""
+        directory = tempfile.mkdtemp()
+        try:
+            with FakeDoServer(droplets=10, domains=1, records=3) as server:
+                with Session() as session:
+                    reads = CachedReads(
+                        InventoryStore(os.path.join(directory, 'cache.db')),
+                        DoManager(session, api_endpoint=server.url),
+                        DoApiDroplets(session, api_endpoint=server.url),
+                        DoApiDomains(session, api_endpoint=server.url))
+                    self.assertEqual(10, len(reads.all_active_droplets()))
+                    self.assertEqual(3, len(reads.all_domain_records('example0.com')))
+                    requests = server.requests
+                    self.assertEqual(10, len(reads.all_active_droplets()))
+                    self.assertEqual(3, reads.find_droplets('name', 'droplet-2')[0]['id'])
+                    self.assertEqual(requests, server.requests)
+        finally:
+            shutil.rmtree(directory)
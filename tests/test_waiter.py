@@ -0,0 +1,140 @@
+from unittest import TestCase
+
+from dopy.api.v2 import DoApiDroplets
+from dopy.exceptions import DoBatchError, DoTimeoutError
+from dopy.testing import FakeDoTestCase
+from dopy.waiter import ActionWaiter, DropletWaiter
+
+
+class FakeManager(object):
+
+    def __init__(self, count, finish_after):
+        # action id -> number of ticks until it completes
+        self.actions = dict((i, finish_after.get(i, 1)) for i in range(1, count + 1))
+        self.calls = []
+
+    def tick(self):
+        for key in self.actions:
+            self.actions[key] -= 1
+
+    def request(self, path, params={}):
+        self.calls.append(path)
+        if path != '/actions':
+            key = int(path.rsplit('/', 1)[1])
+            return {'action': self._action(key)}
+        ids = sorted(self.actions, reverse=True)
+        start = (params['page'] - 1) * params['per_page']
+        page = ids[start:start + params['per_page']]
+        links = {'pages': {'next': 'next'}} if start + params['per_page'] < len(ids) else {}
+        return {'actions': [self._action(key) for key in page], 'links': links}
+
+    def _action(self, key):
+        status = 'completed' if self.actions[key] <= 0 else 'in-progress'
+        return {'id': key, 'status': status}
+
+
+class ActionWaiterTest(TestCase):
+
+    def make_waiter(self, manager):
+        waiter = ActionWaiter(manager, interval=1, max_interval=4, backoff=2, per_page=50)
+        self.slept = []
+        waiter.sleep = lambda seconds: (self.slept.append(seconds), manager.tick())
+        waiter.clock = lambda: sum(self.slept)
+        return waiter
+
+    def test_wait_many(self):
+        """test_waiter.ActionWaiterTest.test_wait_many"""
+        manager = FakeManager(120, {118: 3})
+        waiter = self.make_waiter(manager)
+        done = []
+        for key in range(1, 121):
+            waiter.add({'action': {'id': key}}, done.append)
+        results = waiter.wait()
+        self.assertEqual(120, len(results))
+        self.assertEqual(120, len(done))
+        self.assertNotIn('/actions/118', manager.calls)
+        self.assertTrue(waiter.requests <= 8)
+
+    def test_backoff_and_deadline(self):
+        """test_waiter.ActionWaiterTest.test_backoff_and_deadline"""
+        manager = FakeManager(3, {2: 100})
+        waiter = self.make_waiter(manager)
+        waiter.add(2)
+        with self.assertRaises(DoTimeoutError) as ctx:
+            waiter.wait(timeout=10)
+        self.assertEqual([2], ctx.exception.pending)
+        self.assertEqual([2, 4, 4], self.slept[:3])
+        self.assertEqual(10, sum(self.slept))
+
+    def test_add_done(self):
+        """test_waiter.ActionWaiterTest.test_add_done"""
+        manager = FakeManager(1, {})
+        waiter = self.make_waiter(manager)
+        waiter.add(1)
+        manager.tick()
+        waiter.poll()
+        done = []
+        waiter.add(1, done.append)
+        self.assertEqual([{'id': 1, 'status': 'completed'}], done)
+
+
+class DropletWaiterTest(FakeDoTestCase):
+
+    server_options = {'droplets': 3, 'action_duration': 0.3}
+
+    def setUp(self):
+        super(DropletWaiterTest, self).setUp()
+        self.droplets = self.api(DoApiDroplets)
+
+    def batch_tags(self):
+        return [tag for droplet in self.server.droplets.values() for tag in droplet['tags']
+                if tag.startswith('dopy-batch-')]
+
+    def test_provision(self):
+        """test_waiter.DropletWaiterTest.test_provision"""
+        self.droplets.create_batch = 4
+        names = ['web-%s' % i for i in range(10)]
+        ready = list(self.droplets.provision(names, '512mb', 'ubuntu-14-04-x64', 'nyc3',
+                                             tags=['web'], timeout=10))
+        self.assertEqual(sorted(names), sorted(d['name'] for d in ready))
+        self.assertTrue(all(d['ip_address'] for d in ready))
+        self.assertTrue(all('web' in d['tags'] for d in ready))
+        creates = [entry for entry in self.server.log if entry[0] == 'POST']
+        self.assertEqual(3, len(creates))
+        # Readiness comes from the tagged listing, never from a droplet's own URL
+        shows = [path for method, path in self.server.log
+                 if method == 'GET' and path.rstrip('/') != '/droplets']
+        self.assertEqual([], shows)
+        self.assertEqual([], self.batch_tags())
+        self.assertEqual(1, len([path for method, path in self.server.log
+                                 if method == 'DELETE' and path.startswith('/tags/')]))
+
+    def test_timeout(self):
+        """test_waiter.DropletWaiterTest.test_timeout"""
+        created = self.droplets.create_droplets(['slow'], '512mb', 'ubuntu-14-04-x64', 'nyc3',
+                                                tags=['slow'])
+        waiter = DropletWaiter(self.droplets, 'slow', interval=1)
+        waiter.add(created[0])
+        self.slept = []
+        waiter.sleep = self.slept.append
+        waiter.clock = lambda: sum(self.slept)
+        with self.assertRaises(DoTimeoutError) as raised:
+            waiter.wait(timeout=3)
+        self.assertEqual([created[0]['id']], raised.exception.pending)
+        self.assertEqual(len(self.slept) + 1, waiter.requests)
+
+    def test_provision_partial_failure(self):
+        """test_waiter.DropletWaiterTest.test_provision_partial_failure"""
+        self.droplets.create_batch = 2
+        self.server.fail_next(1, status=422)
+        names = ['db-%s' % i for i in range(4)]
+        ready = []
+        with self.assertRaises(DoBatchError) as raised:
+            for droplet in self.droplets.provision(names, '512mb', 'ubuntu-14-04-x64', 'nyc3',
+                                                   timeout=10):
+                ready.append(droplet)
+        self.assertEqual(2, len(raised.exception.created))
+        self.assertEqual(1, len(raised.exception.failed))
+        self.assertEqual(sorted(d['id'] for d in raised.exception.created),
+                         sorted(d['id'] for d in ready))
+        self.assertEqual([], self.batch_tags())
@@ -0,0 +1,114 @@
+import os
+import shutil
+import tempfile
+import threading
+from unittest import TestCase
+
+import six
+
+from dopy.api.v2 import DoApiDomains
+from dopy.reconcile import normalize, record_key
+from dopy.testing import FakeDoTestCase
+from dopy.zonefile import Checkpoint, JSONL, export_zone, import_zone, parse_jsonl, parse_zone
+
+ZONE = """$ORIGIN example.org.
+$TTL 3600
+@   IN  SOA ns1.digitalocean.com. hostmaster.example.org. (
+            1 7200 3600 1209600 1800 )
+@       IN  NS      ns1.digitalocean.com.
+@   300 IN  A       192.0.2.1
+        IN  AAAA    2001:db8::1   ; same owner
+www         CNAME   @
+mail        MX      10 mx1.example.net.
+_sip._tcp   SRV     10 60 5060 sip
+txt     IN  TXT     "v=spf1 \\"quoted\\"" " -all"
+@           CAA     0 issue "letsencrypt.org"
+$ORIGIN sub.example.org.
+api         A       192.0.2.9
+"""
+
+
+class ParseZoneTest(TestCase):
+
+    def test_parse(self):
+        """test_zonefile.ParseZoneTest.test_parse"""
+        records = list(parse_zone(six.StringIO(ZONE), 'example.com'))
+        self.assertEqual(['SOA', 'NS', 'A', 'AAAA', 'CNAME', 'MX', 'SRV', 'TXT', 'CAA', 'A'],
+                         [r['type'] for r in records])
+        a, aaaa, cname, mx, srv, txt, caa, sub = records[2:]
+        self.assertEqual(('@', 300, '192.0.2.1'), (a['name'], a['ttl'], a['data']))
+        self.assertEqual(('@', 3600), (aaaa['name'], aaaa['ttl']))
+        self.assertEqual('@', cname['data'])
+        self.assertEqual((10, 'mx1.example.net.'), (mx['priority'], mx['data']))
+        self.assertEqual((10, 60, 5060, 'sip.example.org.'),
+                         (srv['priority'], srv['weight'], srv['port'], srv['data']))
+        self.assertEqual('v=spf1 "quoted" -all', txt['data'])
+        self.assertEqual((0, 'issue', 'letsencrypt.org'), (caa['flags'], caa['tag'], caa['data']))
+        self.assertEqual('api.sub', sub['name'])
+
+
+class ImportExportTest(FakeDoTestCase):
+
+    server_options = {'domains': 2, 'records': 45, 'page_size': 20}
+
+    def setUp(self):
+        super(ImportExportTest, self).setUp()
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.domains = self.api(DoApiDomains)
+
+    def zone(self, name):
+        return sorted(record_key(normalize(r)) for r in self.server.records[name].values())
+
+    def test_round_trip(self):
+        """test_zonefile.ImportExportTest.test_round_trip"""
+        for format in ('bind', JSONL):
+            out = six.StringIO()
+            self.assertEqual(45, export_zone(self.domains, 'example0.com', out, format=format,
+                                             per_page=20))
+            self.server.records['example1.com'].clear()
+            result = import_zone(self.domains, 'example1.com', six.StringIO(out.getvalue()),
+                                 format=format, max_workers=4)
+            self.assertEqual((45, 0), (result['created'], result['failed']))
+            self.assertEqual(self.zone('example0.com'), self.zone('example1.com'))
+
+    def test_resume(self):
+        """test_zonefile.ImportExportTest.test_resume"""
+        out = six.StringIO()
+        export_zone(self.domains, 'example0.com', out, format=JSONL)
+        lines = out.getvalue().splitlines(True)
+        path = os.path.join(self.dir, 'import.ckpt')
+        self.server.records['example1.com'].clear()
+
+        def crash():
+            for index, line in enumerate(lines):
+                if index == 30:
+                    raise IOError('disk went away')
+                yield line
+        self.assertRaises(IOError, import_zone, self.domains, 'example1.com', crash(),
+                          format=JSONL, max_workers=3, checkpoint=path)
+        self.assertEqual(30, Checkpoint(path).done_below)
+        result = import_zone(self.domains, 'example1.com', lines, format=JSONL,
+                             checkpoint=path)
+        self.assertEqual((15, 30), (result['created'], result['skipped']))
+        self.assertEqual(45, len(list(parse_jsonl(lines))))
+        self.assertEqual(self.zone('example0.com'), self.zone('example1.com'))
+
+    def test_checkpoint_failure(self):
+        """test_zonefile.ImportExportTest.test_checkpoint_failure"""
+        class BrokenCheckpoint(Checkpoint):
+            def mark(self, index):
+                raise IOError('disk full')
+
+        out = six.StringIO()
+        export_zone(self.domains, 'example0.com', out, format=JSONL)
+        results = []
+        thread = threading.Thread(target=lambda: results.append(import_zone(
+            self.domains, 'example1.com', out.getvalue().splitlines(), format=JSONL,
+            max_workers=2, queue_size=2, checkpoint=BrokenCheckpoint())))
+        thread.daemon = True
+        thread.start()
+        thread.join(10)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(45, results[0]['failed'])
+        self.assertIsInstance(results[0]['errors'][0][2], IOError)